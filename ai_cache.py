@@ -0,0 +1,157 @@
+"""AI 응답 캐시
+
+같은 WBS 목표/마감일, 같은 템플릿 주제, 새로고침 후 다시 분석하는 같은 회의록처럼 반복되는
+생성 요청은 (메서드, 모델, 정규화한 프롬프트)의 해시를 키로 로컬 SQLite 파일에 캐시해
+즉시 반환하고 API 할당량을 쓰지 않는다. 앱 DB와 별도 파일이라 재시작 후에도 유지되고
+여러 워커 프로세스가 공유한다 (WAL 모드).
+
+- TTL(AI_CACHE_TTL_SECONDS)이 지난 항목은 조회 시 만료
+- 항목 수가 AI_CACHE_MAX_ENTRIES를 넘으면 가장 오래 사용하지 않은 항목부터 삭제 (LRU)
+- bypass() 컨텍스트 안의 호출은 캐시를 읽지 않고 새로 생성한 결과로 덮어씀
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+import config
+
+_bypass: ContextVar[bool] = ContextVar("ai_cache_bypass", default=False)
+_MISSING = object()
+
+
+def _new_counters() -> Dict[str, int]:
+    return {"hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+
+
+def make_key(method: str, model: str, prompt: str) -> str:
+    """공백 차이를 무시하도록 프롬프트를 정규화한 캐시 키"""
+    normalized = re.sub(r"\s+", " ", prompt).strip()
+    return hashlib.sha256(f"{method}\n{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def bypass(enabled: bool = True):
+    """이 블록 안의 AI 호출은 캐시를 건너뜀 (결과는 새로 저장)"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def is_bypassed() -> bool:
+    return _bypass.get()
+
+
+class ResponseCache:
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_cache ("
+                " key TEXT PRIMARY KEY, method TEXT, value TEXT,"
+                " created_at REAL, accessed_at REAL, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_accessed_at ON ai_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def _count(self, method: str, name: str, amount: int = 1):
+        self.stats.setdefault(method, _new_counters())[name] += amount
+
+    def get(self, key: str, method: str):
+        """캐시된 값. 없거나 만료되었으면 _MISSING"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created_at FROM ai_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count(method, "misses")
+                return _MISSING
+            value, created_at = row
+            if created_at + self.ttl_seconds < now:
+                conn.execute("DELETE FROM ai_cache WHERE key = ?", (key,))
+                conn.commit()
+                self._count(method, "expired")
+                self._count(method, "misses")
+                return _MISSING
+            conn.execute("UPDATE ai_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            conn.commit()
+        self._count(method, "hits")
+        return json.loads(value)
+
+    def set(self, key: str, method: str, value):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO ai_cache (key, method, value, created_at, accessed_at, hits) VALUES (?, ?, ?, ?, ?, 0)"
+                " ON CONFLICT(key) DO UPDATE SET value = excluded.value, created_at = excluded.created_at,"
+                " accessed_at = excluded.accessed_at",
+                (key, method, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            overflow = conn.execute("SELECT COUNT(*) FROM ai_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._count(method, "evictions", overflow)
+            conn.commit()
+        self._count(method, "stores")
+
+    def clear(self) -> int:
+        with self._lock:
+            conn = self._connection()
+            deleted = conn.execute("DELETE FROM ai_cache").rowcount
+            conn.commit()
+        return deleted
+
+    def metrics(self) -> dict:
+        """메서드별 적중/실패 수와 저장된 항목 수 (적중/실패는 이 프로세스 기준)"""
+        with self._lock:
+            conn = self._connection()
+            sizes = dict(conn.execute("SELECT method, COUNT(*) FROM ai_cache GROUP BY method").fetchall())
+        methods = {}
+        for method in set(self.stats) | set(sizes):
+            counters = dict(self.stats.get(method) or _new_counters())
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = round(counters["hits"] / lookups, 3) if lookups else None
+            counters["entries"] = sizes.get(method, 0)
+            methods[method] = counters
+        return {
+            "enabled": config.AI_CACHE_ENABLED,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            "entries": sum(sizes.values()),
+            "methods": methods,
+        }
+
+
+cache = ResponseCache(config.AI_CACHE_PATH, config.AI_CACHE_TTL_SECONDS, config.AI_CACHE_MAX_ENTRIES)
+
+
+def lookup(method: str, model: str, prompt: str):
+    """(키, 캐시된 값 또는 None) 반환. 캐시 대상이 아니면 키도 None"""
+    if not config.AI_CACHE_ENABLED or method not in config.AI_CACHE_METHODS:
+        return None, None
+    key = make_key(method, model, prompt)
+    if is_bypassed():
+        return key, None
+    value = cache.get(key, method)
+    return key, (None if value is _MISSING else value)
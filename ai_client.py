@@ -0,0 +1,545 @@
+"""AI 클라이언트
+
+프로바이더(ai_providers) 초기화와 모델 생성을 요청마다 하지 않도록 프로세스당 하나의 AIHelper를
+앱 시작 시 만들어 공유한다. Gemini는 configure가 한 번만 호출되므로 내부 gRPC 채널(HTTP/2 연결)도
+요청 간에 재사용된다. 모델명과 생성 설정은 config.AI_METHOD_SETTINGS로 메서드별 지정하고,
+백엔드는 config.AI_BACKEND로 고른다 (gemini / 네트워크 없이 도는 stub).
+
+generate_* 메서드는 코루틴이다. 블로킹 SDK 호출은 AI 전용 스레드풀에서 실행되므로 응답이 느려도
+이벤트 루프(다른 페이지 요청)는 막히지 않는다. 라우트에서는 run()으로 감싸 호출하면
+사용자별 동시성 제한이 적용되고, 클라이언트가 연결을 끊으면 대기 중인 호출이 취소된다.
+stream_* 메서드와 stream()은 응답을 조각 단위로 받아 완성된 항목부터 SSE로 보낸다.
+"""
+import asyncio
+import contextlib
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from datetime import date
+from typing import AsyncIterator, Awaitable, Dict, List, Optional
+
+from fastapi import Request
+
+import ai_cache
+import ai_providers
+import ai_resilience
+import config
+import json_stream
+import minutes_analysis
+
+_instance: Optional["AIHelper"] = None
+_current_user_id: ContextVar[Optional[int]] = ContextVar("ai_current_user_id", default=None)
+
+
+class AITimeoutError(Exception):
+    """AI 호출이 AI_TIMEOUT_SECONDS 안에 끝나지 않음"""
+
+
+class ClientDisconnected(Exception):
+    """AI 호출 중 클라이언트가 연결을 끊음"""
+
+
+def parse_json(text: str):
+    """모델 응답 텍스트를 JSON으로 변환 (```json 코드블록 허용)"""
+    text = text.strip()
+    if text.startswith("```json"):
+        text = text[7:]
+    if text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return json.loads(text.strip())
+
+
+def init() -> Optional["AIHelper"]:
+    """앱 시작 시 공유 클라이언트 생성 (gemini 백엔드인데 API 키가 없으면 None)"""
+    global _instance
+    if _instance is None and ai_providers.is_available():
+        _instance = AIHelper()
+    return _instance
+
+
+def get_ai() -> "AIHelper":
+    """공유 AIHelper 반환 (시작 시 초기화되지 않았으면 이 때 생성)"""
+    return _instance or init() or AIHelper()
+
+
+async def run(request: Request, user, call: Awaitable, fresh: bool = False):
+    """라우트에서 AI 호출 실행
+
+    user 단위 동시성 제한을 적용하고, 호출이 끝나기 전에 클라이언트가 연결을 끊으면
+    호출을 취소하고 ClientDisconnected를 발생시킨다.
+    fresh=True 이거나 요청에 Cache-Control: no-cache가 있으면 응답 캐시를 건너뛴다.
+    """
+    fresh = fresh or "no-cache" in request.headers.get("cache-control", "").lower()
+    token = _current_user_id.set(user.id if user else None)
+    try:
+        with ai_cache.bypass(fresh):
+            task = asyncio.ensure_future(call)  # 태스크는 현재 컨텍스트(사용자 ID, 캐시 우회)를 복사해 실행
+    finally:
+        _current_user_id.reset(token)
+
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=config.AI_DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                raise ClientDisconnected("클라이언트 연결이 끊겨 AI 호출을 취소했습니다")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream(request: Request, user, chunks: AsyncIterator[str], events: Dict[tuple, str],
+                 fresh: bool = False) -> AsyncIterator[str]:
+    """스트리밍 AI 응답을 SSE 이벤트로 변환 (StreamingResponse 본문)
+
+    events: {경로 패턴: 이벤트 이름}. JSON에서 패턴에 맞는 값이 완성될 때마다
+    `event: <이름>` / `data: {"path": [...], "value": ...}` 를 보내고, 끝나면 전체 결과로 done,
+    실패하면 error 이벤트를 보낸다. 사용자별 동시성 제한/캐시 우회/연결 끊김 처리는 run()과 같다.
+    """
+    fresh = fresh or "no-cache" in request.headers.get("cache-control", "").lower()
+    out: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        parser = json_stream.JSONStreamParser(events)
+        try:
+            async for chunk in chunks:
+                for path, value in parser.feed(chunk):
+                    event = next(name for pattern, name in events.items() if json_stream.path_matches(pattern, path))
+                    await out.put(_sse(event, {"path": list(path), "value": value}))
+            parser.close()
+            result = parser.result()
+            await out.put(_sse("done", result if result is not None else parse_json(parser.text)))
+        except Exception as e:
+            print(f"AI stream error: {e}")
+            await out.put(_sse("error", {"detail": str(e)}))
+        finally:
+            await chunks.aclose()  # 중간에 취소되어도 SDK 스트림 반복을 멈추고 동시성 슬롯 반환
+        await out.put(None)
+
+    token = _current_user_id.set(user.id if user else None)
+    try:
+        with ai_cache.bypass(fresh):
+            task = asyncio.ensure_future(pump())
+    finally:
+        _current_user_id.reset(token)
+
+    try:
+        yield _sse("start", {})  # 연결 직후 첫 바이트 (프록시 버퍼링/타임아웃 방지)
+        while True:
+            try:
+                message = await asyncio.wait_for(out.get(), timeout=config.AI_DISCONNECT_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        task.cancel()
+
+
+async def run_for_user(user_id: Optional[int], call: Awaitable, fresh: bool = False):
+    """요청 없이(백그라운드 작업에서) AI 호출 실행. user 단위 동시성 제한과 캐시 우회는 run()과 같다"""
+    token = _current_user_id.set(user_id)
+    try:
+        with ai_cache.bypass(fresh):
+            return await call
+    finally:
+        _current_user_id.reset(token)
+
+
+class _HedgePool:
+    """헤지 요청 전용 스레드풀. 취소된 호출도 스레드가 실제로 끝날 때까지 사용 중으로 센다"""
+
+    def __init__(self, size: int):
+        self.size = max(1, size)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="ai-hedge")
+        self._lock = threading.Lock()
+        self._busy = 0
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._busy < self.size
+
+    def _done(self, _):
+        with self._lock:
+            self._busy -= 1
+
+    def run(self, func) -> asyncio.Future:
+        with self._lock:
+            self._busy += 1
+        future = self._executor.submit(func)
+        future.add_done_callback(self._done)
+        return asyncio.wrap_future(future)
+
+
+class AIHelper:
+    """AI 호출 래퍼. 프로세스당 하나를 만들어 공유한다 (get_ai() 사용)"""
+
+    def __init__(self, provider: Optional[ai_providers.AIProvider] = None):
+        self.provider = provider or ai_providers.create_provider()
+        # 실제 동시 호출 수의 상한. 취소/타임아웃된 호출도 스레드가 끝날 때까지 슬롯을 차지한다
+        self._executor = ThreadPoolExecutor(max_workers=config.AI_MAX_CONCURRENCY, thread_name_prefix="ai")
+        # 헤지 요청은 별도 스레드에서 실행해 느린 응답이 일반 호출 슬롯을 두 배로 잡지 않게 함
+        self._hedge_pool = _HedgePool(config.AI_HEDGE_MAX_CONCURRENCY)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # 사용자별 [세마포어, 사용 중/대기 중 호출 수]. 마지막 호출이 끝나면 제거해 사용자 수만큼 쌓이지 않게 함
+        self._user_semaphores: Dict[Optional[int], list] = {}
+        # 속도 제한/재시도/서킷 브레이커/헤지 (모든 프로바이더 호출 공통)
+        self.resilience = ai_resilience.from_config()
+
+    @contextlib.asynccontextmanager
+    async def _slot(self):
+        """사용자별 슬롯 -> 전체 슬롯 순으로 획득"""
+        # asyncio.Semaphore는 이벤트 루프 안에서 만들어야 하므로 첫 호출 때 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(config.AI_MAX_CONCURRENCY)
+        user_id = _current_user_id.get()
+        entry = self._user_semaphores.get(user_id)
+        if entry is None:
+            entry = self._user_semaphores[user_id] = [asyncio.Semaphore(config.AI_MAX_CONCURRENCY_PER_USER), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                async with self._semaphore:
+                    yield
+        finally:
+            entry[1] -= 1
+            if not entry[1] and self._user_semaphores.get(user_id) is entry:
+                del self._user_semaphores[user_id]
+
+    async def _generate(self, method: str, prompt: str):
+        """블로킹 SDK 호출을 AI 전용 스레드풀에서 실행 (사용자별/전체 동시성 제한, 타임아웃, 재시도)"""
+        model_name = self.provider.model_name(method)
+        cache_key, cached = await asyncio.to_thread(ai_cache.lookup, method, model_name, prompt)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.provider.generate, method, prompt)
+
+        async def attempt(hedge: bool = False):
+            running = self._hedge_pool.run(call) if hedge else loop.run_in_executor(self._executor, call)
+            try:
+                return await asyncio.wait_for(running, timeout=config.AI_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                raise AITimeoutError(f"AI 응답 시간이 초과되었습니다 ({config.AI_TIMEOUT_SECONDS}초)")
+
+        async with self._slot():
+            text = await self.resilience.call(attempt, hedge=functools.partial(attempt, hedge=True),
+                                              can_hedge=self._hedge_pool.available)
+        result = parse_json(text)
+        if cache_key:
+            await asyncio.to_thread(ai_cache.cache.set, cache_key, method, result)
+        return result
+
+    async def _stream(self, method: str, prompt: str) -> AsyncIterator[str]:
+        """스트리밍 호출. 응답 텍스트 조각을 도착하는 대로 반환 (캐시 적중 시 저장된 결과 한 번)
+
+        조각 사이 대기 시간이 AI_TIMEOUT_SECONDS를 넘으면 AITimeoutError. 소비자가 중간에 멈추면
+        스레드 쪽 반복도 다음 조각에서 멈춘다. 첫 조각 전에 난 일시적 오류만 재시도하고 헤지는 하지 않는다.
+        """
+        model_name = self.provider.model_name(method)
+        cache_key, cached = await asyncio.to_thread(ai_cache.lookup, method, model_name, prompt)
+        if cached is not None:
+            yield json.dumps(cached, ensure_ascii=False)
+            return
+
+        loop = asyncio.get_running_loop()
+        parts: List[str] = []
+        async with self._slot():
+            for number in range(self.resilience.max_attempts):
+                await self.resilience.admit()
+                chunks: asyncio.Queue = asyncio.Queue()
+                stopped = threading.Event()
+                loop.run_in_executor(self._executor, self._produce, method, prompt, loop, chunks, stopped)
+                try:
+                    while True:
+                        try:
+                            kind, value = await asyncio.wait_for(chunks.get(), timeout=config.AI_TIMEOUT_SECONDS)
+                        except asyncio.TimeoutError:
+                            raise AITimeoutError(f"AI 응답 시간이 초과되었습니다 ({config.AI_TIMEOUT_SECONDS}초)")
+                        if kind == "end":
+                            break
+                        if kind == "error":
+                            raise value
+                        parts.append(value)
+                        yield value
+                except Exception as e:
+                    self.resilience.record(e)
+                    # 이미 내보낸 조각은 되돌릴 수 없으므로 첫 조각 전 실패만 재시도
+                    if parts or not ai_resilience.is_retryable(e) or number == self.resilience.max_attempts - 1:
+                        raise
+                    await self.resilience.backoff(number)
+                    continue
+                finally:
+                    stopped.set()
+                self.resilience.record(None)
+                break
+        if cache_key:
+            await asyncio.to_thread(ai_cache.cache.set, cache_key, method, parse_json("".join(parts)))
+
+    def _produce(self, method: str, prompt: str, loop, chunks: asyncio.Queue, stopped: threading.Event):
+        """스레드에서 프로바이더 스트림을 읽어 이벤트 루프 큐로 넘김"""
+        try:
+            for text in self.provider.stream(method, prompt):
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(chunks.put_nowait, ("chunk", text))
+            loop.call_soon_threadsafe(chunks.put_nowait, ("end", None))
+        except Exception as e:
+            loop.call_soon_threadsafe(chunks.put_nowait, ("error", e))
+
+    def list_models(self) -> List[str]:
+        """generateContent를 지원하는 모델 목록 (연결 확인용)"""
+        return self.provider.list_models()
+
+    async def generate_task_json(self, text, user_context, project_context):
+        prompt = f"""
+        You are a project management assistant. Extract task details.
+
+        Current Date: {date.today()}
+        Users: {user_context}
+        Projects: {project_context}
+        User Input: "{text}"
+
+        Output Schema (JSON):
+        {{
+            "title": "string",
+            "description": "string",
+            "due_date": "YYYY-MM-DD" or null,
+            "assignee_ids": [int],
+            "project_id": int or 0,
+            "department": "string" or null
+        }}
+        """
+        return await self._generate("generate_task_json", prompt)
+
+    async def generate_event_action_json(self, text, user_context, event_context):
+        prompt = f"""
+        You are a calendar assistant. Determine if the user wants to CREATE, UPDATE, or DELETE an event.
+
+        Current Date: {date.today()}
+        Users: {user_context}
+        Upcoming Events: {event_context}
+        User Input: "{text}"
+
+        Output Schema (JSON):
+        {{
+            "action": "CREATE" | "UPDATE" | "DELETE",
+            "event_ids": [int] (Required for UPDATE/DELETE. If multiple match, list all.),
+            "payload": {{
+                "title": "string",
+                "description": "string",
+                "start_time": "YYYY-MM-DDTHH:MM:SS",
+                "end_time": "YYYY-MM-DDTHH:MM:SS" or null
+            }}
+        }}
+        """
+        return await self._generate("generate_event_action_json", prompt)
+
+    async def analyze_meeting_minutes(self, text, user_context):
+        """회의록 분석. 긴 회의록은 조각으로 나눠 동시에 분석한 뒤 합침 (minutes_analysis)"""
+        chunks = minutes_analysis.split_minutes(text)
+        if len(chunks) == 1:
+            return await self._generate("analyze_meeting_minutes", self._minutes_prompt(text, user_context))
+        tasks = [
+            asyncio.create_task(self._generate(
+                "analyze_meeting_minutes", self._minutes_prompt(chunk, user_context, (i + 1, len(chunks)))
+            ))
+            for i, chunk in enumerate(chunks)
+        ]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # 한 조각이 실패하면 나머지 조각 호출도 취소 (결과를 쓰지 못하는 호출에 할당량을 쓰지 않게)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        for i, result in enumerate(results):
+            if not isinstance(result, dict):
+                raise ValueError(f"회의록 분석 결과 형식이 올바르지 않습니다 ({i + 1}/{len(chunks)}번째 조각)")
+        return minutes_analysis.merge_results(results)
+
+    async def stream_meeting_minutes(self, text, user_context) -> AsyncIterator[str]:
+        """analyze_meeting_minutes의 스트리밍 버전 (응답 텍스트 조각). 분할 분석이면 합친 결과를 한 번에"""
+        if len(minutes_analysis.split_minutes(text)) == 1:
+            async for part in self._stream("analyze_meeting_minutes", self._minutes_prompt(text, user_context)):
+                yield part
+            return
+        yield json.dumps(await self.analyze_meeting_minutes(text, user_context), ensure_ascii=False)
+
+    def _minutes_prompt(self, text, user_context, part=None) -> str:
+        section = ""
+        if part:
+            section = (f"\n        These notes are part {part[0]} of {part[1]} of one long meeting. "
+                       "Analyze only this part; the parts are merged afterwards.\n")
+        return f"""
+        You are a professional meeting secretary. Analyze the following meeting notes.
+{section}
+        IMPORTANT: All output (summary, decisions, risks, tasks) MUST be in KOREAN (한국어).
+
+        Current Date: {date.today()}
+        Participants Context: {user_context}
+        Raw Notes:
+        "{text}"
+
+        Tasks:
+        1. Summarize the meeting (5 bullet points max) in Korean.
+        2. Extract key decisions (Decisions) in Korean.
+        3. Identify risks or dependencies (Risks) in Korean.
+        4. Extract actionable tasks (Action Items) in Korean. Try to match assignees from the context.
+
+        Output Schema (JSON):
+        {{
+            "summary": "string (markdown bullet points)",
+            "decisions": ["string"],
+            "risks": ["string"],
+            "action_items": [
+                {{
+                    "title": "string",
+                    "assignee_name": "string (or null)",
+                    "due_date": "YYYY-MM-DD" (or null),
+                    "priority": "High" | "Normal" | "Low"
+                }}
+            ]
+        }}
+        """
+
+    def stream_wbs_json(self, goal, deadline, p_type, scope, stakeholders) -> AsyncIterator[str]:
+        """generate_wbs_json의 스트리밍 버전 (응답 텍스트 조각)"""
+        return self._stream("generate_wbs_json", self._wbs_prompt(goal, deadline, p_type, scope, stakeholders))
+
+    def _wbs_prompt(self, goal, deadline, p_type, scope, stakeholders) -> str:
+        return f"""
+        You are a project management expert. Create a WBS (Work Breakdown Structure) for a new project.
+
+        Project Details:
+        - Goal/Deliverables: {goal}
+        - Deadline: {deadline}
+        - Type: {p_type}
+        - Scope: {scope}
+        - Stakeholders: {stakeholders}
+        - Current Date: {date.today()}
+
+        Task:
+        - Break down the project into standard phases: Planning, Preparation, Execution, Verification/Launch, Operation/Review.
+        - Create specific tasks for each phase.
+        - For each task, include a short checklist of sub-items.
+
+        Output Schema (JSON):
+        {{
+            "phases": [
+                {{
+                    "phase_name": "string (e.g., Planning, Execution)",
+                    "tasks": [
+                        {{
+                            "title": "string (Action-oriented task name)",
+                            "checklist": ["string", "string"],
+                            "estimated_days": int,
+                            "is_milestone": boolean,
+                            "is_core": boolean (true if essential, false if optional)
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        """
+
+    async def generate_wbs_json(self, goal, deadline, p_type, scope, stakeholders):
+        prompt = self._wbs_prompt(goal, deadline, p_type, scope, stakeholders)
+        return await self._generate("generate_wbs_json", prompt)
+
+    async def generate_work_report(self, task_list, report_type, start_date, end_date):
+        prompt = f"""
+        You are an HR and Project Management expert. Analyze the user's work logs and generate a performance report.
+
+        Report Type: {report_type}
+        Period: {start_date} ~ {end_date}
+
+        User's Task Log:
+        {task_list}
+
+        Instructions:
+        1. Analyze the tasks to understand the Context and Volume.
+           If the log contains summaries of already evaluated sub-periods (daily/weekly reports), treat them as
+           the record of that work: aggregate their summaries and scores instead of re-evaluating each task.
+        2. Evaluate performance based on 4 categories:
+           - Productivity (Task completion volume & speed)
+           - Quality (Complexity & impact of tasks)
+           - Consistency (Regular updates & management)
+           - Communication (clarity of titles/descriptions)
+        3. Assign a score (0-100) for each category.
+        4. Calculate the Average Score.
+        5. Organize the tasks into a structured list for display. Infer a 'Category' for each task (e.g., Development, Meeting, Planning).
+
+        IMPORTANT: Output content MUST be in KOREAN (한국어), BUT JSON Keys MUST remain in English.
+
+        Output Schema (JSON):
+        {{
+            "summary": "string (Overall summary of the period, markdown allowed)",
+            "scores": {{
+                "productivity": int,
+                "quality": int,
+                "consistency": int,
+                "communication": int
+            }},
+            "average_score": int,
+            "tasks_processed": [
+                {{
+                    "date": "YYYY-MM-DD" (or "Unknown"),
+                    "category": "string (Inferred Category)",
+                    "title": "string",
+                    "status": "string (Done/In Progress/Todo)",
+                    "feedback": "string (Brief specific comment on this task)"
+                }}
+            ],
+            "strengths": ["string (Key strength 1)", "string (Key strength 2)"],
+            "improvements": ["string (Area for improvement 1)", "string (Area for improvement 2)"],
+            "overall_comment": "string (Short overall summary/comment)"
+        }}
+        """
+        return await self._generate("generate_work_report", prompt)
+
+    async def generate_template_json(self, topic):
+        prompt = f"""
+        You are a process improvement expert. Create a new Work Template for the following topic:
+        Topic: "{topic}"
+
+        The template should follow the standard structure with Phases and Tasks.
+        Language: KOREAN (한국어) - Titles and descriptions must be in Korean.
+
+        Output Schema (JSON):
+        {{
+            "name": "string (Template Name)",
+            "category": "string (Category Name e.g. 'Marketing', 'Development', 'HR')",
+            "description": "string (Brief description of this process)",
+            "phases": [
+                {{
+                    "phase_name": "string (e.g., 기획, 실행, 검토)",
+                    "tasks": [
+                        {{
+                            "title": "string",
+                            "description": "string",
+                            "estimated_days": int,
+                            "is_core": boolean,
+                            "checklist": ["string", "string"]
+                        }}
+                    ]
+                }}
+            ]
+        }}
+        """
+        return await self._generate("generate_template_json", prompt)
@@ -0,0 +1,239 @@
+"""AI 프롬프트용 컨텍스트 선택
+
+자연어 업무/일정 등록 프롬프트에 모든 사용자, 모든 프로젝트를 넣으면 조직이 커질수록 토큰 수와
+응답 시간이 늘어난다. 입력 문장에서 언급된 이름을 찾아 관련 있는 항목만 골라 넣는다.
+
+- 사용자/프로젝트 이름은 프로세스 메모리의 2-gram 색인으로 후보를 좁힌 뒤 difflib로 유사도를 계산
+  (오타, 조사가 붙은 이름, 프로젝트명 일부만 언급한 경우도 일치)
+- 요청한 사용자와 같은 부서 항목에 가산점을 주고, 남는 자리는 같은 부서 항목으로 채움
+- 일정은 입력의 날짜 표현(오늘/내일/다음주/10월 3일/2026-10-03 등)으로 기간을 정해 그 안에서만 고름
+- 항목 수는 AI_CONTEXT_MAX_* 로 제한되므로 조직 규모와 관계없이 프롬프트 크기가 일정하다
+"""
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import config
+import models
+
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+# 프로젝트명에 흔히 붙어 이름을 구분하는 데 도움이 안 되는 단어
+_GENERIC_WORDS = {"프로젝트", "project", "업무", "구축", "개발", "tf", "팀"}
+_WEEKDAYS = ["월요일", "화요일", "수요일", "목요일", "금요일", "토요일", "일요일"]
+_WEEK_WORDS = [("지난주", -1), ("이번주", 0), ("(?<!다)다음주", 1), ("다다음주", 2)]
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", (text or "").lower())
+
+
+def _bigrams(text: str) -> Set[str]:
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _department(value: Optional[str]) -> Optional[str]:
+    """영문 부서 코드(System 등)도 한글 부서명으로 맞춰 비교"""
+    return config.DEPARTMENT_MAPPING.get(value, value) if value else value
+
+
+def _best_window_ratio(word: str, text: str) -> float:
+    """text 안에서 word와 가장 비슷한 같은 길이 구간의 유사도 (0~1)"""
+    if not word or not text:
+        return 0.0
+    if word in text:
+        return 1.0
+    matcher = SequenceMatcher(None, "", word)  # seq2를 고정해 word 쪽 분석을 재사용
+    best = 0.0
+    size = len(word)
+    for start in range(0, max(1, len(text) - size + 1)):
+        matcher.set_seq1(text[start:start + size])
+        if matcher.real_quick_ratio() <= best or matcher.quick_ratio() <= best:
+            continue
+        best = max(best, matcher.ratio())
+    return best
+
+
+class NameIndex:
+    """이름 2-gram -> 항목 역색인. 입력과 2-gram을 하나도 공유하지 않는 항목은 비교하지 않는다"""
+
+    def __init__(self, entries: List[dict]):
+        self.entries = entries
+        self._postings: Dict[str, Set[int]] = {}
+        for position, entry in enumerate(entries):
+            words = [_normalize(w) for w in re.split(r"\s+", entry["name"] or "")]
+            entry["key"] = _normalize(entry["name"])
+            entry["words"] = [w for w in words if len(w) >= 2 and w not in _GENERIC_WORDS and w != entry["key"]]
+            for gram in _bigrams(entry["key"]):
+                self._postings.setdefault(gram, set()).add(position)
+
+    def match(self, text: str) -> Dict[int, float]:
+        """입력과 일치하는 항목 ID -> 유사도 (AI_CONTEXT_MATCH_THRESHOLD 이상만)"""
+        normalized = _normalize(text)
+        candidates: Set[int] = set()
+        for gram in _bigrams(normalized):
+            candidates |= self._postings.get(gram, set())
+
+        scores: Dict[int, float] = {}
+        for position in candidates:
+            entry = self.entries[position]
+            score = _best_window_ratio(entry["key"], normalized)
+            for word in entry["words"]:
+                # 프로젝트명 일부(핵심 단어)만 언급한 경우
+                score = max(score, 0.9 * _best_window_ratio(word, normalized))
+            if score >= config.AI_CONTEXT_MATCH_THRESHOLD:
+                scores[entry["id"]] = score
+        return scores
+
+
+_indexes: Dict[str, Tuple[tuple, float, NameIndex]] = {}
+_lock = threading.Lock()
+
+
+def _get_index(db: Session, name: str, model, rows_query) -> NameIndex:
+    """행 수/최대 ID가 바뀌었거나 TTL이 지나면 다시 만드는 메모리 색인"""
+    signature = tuple(db.query(func.count(model.id), func.max(model.id)).one())
+    cached = _indexes.get(name)
+    if cached and cached[0] == signature and time.time() - cached[1] < config.AI_CONTEXT_INDEX_TTL_SECONDS:
+        return cached[2]
+    with _lock:
+        index = NameIndex([
+            {"id": row[0], "name": row[1], "department": _department(row[2]),
+             "active": len(row) < 4 or row[3] != "Completed"}
+            for row in rows_query.all()
+        ])
+        _indexes[name] = (signature, time.time(), index)
+    return index
+
+
+def _user_index(db: Session) -> NameIndex:
+    return _get_index(db, "users", models.User,
+                      db.query(models.User.id, models.User.username, models.User.department))
+
+
+def _project_index(db: Session) -> NameIndex:
+    return _get_index(db, "projects", models.Project,
+                      db.query(models.Project.id, models.Project.name, models.Project.department,
+                               models.Project.status))
+
+
+def _select(index: NameIndex, text: str, department: Optional[str], limit: int,
+            always: Optional[int] = None) -> List[dict]:
+    """이름이 언급된 항목(유사도 + 같은 부서 가산점 순) 다음으로 같은 부서의 진행 중 항목을 limit까지"""
+    matched = index.match(text)
+    by_id = {entry["id"]: entry for entry in index.entries}
+
+    def affinity(entry) -> float:
+        return config.AI_CONTEXT_DEPARTMENT_BONUS if department and entry["department"] == department else 0.0
+
+    ranked = sorted(matched, key=lambda i: matched[i] + affinity(by_id[i]), reverse=True)
+    chosen = ranked[:limit]
+    if always is not None and always in by_id and always not in chosen:
+        chosen = chosen[:limit - 1] + [always]
+    for entry in index.entries:
+        if len(chosen) >= limit:
+            break
+        if entry["id"] not in chosen and entry["active"] and department and entry["department"] == department:
+            chosen.append(entry["id"])
+    return [by_id[i] for i in chosen]
+
+
+def _user_context(users: List[dict]) -> str:
+    return ", ".join(f"{u['name']}(ID:{u['id']}, {u['department'] or '-'})" for u in users)
+
+
+def task_context(db: Session, user: models.User, text: str) -> Tuple[str, str]:
+    """업무 등록 프롬프트용 (사용자 컨텍스트, 프로젝트 컨텍스트)"""
+    department = _department(user.department)
+    users = _select(_user_index(db), text, department, config.AI_CONTEXT_MAX_USERS, always=user.id)
+    projects = _select(_project_index(db), text, department, config.AI_CONTEXT_MAX_PROJECTS)
+    project_ctx = ", ".join(f"{p['name']}(ID:{p['id']})" for p in projects)
+    return _user_context(users), project_ctx
+
+
+def time_window(text: str, now: datetime) -> Optional[Tuple[datetime, datetime]]:
+    """입력에 언급된 날짜들을 포함하는 기간 [시작, 끝). 날짜 표현이 없으면 None"""
+    today = now.date()
+    days: List[date] = []
+    compact = re.sub(r"\s+", "", text)
+
+    for word, offset in (("그저께", -2), ("어제", -1), ("오늘", 0), ("내일", 1), ("모레", 2)):
+        if word in compact:
+            days.append(today + timedelta(days=offset))
+
+    week_start = today - timedelta(days=today.weekday())
+    named_days = [i for i, name in enumerate(_WEEKDAYS) if name in compact]
+    weeks = [offset for pattern, offset in _WEEK_WORDS if re.search(pattern, compact)]
+    for offset in weeks:
+        start = week_start + timedelta(weeks=offset)
+        if named_days:
+            days.extend(start + timedelta(days=i) for i in named_days)
+        else:
+            days.extend([start, start + timedelta(days=6)])
+    if not weeks:
+        # 주 언급 없이 요일만 있으면 오늘 이후 가장 가까운 해당 요일
+        days.extend(today + timedelta(days=(i - today.weekday()) % 7) for i in named_days)
+
+    for y, m, d in re.findall(r"(\d{4})-(\d{1,2})-(\d{1,2})", text):
+        days.append(_safe_date(int(y), int(m), int(d)))
+    for m, d in re.findall(r"(\d{1,2})월\s*(\d{1,2})일", text) + re.findall(r"(?<![\d-])(\d{1,2})/(\d{1,2})(?![\d/])", text):
+        day = _safe_date(today.year, int(m), int(d))
+        if day and day < today - timedelta(days=180):
+            day = _safe_date(today.year + 1, int(m), int(d))  # 연초에 말하는 12월 일정 등
+        days.append(day)
+
+    days = [d for d in days if d]
+    if not days:
+        return None
+    return datetime.combine(min(days), datetime.min.time()), datetime.combine(max(days) + timedelta(days=1), datetime.min.time())
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def event_context(db: Session, user: models.User, text: str, now: Optional[datetime] = None) -> Tuple[str, str]:
+    """일정 등록/수정/삭제 프롬프트용 (사용자 컨텍스트, 일정 컨텍스트)"""
+    now = now or datetime.now()
+    department = _department(user.department)
+    user_index = _user_index(db)
+    users = _select(user_index, text, department, config.AI_CONTEXT_MAX_USERS, always=user.id)
+
+    window = time_window(text, now)
+    if window is None:
+        window = (now - timedelta(days=1), now + timedelta(days=config.AI_CONTEXT_EVENT_DAYS))
+    rows = db.query(
+        models.Event.id, models.Event.title, models.Event.start_time,
+        models.Event.user_id, models.Event.assignee_id, models.Event.department,
+    ).filter(
+        models.Event.start_time >= window[0], models.Event.start_time < window[1]
+    ).order_by(models.Event.start_time).limit(config.AI_CONTEXT_EVENT_SCAN).all()
+
+    normalized = _normalize(text)
+    mentioned = set(user_index.match(text)) | {user.id}
+
+    def score(row) -> float:
+        title = _normalize(row.title)
+        value = _best_window_ratio(title, normalized) if title else 0.0
+        words = [_normalize(w) for w in (row.title or "").split()]
+        value = max([value] + [0.9 * _best_window_ratio(w, normalized) for w in words if len(w) >= 2])
+        if row.user_id in mentioned or row.assignee_id in mentioned:
+            value += 0.5
+        if department and _department(row.department) == department:
+            value += config.AI_CONTEXT_DEPARTMENT_BONUS
+        return value
+
+    ranked = sorted(rows, key=score, reverse=True)[:config.AI_CONTEXT_MAX_EVENTS]
+    ranked.sort(key=lambda row: row.start_time)
+    event_ctx = "\n".join(f"ID:{e.id}|Title:{e.title}|Time:{e.start_time}" for e in ranked)
+    return _user_context(users), event_ctx
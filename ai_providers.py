@@ -0,0 +1,346 @@
+"""AI 백엔드(프로바이더)
+
+AIHelper는 프롬프트 작성, 동시성 제한, 캐시만 담당하고 실제 모델 호출은 프로바이더에 맡긴다.
+config.AI_BACKEND로 선택한다.
+
+- gemini: google.generativeai (운영)
+- stub: 네트워크/API 키 없이 동작하는 결정적 로컬 백엔드 (부하 테스트, 벤치마크, CI)
+  1) AI_STUB_FIXTURES_DIR/<method>/<프롬프트 키>.json 녹화본이 있으면 그대로 재생
+  2) 없으면 AI_STUB_FIXTURES_DIR/<method>.json (메서드 기본 응답)
+  3) 그것도 없으면 프롬프트 해시를 시드로 스키마에 맞는 JSON을 합성
+  응답 지연은 AI_STUB_LATENCY_MS ± AI_STUB_JITTER_MS, 실패율은 AI_STUB_ERROR_RATE로 흉내낸다.
+
+AI_RECORD_DIR을 지정하면 어떤 백엔드든 받은 응답을 stub이 재생할 수 있는 형식으로 저장한다.
+"""
+import abc
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import config
+
+try:
+    import google.generativeai as genai
+except ImportError:  # stub 백엔드만 쓰는 환경
+    genai = None
+
+
+def method_settings(method: str) -> dict:
+    """메서드별 모델/생성 설정 (기본값 + AI_METHOD_SETTINGS)"""
+    settings = {"model": config.AI_MODEL}
+    settings.update(config.AI_METHOD_SETTINGS.get(method, {}))
+    return settings
+
+
+def fixture_key(method: str, prompt: str) -> str:
+    """녹화본 파일 이름. 날짜가 바뀌어도 재생되도록 Current Date 줄과 공백 차이는 무시"""
+    normalized = re.sub(r"Current Date:\s*\S+", "", prompt)
+    normalized = re.sub(r"\s+", " ", normalized).strip()
+    return hashlib.sha256(f"{method}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class AIProvider(abc.ABC):
+    """모델 호출 인터페이스. 메서드는 블로킹이며 AIHelper가 AI 전용 스레드풀에서 실행한다"""
+
+    name = "base"
+
+    @abc.abstractmethod
+    def model_name(self, method: str) -> str:
+        """메서드별 모델명 (캐시 키에 포함)"""
+
+    @abc.abstractmethod
+    def generate(self, method: str, prompt: str) -> str:
+        """응답 텍스트 전체"""
+
+    def stream(self, method: str, prompt: str) -> Iterator[str]:
+        """응답 텍스트 조각"""
+        yield self.generate(method, prompt)
+
+    def list_models(self) -> List[str]:
+        return [self.model_name("")]
+
+
+class GeminiProvider(AIProvider):
+    name = "gemini"
+
+    def __init__(self):
+        if genai is None:
+            raise Exception("google-generativeai is not installed")
+        if not config.GEMINI_API_KEY:
+            raise Exception("No AI API Key configured")
+        options = {"api_key": config.GEMINI_API_KEY}
+        if config.AI_TRANSPORT:
+            options["transport"] = config.AI_TRANSPORT
+        genai.configure(**options)  # 프로세스당 한 번 (내부 gRPC 채널 재사용)
+        self._models: Dict[str, "genai.GenerativeModel"] = {}
+        self._lock = threading.Lock()
+
+    def _model(self, method: str):
+        """메서드별 설정으로 만든 모델 (한 번 만들어 재사용)"""
+        model = self._models.get(method)
+        if model is None:
+            with self._lock:
+                model = self._models.get(method)
+                if model is None:
+                    settings = method_settings(method)
+                    generation_config = {k: v for k, v in settings.items() if k != "model"}
+                    generation_config.setdefault("response_mime_type", "application/json")
+                    model = genai.GenerativeModel(settings["model"], generation_config=generation_config)
+                    self._models[method] = model
+        return model
+
+    def model_name(self, method: str) -> str:
+        return self._model(method).model_name
+
+    def generate(self, method: str, prompt: str) -> str:
+        response = self._model(method).generate_content(
+            prompt, request_options={"timeout": config.AI_TIMEOUT_SECONDS}
+        )
+        return response.text
+
+    def stream(self, method: str, prompt: str) -> Iterator[str]:
+        response = self._model(method).generate_content(
+            prompt, stream=True, request_options={"timeout": config.AI_TIMEOUT_SECONDS}
+        )
+        for chunk in response:
+            try:
+                yield chunk.text
+            except ValueError:  # 텍스트 없는 조각 (종료 사유만 있는 경우 등)
+                continue
+
+    def list_models(self) -> List[str]:
+        return [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+
+
+class StubProviderError(Exception):
+    """AI_STUB_ERROR_RATE로 흉내낸 실패 (할당량 초과와 같은 메시지)"""
+
+
+class StubProvider(AIProvider):
+    name = "stub"
+
+    def __init__(self):
+        self.fixtures_dir = config.AI_STUB_FIXTURES_DIR
+        self._errors = random.Random(config.AI_STUB_SEED)
+        self._lock = threading.Lock()
+
+    def model_name(self, method: str) -> str:
+        return f"stub/{method_settings(method)['model']}"
+
+    def _fixture(self, method: str, key: str) -> Optional[str]:
+        for path in (os.path.join(self.fixtures_dir, method, f"{key}.json"),
+                     os.path.join(self.fixtures_dir, f"{method}.json")):
+            if os.path.isfile(path):
+                with open(path, encoding="utf-8") as f:
+                    return f.read()
+        return None
+
+    def _latency(self, rng: random.Random) -> float:
+        jitter = rng.uniform(-config.AI_STUB_JITTER_MS, config.AI_STUB_JITTER_MS)
+        return max(0.0, config.AI_STUB_LATENCY_MS + jitter) / 1000
+
+    def _respond(self, method: str, prompt: str):
+        key = fixture_key(method, prompt)
+        rng = random.Random(key)
+        with self._lock:
+            failed = self._errors.random() < config.AI_STUB_ERROR_RATE
+        text = self._fixture(method, key)
+        if text is None:
+            text = json.dumps(synthesize(method, prompt, rng), ensure_ascii=False)
+        return text, self._latency(rng), failed
+
+    def generate(self, method: str, prompt: str) -> str:
+        text, latency, failed = self._respond(method, prompt)
+        time.sleep(latency)
+        if failed:
+            raise StubProviderError("429 Resource has been exhausted (stub)")
+        return text
+
+    def stream(self, method: str, prompt: str) -> Iterator[str]:
+        text, latency, failed = self._respond(method, prompt)
+        count = max(1, config.AI_STUB_STREAM_CHUNKS)
+        size = max(1, -(-len(text) // count))
+        for start in range(0, len(text), size):
+            time.sleep(latency / count)
+            if failed:
+                raise StubProviderError("429 Resource has been exhausted (stub)")
+            yield text[start:start + size]
+
+
+class RecordingProvider(AIProvider):
+    """다른 프로바이더의 응답을 AI_RECORD_DIR에 stub 녹화본 형식으로 저장"""
+
+    def __init__(self, inner: AIProvider, directory: str):
+        self.inner = inner
+        self.directory = directory
+        self.name = inner.name
+
+    def _save(self, method: str, prompt: str, text: str):
+        directory = os.path.join(self.directory, method)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{fixture_key(method, prompt)}.json")
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".part", path)
+
+    def model_name(self, method: str) -> str:
+        return self.inner.model_name(method)
+
+    def generate(self, method: str, prompt: str) -> str:
+        text = self.inner.generate(method, prompt)
+        self._save(method, prompt, text)
+        return text
+
+    def stream(self, method: str, prompt: str) -> Iterator[str]:
+        parts = []
+        for chunk in self.inner.stream(method, prompt):
+            parts.append(chunk)
+            yield chunk
+        self._save(method, prompt, "".join(parts))
+
+    def list_models(self) -> List[str]:
+        return self.inner.list_models()
+
+
+PROVIDERS = {"gemini": GeminiProvider, "stub": StubProvider}
+
+
+def create_provider() -> AIProvider:
+    """config.AI_BACKEND에 해당하는 프로바이더 (AI_RECORD_DIR이 있으면 녹화 래퍼 적용)"""
+    if config.AI_BACKEND not in PROVIDERS:
+        raise Exception(f"Unknown AI_BACKEND: {config.AI_BACKEND}")
+    provider = PROVIDERS[config.AI_BACKEND]()
+    if config.AI_RECORD_DIR:
+        provider = RecordingProvider(provider, config.AI_RECORD_DIR)
+    return provider
+
+
+def is_available() -> bool:
+    """AI 기능을 쓸 수 있는 설정인지 (gemini는 API 키 필요)"""
+    return config.AI_BACKEND != "gemini" or bool(config.GEMINI_API_KEY)
+
+
+# --- stub 응답 합성 ---
+# 메서드별 Output Schema에 맞는 JSON을 프롬프트 내용과 시드로 만든다.
+
+_INPUT = re.compile(r'User Input:\s*"(.*)"', re.S)
+_IDS = re.compile(r"\(ID:(\d+)")
+_TASK_LINE = re.compile(r"^\s*- \[([^\]]+)\] (.+?) \(Due: ([^)]*)\)", re.M)
+_PERIOD = re.compile(r"Period:\s*(\d{4}-\d{2}-\d{2})")
+_WORDS = ["검토", "정리", "준비", "공유", "점검", "보고", "협의", "개선", "분석", "작성"]
+_PHASES = ["기획", "준비", "실행", "검증/오픈", "운영/회고"]
+
+
+def _user_input(prompt: str) -> str:
+    match = _INPUT.search(prompt)
+    return match.group(1).strip() if match else ""
+
+
+def _title(rng: random.Random, prefix: str = "") -> str:
+    return f"{prefix}{rng.choice(_WORDS)} {rng.choice(_WORDS)}".strip()
+
+
+def _wbs_phases(rng: random.Random, with_description: bool = False) -> List[dict]:
+    phases = []
+    for phase_name in _PHASES:
+        tasks = []
+        for _ in range(rng.randint(2, 4)):
+            task = {
+                "title": _title(rng, f"{phase_name} "),
+                "checklist": [_title(rng) for _ in range(rng.randint(1, 3))],
+                "estimated_days": rng.randint(1, 10),
+                "is_milestone": rng.random() < 0.15,
+                "is_core": rng.random() < 0.8,
+            }
+            if with_description:
+                task["description"] = _title(rng)
+            tasks.append(task)
+        phases.append({"phase_name": phase_name, "tasks": tasks})
+    return phases
+
+
+def synthesize(method: str, prompt: str, rng: random.Random):
+    """메서드 스키마에 맞는 결정적 응답"""
+    today = date.today()
+    text = _user_input(prompt)
+
+    if method == "generate_task_json":
+        ids = [int(i) for i in _IDS.findall(prompt.split("Projects:")[0])]
+        return {
+            "title": (text[:40] or _title(rng)),
+            "description": text,
+            "due_date": (today + timedelta(days=rng.randint(1, 14))).isoformat(),
+            "assignee_ids": ids[:1],
+            "project_id": 0,
+            "department": None,
+        }
+
+    if method == "generate_event_action_json":
+        start = datetime.combine(today + timedelta(days=rng.randint(1, 7)), datetime.min.time()) + timedelta(hours=10)
+        return {
+            "action": "CREATE",
+            "event_ids": [],
+            "payload": {
+                "title": text[:40] or _title(rng),
+                "description": text,
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(hours=1)).isoformat(),
+            },
+        }
+
+    if method == "analyze_meeting_minutes":
+        return {
+            "summary": "\n".join(f"- {_title(rng)}" for _ in range(rng.randint(2, 5))),
+            "decisions": [_title(rng) for _ in range(rng.randint(1, 3))],
+            "risks": [_title(rng) for _ in range(rng.randint(0, 2))],
+            "action_items": [
+                {
+                    "title": _title(rng),
+                    "assignee_name": None,
+                    "due_date": (today + timedelta(days=rng.randint(1, 14))).isoformat(),
+                    "priority": rng.choice(["High", "Normal", "Low"]),
+                }
+                for _ in range(rng.randint(1, 5))
+            ],
+        }
+
+    if method == "generate_wbs_json":
+        return {"phases": _wbs_phases(rng)}
+
+    if method == "generate_template_json":
+        return {
+            "name": _title(rng, "표준 "),
+            "category": rng.choice(["Marketing", "Development", "HR"]),
+            "description": _title(rng),
+            "phases": _wbs_phases(rng, with_description=True),
+        }
+
+    if method == "generate_work_report":
+        scores = {name: rng.randint(60, 95) for name in ("productivity", "quality", "consistency", "communication")}
+        period = _PERIOD.search(prompt)
+        return {
+            "summary": f"- {_title(rng)}\n- {_title(rng)}",
+            "scores": scores,
+            "average_score": round(sum(scores.values()) / len(scores)),
+            "tasks_processed": [
+                {
+                    "date": due if due not in ("None", "") else (period.group(1) if period else "Unknown"),
+                    "category": rng.choice(["Development", "Meeting", "Planning"]),
+                    "title": title,
+                    "status": status,
+                    "feedback": _title(rng),
+                }
+                for status, title, due in _TASK_LINE.findall(prompt)
+            ],
+            "strengths": [_title(rng), _title(rng)],
+            "improvements": [_title(rng), _title(rng)],
+            "overall_comment": _title(rng),
+        }
+
+    return {}
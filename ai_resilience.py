@@ -0,0 +1,269 @@
+"""AI 호출 복원력 (속도 제한, 재시도, 서킷 브레이커, 헤지 요청)
+
+모든 프로바이더 호출은 ResilientCaller를 거친다.
+
+- TokenBucket: 분당 허용 요청 수(AI_RATE_LIMIT_RPM)에 맞춰 호출을 내보낸다. 429를 받으면
+  모든 호출을 잠시 멈춰(throttle) 재시도가 한꺼번에 몰리지 않게 한다
+- 재시도: 일시적 오류(429, 5xx, 타임아웃, 연결 오류)만 지수 백오프 + full jitter로 재시도
+- CircuitBreaker: 연속 실패가 AI_BREAKER_FAILURES번이면 AI_BREAKER_RESET_SECONDS 동안 호출 없이
+  바로 실패(CircuitOpenError). 이후 한 번 시험 호출해 성공하면 닫힌다
+- 헤지: 응답이 AI_HEDGE_AFTER_SECONDS 안에 오지 않으면 같은 요청을 하나 더 보내 먼저 온 결과를 사용.
+  토큰이 남아 있고 헤지 전용 스레드(AI_HEDGE_MAX_CONCURRENCY)가 비어 있을 때만 보내므로 할당량과
+  일반 호출 스레드풀을 잠식하지 않는다
+"""
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import config
+
+T = TypeVar("T")
+
+_RETRYABLE_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "AITimeoutError", "StubProviderError",
+    "TimeoutError", "ConnectionError", "ConnectionResetError",
+}
+_RETRYABLE_MESSAGES = ("429", "500", "502", "503", "504", "resource has been exhausted", "unavailable",
+                       "deadline exceeded", "timed out", "connection reset")
+
+
+class CircuitOpenError(Exception):
+    """AI 프로바이더 장애로 서킷이 열려 호출하지 않음"""
+
+
+def is_rate_limited(error: Exception) -> bool:
+    message = str(error).lower()
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in message \
+        or "resource has been exhausted" in message
+
+
+def is_retryable(error: Exception) -> bool:
+    """일시적인 오류인지 (잘못된 요청/권한 오류 등은 재시도해도 같은 결과)"""
+    if isinstance(error, CircuitOpenError):
+        return False
+    if any(cls.__name__ in _RETRYABLE_NAMES for cls in type(error).__mro__):
+        return True
+    message = str(error).lower()
+    return any(token in message for token in _RETRYABLE_MESSAGES)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """지수 백오프 + full jitter (0 ~ min(cap, base * 2^attempt))"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 모이는 토큰 버킷 (이벤트 루프 안에서 사용)"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """토큰이 바로 있으면 사용 (기다리지 않음)"""
+        self._refill()
+        if self.rate <= 0 or (self._tokens >= 1 and time.monotonic() >= self._blocked_until):
+            self._tokens -= 1 if self.rate > 0 else 0
+            return True
+        return False
+
+    async def acquire(self):
+        """토큰이 생길 때까지 대기 (대기자는 도착 순서대로)"""
+        if self.rate <= 0:
+            return  # 제한 없음
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = max(self._blocked_until - time.monotonic(), (1 - self._tokens) / self.rate)
+                if wait <= 0:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+
+    def throttle(self, seconds: float):
+        """할당량 초과 응답을 받았을 때 모든 호출을 seconds 동안 멈춤"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        self._tokens = min(self._tokens, 0.0)
+
+    def status(self) -> dict:
+        self._refill()
+        return {
+            "rate_per_minute": round(self.rate * 60, 2),
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "throttled_seconds": round(max(0.0, self._blocked_until - time.monotonic()), 2),
+        }
+
+
+class CircuitBreaker:
+    """closed -> (연속 실패) open -> (대기 후) half_open -> 시험 호출 성공 시 closed / 실패 시 open"""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_started: Optional[float] = None
+
+    def before_call(self):
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                raise CircuitOpenError("AI 서비스 장애로 잠시 요청을 중단했습니다. 잠시 후 다시 시도해주세요.")
+            self.state = "half_open"
+            self._trial_started = None
+        # 시험 호출은 하나만. 취소돼 결과가 기록되지 않은 시험 호출은 reset_seconds 후 다시 허용
+        now = time.monotonic()
+        if self._trial_started is not None and now - self._trial_started < self.reset_seconds:
+            raise CircuitOpenError("AI 서비스 복구 여부를 확인하는 중입니다. 잠시 후 다시 시도해주세요.")
+        self._trial_started = now
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+        self._trial_started = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_started = None
+        if self.failure_threshold > 0 and (self.state == "half_open" or self.failures >= self.failure_threshold):
+            if self.state != "open":
+                print(f"AI circuit breaker opened after {self.failures} failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def status(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class ResilientCaller:
+    """프로바이더 호출 하나를 속도 제한/재시도/서킷 브레이커/헤지로 감싼다"""
+
+    def __init__(self, limiter: TokenBucket, breaker: CircuitBreaker, max_attempts: int,
+                 retry_base: float, retry_cap: float, hedge_after: float):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_cap = retry_cap
+        self.hedge_after = hedge_after
+        self.stats: Dict[str, int] = {"calls": 0, "retries": 0, "hedges": 0, "hedge_wins": 0,
+                                      "hedges_skipped": 0, "failures": 0, "rejected": 0, "throttled": 0}
+
+    async def admit(self):
+        """호출 전 서킷 확인과 토큰 획득 (스트리밍처럼 재시도할 수 없는 호출에 사용)"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.stats["rejected"] += 1
+            raise
+        await self.limiter.acquire()
+        self.stats["calls"] += 1
+
+    def record(self, error: Optional[Exception]):
+        """호출 결과 반영 (error가 None이면 성공)"""
+        if error is None:
+            self.breaker.record_success()
+            return
+        if not is_retryable(error):
+            self.breaker.record_success()  # 요청 자체의 문제이지 서비스 장애가 아님
+            return
+        self.stats["failures"] += 1
+        self.breaker.record_failure()
+        if is_rate_limited(error):
+            self.stats["throttled"] += 1
+            self.limiter.throttle(self.retry_base)
+
+    async def call(self, attempt: Callable[[], Awaitable[T]], hedge: Optional[Callable[[], Awaitable[T]]] = None,
+                   can_hedge: Optional[Callable[[], bool]] = None) -> T:
+        """attempt()를 실행해 결과 반환. 일시적 오류면 백오프 후 max_attempts까지 재시도
+
+        hedge: 응답이 늦을 때 보낼 같은 요청 (없으면 헤지하지 않음). can_hedge()가 False면 보내지 않음
+        """
+        for number in range(self.max_attempts):
+            await self.admit()
+            try:
+                result = await self._hedged(attempt, hedge, can_hedge)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.record(e)
+                if not is_retryable(e) or number == self.max_attempts - 1:
+                    raise
+                await self.backoff(number)
+                continue
+            self.record(None)
+            return result
+        raise RuntimeError("unreachable")
+
+    async def backoff(self, number: int):
+        """number번째 시도 실패 후 재시도 전 대기"""
+        self.stats["retries"] += 1
+        await asyncio.sleep(backoff_delay(number, self.retry_base, self.retry_cap))
+
+    async def _hedged(self, attempt: Callable[[], Awaitable[T]], hedge: Optional[Callable[[], Awaitable[T]]],
+                      can_hedge: Optional[Callable[[], bool]]) -> T:
+        first = asyncio.ensure_future(attempt())
+        if hedge is None or not self.hedge_after or self.hedge_after <= 0:
+            return await first
+
+        pending = {first}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return first.result()
+            if can_hedge is not None and not can_hedge():
+                self.stats["hedges_skipped"] += 1
+                return await first  # 헤지 스레드가 모두 사용 중 (이전 헤지가 아직 끝나지 않음)
+            if not self.limiter.try_acquire():
+                return await first  # 할당량 여유가 없으면 헤지하지 않음
+            self.stats["hedges"] += 1
+            second = asyncio.ensure_future(hedge())
+            pending.add(second)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def status(self) -> dict:
+        return {
+            "rate_limiter": self.limiter.status(),
+            "circuit_breaker": self.breaker.status(),
+            "hedge_after_seconds": self.hedge_after,
+            "stats": dict(self.stats),
+        }
+
+
+def from_config() -> ResilientCaller:
+    return ResilientCaller(
+        TokenBucket(config.AI_RATE_LIMIT_RPM, config.AI_RATE_LIMIT_BURST),
+        CircuitBreaker(config.AI_BREAKER_FAILURES, config.AI_BREAKER_RESET_SECONDS),
+        max_attempts=config.AI_RETRY_ATTEMPTS,
+        retry_base=config.AI_RETRY_BASE_SECONDS,
+        retry_cap=config.AI_RETRY_MAX_SECONDS,
+        hedge_after=config.AI_HEDGE_AFTER_SECONDS,
+    )
@@ -0,0 +1,322 @@
+"""완료 프로젝트 / 오래된 업무·일정 아카이브
+
+완료된 프로젝트(업무, 첨부파일, 진행사항 포함), 프로젝트 없는 오래된 완료 업무,
+보관 기간이 지난 일정을 archived_* 테이블로 옮겨 매 페이지가 조회하는 테이블을 작게 유지한다.
+옮긴 데이터는 원본 ID를 유지하므로 restore_*로 그대로 되돌릴 수 있다.
+
+사용법:
+    python archive.py                  # 아카이브 1회 실행
+    python archive.py restore 12       # 프로젝트 12 복원
+"""
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DateTime, and_, case, func, literal, or_, select
+
+import config
+import models
+import rollups
+import semantic_index
+from database import engine
+
+CHUNK_SIZE = 500
+
+# (원본, 보관) 테이블 쌍
+_PAIRS = {
+    "projects": (models.Project.__table__, models.archived_projects),
+    "project_assignees": (models.project_assignees, models.archived_project_assignees),
+    "project_files": (models.ProjectFile.__table__, models.archived_project_files),
+    "tasks": (models.Task.__table__, models.archived_tasks),
+    "task_assignees": (models.task_assignees, models.archived_task_assignees),
+    "task_files": (models.TaskFile.__table__, models.archived_task_files),
+    "task_progress": (models.TaskProgress.__table__, models.archived_task_progress),
+    "events": (models.Event.__table__, models.archived_events),
+}
+
+
+def _chunks(ids: List[int]):
+    for i in range(0, len(ids), CHUNK_SIZE):
+        yield ids[i:i + CHUNK_SIZE]
+
+
+def _move(conn, name: str, key: str, ids: List[int], now: datetime) -> int:
+    """원본 테이블에서 key IN ids 행을 보관 테이블로 이동"""
+    source, target = _PAIRS[name]
+    cols = [c.name for c in source.columns]
+    moved = 0
+    for chunk in _chunks(ids):
+        where = source.c[key].in_(chunk)
+        conn.execute(target.insert().from_select(
+            cols + ["archived_at"],
+            select(*[source.c[n] for n in cols], literal(now, DateTime)).where(where)
+        ))
+        moved += conn.execute(source.delete().where(where)).rowcount
+    return moved
+
+
+def _restore(conn, name: str, key: str, ids: List[int]) -> int:
+    """보관 테이블에서 key IN ids 행을 원본 테이블로 복원"""
+    source, target = _PAIRS[name]
+    cols = [c.name for c in source.columns]
+    restored = 0
+    for chunk in _chunks(ids):
+        where = target.c[key].in_(chunk)
+        conn.execute(source.insert().from_select(cols, select(*[target.c[n] for n in cols]).where(where)))
+        restored += conn.execute(target.delete().where(where)).rowcount
+    return restored
+
+
+def _task_children(conn, mover, task_ids: List[int], *args) -> Dict[str, int]:
+    """업무에 딸린 진행사항/첨부파일/담당자 연결을 먼저 처리 (FK 순서)"""
+    return {
+        "task_progress": mover(conn, "task_progress", "task_id", task_ids, *args),
+        "task_files": mover(conn, "task_files", "task_id", task_ids, *args),
+        "task_assignees": mover(conn, "task_assignees", "task_id", task_ids, *args),
+    }
+
+
+def project_task_ids(conn, project_ids: List[int]) -> List[int]:
+    """프로젝트에 속한 (보관되지 않은) 업무 ID"""
+    tasks = models.Task.__table__
+    return [tid for (tid,) in conn.execute(select(tasks.c.id).where(tasks.c.project_id.in_(project_ids)))]
+
+
+def archive_projects(conn, project_ids: List[int], now: Optional[datetime] = None) -> Dict[str, int]:
+    """프로젝트와 소속 업무/파일/진행사항을 보관 테이블로 이동"""
+    now = now or datetime.utcnow()
+    if not project_ids:
+        return {}
+    task_ids = project_task_ids(conn, project_ids)
+
+    result = _task_children(conn, _move, task_ids, now)
+    result["tasks"] = _move(conn, "tasks", "id", task_ids, now)
+    result["project_files"] = _move(conn, "project_files", "project_id", project_ids, now)
+    result["project_assignees"] = _move(conn, "project_assignees", "project_id", project_ids, now)
+    # 집계 행은 프로젝트보다 먼저 삭제 (project_rollups FK가 남아 있는 DB에서도 이동이 막히지 않게)
+    rollup_table = models.ProjectRollup.__table__
+    for chunk in _chunks(project_ids):
+        conn.execute(rollup_table.delete().where(rollup_table.c.project_id.in_(chunk)))
+    result["projects"] = _move(conn, "projects", "id", project_ids, now)
+    return result
+
+
+def archive_tasks(conn, task_ids: List[int], now: Optional[datetime] = None) -> Dict[str, int]:
+    """프로젝트 없는 업무를 보관 테이블로 이동"""
+    now = now or datetime.utcnow()
+    if not task_ids:
+        return {}
+    result = _task_children(conn, _move, task_ids, now)
+    result["tasks"] = _move(conn, "tasks", "id", task_ids, now)
+    return result
+
+
+def find_archivable_projects(conn, today: Optional[date] = None) -> List[int]:
+    """완료 상태이고 종료일(없으면 마지막 업무 마감일)이 보관 기준을 지난 프로젝트"""
+    today = today or date.today()
+    cutoff = today - timedelta(days=config.ARCHIVE_PROJECT_AFTER_DAYS)
+    projects = models.Project.__table__
+    tasks = models.Task.__table__
+    last_due = (
+        select(tasks.c.project_id, func.max(tasks.c.due_date).label("last_due"))
+        .where(tasks.c.project_id.isnot(None))
+        .group_by(tasks.c.project_id)
+        .subquery()
+    )
+    stmt = (
+        select(projects.c.id)
+        .select_from(projects.outerjoin(last_due, last_due.c.project_id == projects.c.id))
+        .where(
+            projects.c.status == "Completed",
+            or_(
+                func.coalesce(projects.c.end_date, last_due.c.last_due) < cutoff,
+                and_(projects.c.end_date.is_(None), last_due.c.last_due.is_(None)),
+            )
+        )
+    )
+    return [pid for (pid,) in conn.execute(stmt)]
+
+
+def find_archivable_tasks(conn, today: Optional[date] = None) -> List[int]:
+    """프로젝트에 속하지 않은 완료 업무 중 마감일(없으면 시작일)이 보관 기준을 지난 업무"""
+    today = today or date.today()
+    cutoff = today - timedelta(days=config.ARCHIVE_TASK_AFTER_DAYS)
+    tasks = models.Task.__table__
+    stmt = select(tasks.c.id).where(
+        tasks.c.project_id.is_(None),
+        tasks.c.status == "Done",
+        func.coalesce(tasks.c.due_date, tasks.c.start_date) < cutoff,
+    )
+    return [tid for (tid,) in conn.execute(stmt)]
+
+
+def find_archivable_events(conn, now: Optional[datetime] = None) -> List[int]:
+    """종료 시각(없으면 시작 시각)이 보관 기간을 지난 일정"""
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=config.ARCHIVE_EVENT_AFTER_DAYS)
+    events = models.Event.__table__
+    stmt = select(events.c.id).where(func.coalesce(events.c.end_time, events.c.start_time) < cutoff)
+    return [eid for (eid,) in conn.execute(stmt)]
+
+
+def run_archive() -> Dict[str, int]:
+    """아카이브 1회 실행 (스케줄러/CLI 진입점). 테이블별 이동 행 수를 반환"""
+    now = datetime.utcnow()
+    totals: Dict[str, int] = {}
+    with engine.begin() as conn:
+        project_ids = find_archivable_projects(conn)
+        task_ids = find_archivable_tasks(conn)
+        archived_task_ids = project_task_ids(conn, project_ids) + task_ids if project_ids else task_ids
+        for part in (
+            archive_projects(conn, project_ids, now),
+            archive_tasks(conn, task_ids, now),
+            {"events": _move(conn, "events", "id", find_archivable_events(conn), now)},
+        ):
+            for name, count in part.items():
+                totals[name] = totals.get(name, 0) + count
+    # Core로 옮긴 업무는 ORM 커밋 훅을 거치지 않으므로 의미 검색 색인에서 직접 제거 (회의록은 보관 대상 아님)
+    semantic_index.remove("task", archived_task_ids)
+    return totals
+
+
+def restore_project(conn, project_id: int) -> Dict[str, int]:
+    """보관된 프로젝트와 소속 업무/파일/진행사항을 원본 테이블로 복원"""
+    archived_tasks = models.archived_tasks
+    task_ids = [tid for (tid,) in conn.execute(
+        select(archived_tasks.c.id).where(archived_tasks.c.project_id == project_id)
+    )]
+    result = {"projects": _restore(conn, "projects", "id", [project_id])}
+    if not result["projects"]:
+        return {}
+    result["project_assignees"] = _restore(conn, "project_assignees", "project_id", [project_id])
+    result["project_files"] = _restore(conn, "project_files", "project_id", [project_id])
+    result["tasks"] = _restore(conn, "tasks", "id", task_ids)
+    result["task_assignees"] = _restore(conn, "task_assignees", "task_id", task_ids)
+    result["task_files"] = _restore(conn, "task_files", "task_id", task_ids)
+    result["task_progress"] = _restore(conn, "task_progress", "task_id", task_ids)
+    rollups.refresh(conn, [project_id])
+    return result
+
+
+def restore_events(conn, event_ids: Iterable[int]) -> int:
+    """보관된 일정 복원"""
+    return _restore(conn, "events", "id", list(event_ids))
+
+
+# --- 보관 데이터 조회 (include_archived 읽기 경로) ---
+
+def list_archived_projects(conn) -> List[dict]:
+    """보관된 프로젝트 목록 (업무 수 포함)"""
+    ap = models.archived_projects
+    at = models.archived_tasks
+    task_counts = (
+        select(
+            at.c.project_id,
+            func.count(at.c.id).label("total_count"),
+            func.sum(case((at.c.status == "Done", 1), else_=0)).label("done_count"),
+        )
+        .group_by(at.c.project_id)
+        .subquery()
+    )
+    stmt = (
+        select(ap, task_counts.c.total_count, task_counts.c.done_count)
+        .select_from(ap.outerjoin(task_counts, task_counts.c.project_id == ap.c.id))
+        .order_by(ap.c.archived_at.desc())
+    )
+    return [dict(row._mapping) for row in conn.execute(stmt)]
+
+
+def is_archived_project(conn, project_id: int) -> bool:
+    ap = models.archived_projects
+    return conn.execute(select(ap.c.id).where(ap.c.id == project_id)).first() is not None
+
+
+def get_archived_project_tasks(conn, project_id: int) -> List[dict]:
+    """보관된 프로젝트의 업무 목록 (/api/projects/{id}/tasks와 같은 형식)"""
+    at = models.archived_tasks
+    users = models.User.__table__
+    tasks = [dict(r._mapping) for r in conn.execute(select(at).where(at.c.project_id == project_id))]
+    task_ids = [t["id"] for t in tasks]
+    if not task_ids:
+        return []
+
+    assignees: Dict[int, List[tuple]] = {}
+    ata = models.archived_task_assignees
+    for task_id, user_id, username in conn.execute(
+        select(ata.c.task_id, users.c.id, users.c.username)
+        .select_from(ata.join(users, users.c.id == ata.c.user_id))
+        .where(ata.c.task_id.in_(task_ids))
+    ):
+        assignees.setdefault(task_id, []).append((user_id, username))
+
+    files: Dict[int, List[tuple]] = {}
+    atf = models.archived_task_files
+    for file_id, task_id, filename in conn.execute(
+        select(atf.c.id, atf.c.task_id, atf.c.filename).where(atf.c.task_id.in_(task_ids))
+    ):
+        files.setdefault(task_id, []).append((filename, f"/files/task/{file_id}"))
+
+    progresses: Dict[int, List[dict]] = {}
+    atp = models.archived_task_progress
+    for row in conn.execute(
+        select(atp.c.id, atp.c.task_id, atp.c.content, atp.c.date, users.c.username)
+        .select_from(atp.outerjoin(users, users.c.id == atp.c.writer_id))
+        .where(atp.c.task_id.in_(task_ids))
+        .order_by(atp.c.date.desc())
+    ):
+        progresses.setdefault(row.task_id, []).append({
+            "id": row.id,
+            "content": row.content,
+            "date": row.date.strftime("%Y-%m-%d") if row.date else "",
+            "writer": row.username or "Unknown"
+        })
+
+    data = []
+    for t in tasks:
+        names = [name for _, name in assignees.get(t["id"], [])]
+        data.append({
+            "id": t["id"],
+            "title": t["title"],
+            "description": t["description"] or "",
+            "status": t["status"],
+            "department": t["department"] or "",
+            "assignees": names,
+            "assignee_ids": [uid for uid, _ in assignees.get(t["id"], [])],
+            "assignees_str": ", ".join(names),
+            "start_date": t["start_date"].strftime("%Y-%m-%d") if t["start_date"] else None,
+            "due_date": t["due_date"].strftime("%Y-%m-%d") if t["due_date"] else None,
+            "project_id": t["project_id"],
+            "filenames": [f for f, _ in files.get(t["id"], [])],
+            "filepaths": [p for _, p in files.get(t["id"], [])],
+            "progresses": progresses.get(t["id"], []),
+            "archived": True
+        })
+    return data
+
+
+def archived_events_query(scope: str, user: models.User):
+    """보관된 일정 SELECT (/api/events의 scope 규칙과 동일)"""
+    ae = models.archived_events
+    users = models.User.__table__
+    creator = users.alias("creator")
+    assignee = users.alias("assignee")
+    stmt = (
+        select(ae, creator.c.username.label("creator_name"), assignee.c.username.label("assignee_name"))
+        .select_from(
+            ae.outerjoin(creator, creator.c.id == ae.c.user_id)
+            .outerjoin(assignee, assignee.c.id == ae.c.assignee_id)
+        )
+    )
+    if scope == "personal":
+        stmt = stmt.where(or_(ae.c.user_id == user.id, ae.c.assignee_id == user.id))
+    elif scope == "department":
+        stmt = stmt.where(ae.c.department == user.department)
+    return stmt
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "restore":
+        with engine.begin() as connection:
+            print(restore_project(connection, int(sys.argv[2])))
+    else:
+        print(run_archive())
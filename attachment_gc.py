@@ -0,0 +1,167 @@
+"""첨부파일 가비지 컬렉션
+
+업무/프로젝트/회의록이나 첨부파일 행이 삭제되어도 uploads/ 아래 파일은 남는다.
+세 첨부파일 테이블(보관 테이블 포함, 소유자가 삭제된 행 제외)과 업로드 디렉토리를 대조해 아무도 참조하지 않는 파일을
+유예 기간(GC_GRACE_HOURS)이 지난 뒤 배치 단위로 삭제하고 회수한 용량을 보고한다.
+
+- blob은 ref_count를 실제 참조 수로 재계산한 뒤 0인 것만 삭제하고, 썸네일 등 파생 파일도 함께 삭제
+- 업로드 중인 .part 임시 파일은 유예 기간이 지난 것만 삭제
+- 중복 업로드로 재사용된 blob은 file_storage가 mtime을 갱신하므로 유예 기간 동안 보호된다
+
+사용법:
+    python attachment_gc.py            # GC 1회 실행
+    python attachment_gc.py --dry-run  # 삭제 대상만 집계
+"""
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select
+
+import attachment_text
+import blob_store
+import config
+import models
+from database import engine
+
+_BLOB_FILE = re.compile(r"^([0-9a-f]{64})(\.[^./]*)?$")
+_DERIVED_FILE = re.compile(r"^([0-9a-f]{64})\.[^/]+\.[^./]+$")
+
+
+def _referenced(conn) -> Tuple[Set[str], Set[str]]:
+    """참조 중인 디스크 경로와 blob 해시"""
+    paths: Set[str] = set()
+    shas: Set[str] = set()
+    for table in blob_store.FILE_TABLES:
+        rows = select(table.c.filepath, table.c.blob_sha256).where(blob_store.owned(table)).distinct()
+        for filepath, sha256 in conn.execute(rows):
+            if filepath:
+                paths.add(os.path.normpath(blob_store.blob_disk_path(filepath)))
+            if sha256:
+                shas.add(sha256)
+    return paths, shas
+
+
+def _scan(paths: Set[str], shas: Set[str], cutoff: float) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """삭제 후보 (디스크 경로, 크기, blob 해시 또는 None)"""
+    for root, _, names in os.walk(config.UPLOAD_DIR):
+        for name in names:
+            path = os.path.normpath(os.path.join(root, name))
+            if path in paths:
+                continue
+            try:
+                stat_result = os.stat(path)
+            except OSError:
+                continue
+            if stat_result.st_mtime >= cutoff:
+                continue
+
+            blob_match = _BLOB_FILE.match(name)
+            derived_match = _DERIVED_FILE.match(name)
+            if blob_match and blob_match.group(1) in shas:
+                continue  # 다른 확장자 경로로 참조 중인 같은 blob
+            if derived_match and derived_match.group(1) in shas:
+                continue  # 참조 중인 blob의 썸네일 등
+            yield path, stat_result.st_size, blob_match.group(1) if blob_match else None
+
+
+def _remove(path: str, cutoff: float) -> Optional[int]:
+    """유예 기간이 여전히 지났으면 삭제하고 크기를 반환 (그 사이 재사용되었거나 실패하면 None)"""
+    try:
+        stat_result = os.stat(path)
+        if stat_result.st_mtime >= cutoff:
+            return None
+        os.remove(path)
+        return stat_result.st_size
+    except OSError:
+        return None
+
+
+def _remove_empty_dirs():
+    blob_root = os.path.join(config.UPLOAD_DIR, blob_store.BLOB_SUBDIR)
+    for root, dirs, files in os.walk(blob_root, topdown=False):
+        if root != blob_root and not dirs and not files:
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
+
+
+def collect_garbage(dry_run: bool = False, now: Optional[datetime] = None) -> Dict[str, int]:
+    """GC 1회 실행 (스케줄러/CLI 진입점). 삭제한 파일 수와 회수한 바이트 수를 반환"""
+    now = now or datetime.utcnow()
+    cutoff_dt = now - timedelta(hours=config.GC_GRACE_HOURS)
+    cutoff = time.time() - config.GC_GRACE_HOURS * 3600
+    stats = {"scanned_candidates": 0, "files_deleted": 0, "blobs_deleted": 0, "rows_deleted": 0,
+             "orphan_rows_deleted": 0, "bytes_reclaimed": 0}
+
+    with engine.begin() as conn:
+        if not dry_run:
+            stats["orphan_rows_deleted"] = blob_store.purge_orphans(conn)  # 프로젝트/회의록 삭제 후 남은 첨부파일 행
+        blob_store.recount(conn)  # 벌크 삭제 등으로 어긋난 참조 수 보정
+        paths, shas = _referenced(conn)
+
+    candidates = list(_scan(paths, shas, cutoff))
+    stats["scanned_candidates"] = len(candidates)
+    if dry_run:
+        stats["bytes_reclaimed"] = sum(size for _, size, _ in candidates)
+        return stats
+
+    blob_table = models.Blob.__table__
+    for start in range(0, len(candidates), config.GC_BATCH_SIZE):
+        batch = candidates[start:start + config.GC_BATCH_SIZE]
+        with engine.begin() as conn:
+            for path, _, sha256 in batch:
+                if sha256:
+                    ref_count = conn.execute(
+                        select(blob_table.c.ref_count).where(blob_table.c.sha256 == sha256)
+                    ).scalar()
+                    if ref_count:
+                        continue  # 스캔 이후 다시 참조됨
+                # 파일을 먼저 삭제: 그 사이 중복 업로드로 재사용되어 mtime이 갱신됐으면 행과 본문 색인을 남김
+                freed = _remove(path, cutoff)
+                if freed is None:
+                    continue
+                stats["files_deleted"] += 1
+                stats["bytes_reclaimed"] += freed
+                if sha256:
+                    conn.execute(delete(blob_table).where(blob_table.c.sha256 == sha256))
+                    attachment_text.delete_blob_text(conn, [sha256])
+                    stats["blobs_deleted"] += 1
+                    for derived in _derived_files(path, sha256):
+                        stats["bytes_reclaimed"] += _remove(derived, time.time() + 1) or 0
+
+    # 파일이 이미 없어진 미참조 blob 행 정리
+    with engine.begin() as conn:
+        stale: List[str] = [
+            sha for sha, path in conn.execute(
+                select(blob_table.c.sha256, blob_table.c.path)
+                .where(blob_table.c.ref_count == 0, blob_table.c.last_unref_at < cutoff_dt)
+            )
+            if not os.path.exists(blob_store.blob_disk_path(path))
+        ]
+        for start in range(0, len(stale), config.GC_BATCH_SIZE):
+            chunk = stale[start:start + config.GC_BATCH_SIZE]
+            result = conn.execute(delete(blob_table).where(blob_table.c.sha256.in_(chunk)))
+            attachment_text.delete_blob_text(conn, chunk)
+            stats["rows_deleted"] += result.rowcount
+
+    _remove_empty_dirs()
+    return stats
+
+
+def _derived_files(blob_path: str, sha256: str) -> List[str]:
+    directory = os.path.dirname(blob_path)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names
+            if _DERIVED_FILE.match(name) and name.startswith(sha256)]
+
+
+if __name__ == "__main__":
+    print(collect_garbage(dry_run="--dry-run" in sys.argv))
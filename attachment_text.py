@@ -0,0 +1,281 @@
+"""첨부파일 본문 텍스트 추출과 검색 색인
+
+업로드가 커밋되면 enqueue()로 작업 큐에 넣고, 워커 프로세스 풀에서 본문을 추출해
+blob_texts(zlib 압축 본문)와 blob_terms(단어 역색인)에 저장한다.
+blob은 내용 주소이므로 한 번 추출한 blob은 다시 처리하지 않는다 (증분 처리).
+
+- .txt: UTF-8, 실패 시 CP949로 디코딩
+- .docx/.pptx/.xlsx: zip 안의 XML에서 텍스트 노드만 스트리밍으로 읽음
+- .pdf: pypdf가 설치되어 있을 때만 추출
+- .doc/.xls/.ppt 등 구형 바이너리 형식과 이미지는 unsupported로 기록
+
+사용법:
+    python attachment_text.py            # 아직 추출하지 않은 blob 일괄 처리
+    python attachment_text.py 계약 단가   # 검색
+"""
+import asyncio
+import os
+import re
+import sys
+import zipfile
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from sqlalchemy import and_, delete, func, insert, select
+
+import blob_store
+import config
+import models
+import workers
+from database import engine
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # pypdf 미설치 시 PDF 추출 생략
+    PdfReader = None
+
+_TERM = re.compile(r"[0-9a-z가-힣]{2,}")
+_ZIP_MEMBERS = {
+    ".docx": re.compile(r"^word/(document|header\d*|footer\d*|footnotes)\.xml$"),
+    ".pptx": re.compile(r"^ppt/(slides/slide\d+|notesSlides/notesSlide\d+)\.xml$"),
+    ".xlsx": re.compile(r"^xl/(sharedStrings|worksheets/sheet\d+)\.xml$"),
+}
+MAX_TERMS_PER_BLOB = 5000
+
+
+def tokenize(text: str) -> List[str]:
+    """검색용 단어 분리 (소문자, 2글자 이상의 한글/영문/숫자 연속)"""
+    return [term[:64] for term in _TERM.findall(text.lower())]
+
+
+def _zip_xml_text(path: str, member_pattern, limit: int) -> str:
+    parts: List[str] = []
+    size = 0
+    with zipfile.ZipFile(path) as archive:
+        names = sorted(n for n in archive.namelist() if member_pattern.match(n))
+        for name in names:
+            with archive.open(name) as f:
+                # <w:t>, <a:t>, <t> 텍스트 노드만 모으고 문단/셀 단위로 줄바꿈
+                for _, elem in ElementTree.iterparse(f, events=("end",)):
+                    tag = elem.tag.rsplit("}", 1)[-1]
+                    if tag == "t" and elem.text:
+                        parts.append(elem.text)
+                        size += len(elem.text)
+                    elif tag in ("p", "si", "c"):
+                        parts.append("\n")
+                    elem.clear()
+                    if size >= limit:
+                        return "".join(parts)
+    return "".join(parts)
+
+
+def extract_text(path: str, limit: int) -> Tuple[str, str, Dict[str, int]]:
+    """파일에서 본문을 추출 (워커 프로세스에서 실행). (status, text, 단어 빈도) 반환"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".txt":
+        with open(path, "rb") as f:
+            raw = f.read(limit * 4)
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            text = raw.decode("cp949", errors="replace")
+    elif ext in _ZIP_MEMBERS:
+        text = _zip_xml_text(path, _ZIP_MEMBERS[ext], limit)
+    elif ext == ".pdf" and PdfReader is not None:
+        pages = []
+        size = 0
+        for page in PdfReader(path).pages:
+            page_text = page.extract_text() or ""
+            pages.append(page_text)
+            size += len(page_text)
+            if size >= limit:
+                break
+        text = "\n".join(pages)
+    else:
+        return "unsupported", "", {}
+
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n\s*\n+", "\n", text).strip()[:limit]
+    if not text:
+        return "empty", "", {}
+    terms = Counter(tokenize(text))
+    return "ok", text, dict(terms.most_common(MAX_TERMS_PER_BLOB))
+
+
+def _store(conn, sha256: str, status: str, text: str, terms: Dict[str, int]):
+    conn.execute(delete(models.BlobTerm.__table__).where(models.BlobTerm.sha256 == sha256))
+    conn.execute(delete(models.BlobText.__table__).where(models.BlobText.sha256 == sha256))
+    conn.execute(insert(models.BlobText.__table__).values(
+        sha256=sha256, status=status, char_count=len(text),
+        content=zlib.compress(text.encode("utf-8"), 6) if text else None,
+    ))
+    if terms:
+        conn.execute(insert(models.BlobTerm.__table__),
+                     [{"term": term, "sha256": sha256, "tf": tf} for term, tf in terms.items()])
+
+
+def _pending_path(sha256: str) -> Optional[str]:
+    """아직 추출하지 않은 blob의 디스크 경로 (이미 추출했거나 파일이 없으면 None)"""
+    with engine.connect() as conn:
+        done = conn.execute(select(models.BlobText.sha256).where(models.BlobText.sha256 == sha256)).first()
+        path = conn.execute(select(models.Blob.path).where(models.Blob.sha256 == sha256)).scalar()
+    if done or not path:
+        return None
+    disk_path = blob_store.blob_disk_path(path)
+    return disk_path if os.path.isfile(disk_path) else None
+
+
+def _save(sha256: str, status: str, text: str, terms: Dict[str, int]):
+    with engine.begin() as conn:
+        _store(conn, sha256, status, text, terms)
+
+
+async def _process(sha256: str):
+    disk_path = await asyncio.to_thread(_pending_path, sha256)
+    if not disk_path:
+        return
+    try:
+        status, text, terms = await workers.run_in_process(extract_text, disk_path, config.EXTRACT_MAX_CHARS)
+    except Exception as e:
+        print(f"Text extraction failed for {sha256}: {e}")
+        status, text, terms = "error", "", {}
+    await asyncio.to_thread(_save, sha256, status, text, terms)
+
+
+queue = workers.JobQueue("text_extract", _process, concurrency=config.WORKER_PROCESSES)
+
+
+def enqueue(sha256: Optional[str]):
+    """본문 추출 작업 추가 (이미 추출한 blob은 _process에서 건너뜀)"""
+    if config.EXTRACT_ENABLED and sha256:
+        queue.put(sha256)
+
+
+def pending_blobs(conn) -> List[str]:
+    """아직 본문을 추출하지 않은 blob"""
+    return [sha for (sha,) in conn.execute(
+        select(models.Blob.sha256)
+        .outerjoin(models.BlobText, models.BlobText.sha256 == models.Blob.sha256)
+        .where(models.BlobText.sha256.is_(None), models.Blob.ref_count > 0)
+    )]
+
+
+def backfill() -> int:
+    """추출되지 않은 기존 blob을 큐에 추가 (시작 시 실행)"""
+    with engine.connect() as conn:
+        shas = pending_blobs(conn)
+    for sha in shas:
+        enqueue(sha)
+    return len(shas)
+
+
+def delete_blob_text(conn, sha256s: List[str]):
+    """blob 삭제 시 본문/색인 정리"""
+    if sha256s:
+        conn.execute(delete(models.BlobTerm.__table__).where(models.BlobTerm.sha256.in_(sha256s)))
+        conn.execute(delete(models.BlobText.__table__).where(models.BlobText.sha256.in_(sha256s)))
+
+
+def _snippet(content: Optional[bytes], terms: List[str], width: int = 60) -> str:
+    if not content:
+        return ""
+    text = zlib.decompress(content).decode("utf-8")
+    lower = text.lower()
+    pos = min((p for p in (lower.find(t) for t in terms) if p >= 0), default=0)
+    start = max(0, pos - width)
+    snippet = text[start:pos + width * 2].replace("\n", " ")
+    return ("…" if start > 0 else "") + snippet + ("…" if pos + width * 2 < len(text) else "")
+
+
+def search(conn, query: str, limit: int = 20) -> List[dict]:
+    """첨부파일 본문 검색. 모든 검색어(접두어 일치)를 포함한 파일을 빈도 순으로 반환"""
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    bt = models.BlobTerm.__table__
+    scores: Optional[Dict[str, int]] = None
+    for term in terms:
+        # 조사가 붙은 한국어 단어(계약서를 등)도 찾도록 접두어 검색
+        if conn.dialect.name == "sqlite":
+            # SQLite 기본 BINARY 비교는 코드포인트 순서라 범위 검색이 정확하고 term PK 인덱스를 쓴다
+            prefix = and_(bt.c.term >= term, bt.c.term < term + "\uffff")
+        else:
+            # Postgres는 정렬 규칙(collation)에 따라 범위 순서가 달라지므로 LIKE 'term%' (text_pattern_ops 인덱스)
+            prefix = bt.c.term.startswith(term, autoescape=True)
+        rows = conn.execute(
+            select(bt.c.sha256, func.sum(bt.c.tf)).where(prefix).group_by(bt.c.sha256)
+        ).fetchall()
+        found = {sha: int(tf) for sha, tf in rows}
+        scores = found if scores is None else {
+            sha: scores[sha] + tf for sha, tf in found.items() if sha in scores
+        }
+        if not scores:
+            return []
+
+    ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+    contents = dict(conn.execute(
+        select(models.BlobText.sha256, models.BlobText.content).where(models.BlobText.sha256.in_(ranked))
+    ).fetchall())
+
+    owners = [
+        ("task", models.TaskFile.__table__, "task_id"),
+        ("project", models.ProjectFile.__table__, "project_id"),
+        ("minute", models.MeetingMinuteFile.__table__, "meeting_minute_id"),
+    ]
+    files: Dict[str, List[dict]] = {}
+    for kind, table, owner_column in owners:
+        for row in conn.execute(
+            select(table.c.id, table.c.filename, table.c.blob_sha256, table.c[owner_column])
+            .where(table.c.blob_sha256.in_(ranked))
+        ):
+            files.setdefault(row.blob_sha256, []).append({
+                "kind": kind,
+                "id": row.id,
+                "filename": row.filename,
+                "url": f"/files/{kind}/{row.id}",
+                "owner_id": row[3],
+            })
+
+    results = []
+    for sha in ranked:
+        if sha not in files:
+            continue  # 보관되었거나 참조가 끊긴 blob
+        results.append({
+            "sha256": sha,
+            "score": scores[sha],
+            "snippet": _snippet(contents.get(sha), terms),
+            "files": files[sha],
+        })
+    return results
+
+
+def extract_pending() -> int:
+    """큐 없이 동기적으로 미추출 blob 처리 (CLI용)"""
+    with engine.connect() as conn:
+        shas = pending_blobs(conn)
+        paths = dict(conn.execute(
+            select(models.Blob.sha256, models.Blob.path).where(models.Blob.sha256.in_(shas))
+        ).fetchall()) if shas else {}
+    for sha, path in paths.items():
+        disk_path = blob_store.blob_disk_path(path)
+        if not os.path.isfile(disk_path):
+            continue
+        try:
+            status, text, terms = extract_text(disk_path, config.EXTRACT_MAX_CHARS)
+        except Exception as e:
+            print(f"Text extraction failed for {sha}: {e}")
+            status, text, terms = "error", "", {}
+        _save(sha, status, text, terms)
+    return len(paths)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        with engine.connect() as connection:
+            for result in search(connection, " ".join(sys.argv[1:])):
+                print(result["score"], [f["filename"] for f in result["files"]], result["snippet"])
+    else:
+        print(f"extracted: {extract_pending()}")
@@ -0,0 +1,218 @@
+"""내용 주소(SHA-256) 기반 첨부파일 저장소
+
+같은 계약서/사양서가 여러 프로젝트·업무·회의록에 첨부되어도 디스크에는 한 번만 저장한다.
+파일은 uploads/blobs/ab/cd/<sha256><ext> 에 저장되고, blobs 테이블의 ref_count가
+이를 참조하는 TaskFile/ProjectFile/MeetingMinuteFile(보관 테이블 포함) 행 수를 나타낸다.
+
+사용법:
+    python blob_store.py migrate     # 기존 uploads/ 파일을 blob 저장소로 옮기며 중복 제거
+    python blob_store.py recount     # ref_count를 실제 참조 수로 재계산
+"""
+import hashlib
+import os
+import shutil
+import sys
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event, func, select, true, union_all, update
+
+import config
+import models
+from database import engine
+
+BLOB_SUBDIR = "blobs"
+
+# blob_sha256 컬럼을 가진 모든 첨부파일 테이블 (보관 테이블 포함)
+FILE_TABLES = [
+    models.TaskFile.__table__,
+    models.ProjectFile.__table__,
+    models.MeetingMinuteFile.__table__,
+    models.archived_task_files,
+    models.archived_project_files,
+]
+
+# 원본 첨부파일 테이블의 소유자 (FK 컬럼, 소유자 테이블). 소유자가 삭제된 행은 참조로 세지 않는다
+_OWNERS = {
+    "task_files": ("task_id", models.Task.__table__),
+    "project_files": ("project_id", models.Project.__table__),
+    "meeting_minute_files": ("meeting_minute_id", models.MeetingMinutes.__table__),
+}
+
+
+def owned(table):
+    """소유자(업무/프로젝트/회의록)가 있는 첨부파일 행 조건 (보관 테이블은 항상 참)"""
+    if table.name not in _OWNERS:
+        return true()
+    column, owner = _OWNERS[table.name]
+    return table.c[column].in_(select(owner.c.id))
+
+
+def purge_orphans(conn) -> int:
+    """소유자가 삭제되어 남은 첨부파일 행 삭제 (ref_count는 recount로 맞춤). 삭제한 행 수를 반환"""
+    deleted = 0
+    for table in FILE_TABLES:
+        if table.name in _OWNERS:
+            deleted += conn.execute(table.delete().where(~owned(table))).rowcount
+    return deleted
+
+
+def blob_relpath(sha256: str, ext: str) -> str:
+    """uploads 기준 상대 경로 (blobs/ab/cd/<sha><ext>)"""
+    return "/".join([BLOB_SUBDIR, sha256[:2], sha256[2:4], f"{sha256}{ext.lower()}"])
+
+
+def blob_disk_path(url: str) -> str:
+    """/uploads/... 공개 경로를 디스크 경로로 변환"""
+    prefix = f"/{config.UPLOAD_DIR}/"
+    rel = url[len(prefix):] if url.startswith(prefix) else url.lstrip("/")
+    return os.path.join(config.UPLOAD_DIR, *rel.split("/"))
+
+
+def find_blob_url(sha256: str) -> Optional[str]:
+    """같은 내용의 blob이 이미 디스크에 있으면 그 공개 경로를 반환 (확장자가 달라도 재사용)"""
+    rel_dir = blob_relpath(sha256, "").rsplit("/", 1)[0]
+    disk_dir = os.path.join(config.UPLOAD_DIR, *rel_dir.split("/"))
+    if os.path.isdir(disk_dir):
+        for name in os.listdir(disk_dir):
+            # <sha><ext> 원본만 해당 (<sha>.thumb.png 같은 파생 파일 제외)
+            if name.startswith(sha256) and name[len(sha256):].count(".") <= 1 and not name.endswith(".part"):
+                return f"/{config.UPLOAD_DIR}/{rel_dir}/{name}"
+    return None
+
+
+def derived_path(url: str, suffix: str) -> str:
+    """blob 옆에 저장하는 파생 파일의 디스크 경로 (예: <sha>.thumb.png)"""
+    return os.path.splitext(blob_disk_path(url))[0] + suffix
+
+
+def _upsert_blob(conn, sha256: str, size: int, url: str, increment: int = 1):
+    """blobs 행을 만들거나 참조 수를 증가"""
+    table = models.Blob.__table__
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(table).values(
+        sha256=sha256, size=size, path=url, ref_count=increment, created_at=datetime.utcnow()
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=["sha256"],
+        set_={"ref_count": table.c.ref_count + increment, "last_unref_at": None}
+    ))
+
+
+def acquire(db, stored):
+    """첨부파일 행이 blob(file_storage.StoredFile)을 참조하게 될 때 호출 (커밋은 호출자가 수행)"""
+    _upsert_blob(db.connection(), stored.sha256, stored.size, stored.url)
+
+
+def release(conn, sha256: Optional[str]):
+    """첨부파일 행이 삭제되어 blob 참조가 줄어들 때 호출"""
+    if not sha256:
+        return
+    table = models.Blob.__table__
+    conn.execute(
+        update(table)
+        .where(table.c.sha256 == sha256)
+        .values(ref_count=func.max(table.c.ref_count - 1, 0) if conn.dialect.name == "sqlite"
+                else func.greatest(table.c.ref_count - 1, 0),
+                last_unref_at=datetime.utcnow())
+    )
+
+
+def _on_file_row_deleted(mapper, connection, target):
+    release(connection, target.blob_sha256)
+
+
+for _model in (models.TaskFile, models.ProjectFile, models.MeetingMinuteFile):
+    event.listen(_model, "after_delete", _on_file_row_deleted)
+
+
+def recount(conn) -> int:
+    """모든 blob의 ref_count를 실제 참조 행 수로 재계산. 변경된 blob 수를 반환"""
+    refs = union_all(*[
+        select(t.c.blob_sha256.label("sha256")).where(t.c.blob_sha256.isnot(None), owned(t)) for t in FILE_TABLES
+    ]).subquery()
+    counts: Dict[str, int] = {
+        sha: cnt for sha, cnt in conn.execute(select(refs.c.sha256, func.count()).group_by(refs.c.sha256))
+    }
+    table = models.Blob.__table__
+    changed = 0
+    now = datetime.utcnow()
+    for sha, current in conn.execute(select(table.c.sha256, table.c.ref_count)).fetchall():
+        actual = counts.get(sha, 0)
+        if actual != current:
+            values = {"ref_count": actual}
+            if actual < (current or 0):
+                values["last_unref_at"] = now
+            conn.execute(update(table).where(table.c.sha256 == sha).values(**values))
+            changed += 1
+    return changed
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(config.UPLOAD_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def migrate_existing_files() -> Dict[str, int]:
+    """기존 timestamp 파일들을 blob 저장소로 옮기고 중복 파일을 제거
+
+    DB 커밋 전에는 원본을 지우지 않는다 (blob은 하드링크/복사로 만들고 커밋 후 원본 삭제).
+    """
+    stats = {"rows": 0, "files": 0, "deduplicated": 0, "missing": 0, "bytes_reclaimed": 0}
+    originals = []
+    with engine.begin() as conn:
+        for table in FILE_TABLES:
+            rows = conn.execute(
+                select(table.c.filepath).where(table.c.blob_sha256.is_(None), table.c.filepath.isnot(None)).distinct()
+            ).fetchall()
+            for (filepath,) in rows:
+                disk_path = blob_disk_path(filepath)
+                if not os.path.isfile(disk_path):
+                    stats["missing"] += 1
+                    continue
+
+                sha256 = _hash_file(disk_path)
+                size = os.path.getsize(disk_path)
+                url = find_blob_url(sha256)
+                if url:
+                    stats["deduplicated"] += 1
+                    stats["bytes_reclaimed"] += size
+                else:
+                    url = f"/{config.UPLOAD_DIR}/{blob_relpath(sha256, os.path.splitext(disk_path)[1])}"
+                    target = blob_disk_path(url)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    try:
+                        os.link(disk_path, target)
+                    except OSError:
+                        shutil.copy2(disk_path, target)
+                originals.append(disk_path)
+                stats["files"] += 1
+
+                result = conn.execute(
+                    update(table)
+                    .where(table.c.filepath == filepath, table.c.blob_sha256.is_(None))
+                    .values(filepath=url, blob_sha256=sha256)
+                )
+                stats["rows"] += result.rowcount
+                _upsert_blob(conn, sha256, size, url, increment=0)
+        recount(conn)
+
+    for path in originals:
+        if os.path.exists(path):
+            os.remove(path)
+    return stats
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "recount":
+        with engine.begin() as connection:
+            print(f"updated blobs: {recount(connection)}")
+    else:
+        print(migrate_existing_files())
@@ -1,3 +1,4 @@
+import json
 import os
 import warnings
 from dotenv import load_dotenv
@@ -14,6 +15,94 @@ if not GEMINI_API_KEY:
 else:
     print(f"[DEBUG] GEMINI_API_KEY loaded: {GEMINI_API_KEY[:5]}...")
 
+# AI 백엔드: gemini(운영) / stub(네트워크 없이 결정적 응답, 부하 테스트·벤치마크·CI용)
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini").lower()
+AI_STUB_FIXTURES_DIR = os.getenv("AI_STUB_FIXTURES_DIR", os.path.join(basedir, "ai_fixtures"))
+AI_STUB_LATENCY_MS = float(os.getenv("AI_STUB_LATENCY_MS", "800"))  # 평균 응답 지연
+AI_STUB_JITTER_MS = float(os.getenv("AI_STUB_JITTER_MS", "200"))
+AI_STUB_STREAM_CHUNKS = int(os.getenv("AI_STUB_STREAM_CHUNKS", "20"))  # 스트리밍 시 나눠 보낼 조각 수
+AI_STUB_ERROR_RATE = float(os.getenv("AI_STUB_ERROR_RATE", "0"))  # 429 흉내 실패 비율 (0~1)
+AI_STUB_SEED = int(os.getenv("AI_STUB_SEED", "0"))
+AI_RECORD_DIR = os.getenv("AI_RECORD_DIR")  # 지정하면 받은 응답을 stub 녹화본으로 저장
+
+AI_MODEL = os.getenv("AI_MODEL", "gemini-flash-latest")  # 기본 모델 (1.5-flash 별칭은 없음)
+AI_TRANSPORT = os.getenv("AI_TRANSPORT")  # 비우면 grpc, 필요 시 "rest"
+AI_TIMEOUT_SECONDS = int(os.getenv("AI_TIMEOUT_SECONDS", "60"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))  # 프로세스 전체 동시 AI 호출 수
+AI_MAX_CONCURRENCY_PER_USER = int(os.getenv("AI_MAX_CONCURRENCY_PER_USER", "2"))
+AI_DISCONNECT_POLL_SECONDS = float(os.getenv("AI_DISCONNECT_POLL_SECONDS", "1"))  # 연결 끊김 확인 주기
+
+# AI 호출 복원력 (ai_resilience). 속도 제한은 API 할당량(분당 요청 수)에 맞춰 설정, 0이면 제한 없음
+AI_RATE_LIMIT_RPM = float(os.getenv("AI_RATE_LIMIT_RPM", "60"))
+AI_RATE_LIMIT_BURST = int(os.getenv("AI_RATE_LIMIT_BURST", "5"))  # 한꺼번에 보낼 수 있는 최대 요청 수
+AI_RETRY_ATTEMPTS = int(os.getenv("AI_RETRY_ATTEMPTS", "3"))  # 일시적 오류(429/5xx/타임아웃) 시 총 시도 횟수
+AI_RETRY_BASE_SECONDS = float(os.getenv("AI_RETRY_BASE_SECONDS", "2"))
+AI_RETRY_MAX_SECONDS = float(os.getenv("AI_RETRY_MAX_SECONDS", "30"))
+AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "5"))  # 연속 실패 시 서킷 열림, 0이면 사용 안 함
+AI_BREAKER_RESET_SECONDS = float(os.getenv("AI_BREAKER_RESET_SECONDS", "30"))
+AI_HEDGE_AFTER_SECONDS = float(os.getenv("AI_HEDGE_AFTER_SECONDS", "20"))  # 이 시간 내 응답 없으면 한 번 더 요청, 0이면 끔
+AI_HEDGE_MAX_CONCURRENCY = int(os.getenv("AI_HEDGE_MAX_CONCURRENCY", "2"))  # 헤지 요청 전용 스레드 수 (모두 사용 중이면 헤지 생략)
+
+# 긴 회의록 분할 분석 (minutes_analysis). 조각 수 상한으로 분석 시간을 제한
+AI_MINUTES_CHUNK_CHARS = int(os.getenv("AI_MINUTES_CHUNK_CHARS", "6000"))  # 이보다 길면 나눠서 분석
+AI_MINUTES_MAX_CHUNKS = int(os.getenv("AI_MINUTES_MAX_CHUNKS", "12"))
+AI_MINUTES_SUMMARY_POINTS = int(os.getenv("AI_MINUTES_SUMMARY_POINTS", "8"))  # 합친 요약의 최대 항목 수
+AI_MINUTES_DEDUP_THRESHOLD = float(os.getenv("AI_MINUTES_DEDUP_THRESHOLD", "0.85"))  # 같은 항목으로 볼 유사도
+
+# AI 응답 캐시 (로컬 SQLite 파일). 명령형 입력(업무/일정 등록)은 기본적으로 캐시하지 않음
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", os.path.join(basedir, "ai_cache.sqlite3"))
+AI_CACHE_TTL_SECONDS = int(os.getenv("AI_CACHE_TTL_SECONDS", str(24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "2000"))
+AI_CACHE_METHODS = set(os.getenv(
+    "AI_CACHE_METHODS", "generate_wbs_json,generate_template_json,analyze_meeting_minutes,generate_work_report"
+).split(","))
+
+# AI 백그라운드 작업 큐 (ai_jobs 테이블). 실패 시 AI_JOB_RETRY_BASE_SECONDS부터 두 배씩 늘려 재시도
+AI_JOB_WORKERS = int(os.getenv("AI_JOB_WORKERS", "2"))
+AI_JOB_MAX_ATTEMPTS = int(os.getenv("AI_JOB_MAX_ATTEMPTS", "3"))
+AI_JOB_RETRY_BASE_SECONDS = float(os.getenv("AI_JOB_RETRY_BASE_SECONDS", "5"))
+AI_JOB_LEASE_SECONDS = int(os.getenv("AI_JOB_LEASE_SECONDS", "300"))  # 이보다 오래 running이면 중단된 것으로 보고 재실행
+AI_JOB_POLL_SECONDS = float(os.getenv("AI_JOB_POLL_SECONDS", "1"))  # SSE 상태 확인 주기
+AI_JOB_RETENTION_HOURS = int(os.getenv("AI_JOB_RETENTION_HOURS", str(7 * 24)))  # 끝난 작업 보관 기간
+
+# 전 직원 업무 리포트 일괄 생성 (관리자 실행 또는 매월 WORK_REPORT_BATCH_DAY일에 지난달 월간 리포트)
+WORK_REPORT_BATCH_CONCURRENCY = int(os.getenv("WORK_REPORT_BATCH_CONCURRENCY", str(AI_MAX_CONCURRENCY)))
+WORK_REPORT_BATCH_FLUSH_SIZE = int(os.getenv("WORK_REPORT_BATCH_FLUSH_SIZE", "20"))  # 모아서 한 번에 저장할 리포트 수
+WORK_REPORT_BATCH_SCHEDULE_ENABLED = os.getenv("WORK_REPORT_BATCH_SCHEDULE_ENABLED", "false").lower() == "true"
+WORK_REPORT_BATCH_DAY = int(os.getenv("WORK_REPORT_BATCH_DAY", "1"))
+# 주간/월간 리포트를 하위(일간/주간) 리포트 요약으로 만들 때 리포트당 넣을 요약 글자 수와 업무 수
+WORK_REPORT_SUMMARY_CHARS = int(os.getenv("WORK_REPORT_SUMMARY_CHARS", "300"))
+WORK_REPORT_SUMMARY_TASKS = int(os.getenv("WORK_REPORT_SUMMARY_TASKS", "10"))
+# 리포트 히스토리 목록 페이지 크기 (나머지는 "더 보기"로 불러옴)
+WORK_REPORT_HISTORY_PAGE_SIZE = int(os.getenv("WORK_REPORT_HISTORY_PAGE_SIZE", "20"))
+
+# 자연어 업무/일정 등록 프롬프트에 넣을 컨텍스트 크기 (입력에서 언급된 이름/날짜 기준으로 선택)
+AI_CONTEXT_MAX_USERS = int(os.getenv("AI_CONTEXT_MAX_USERS", "15"))
+AI_CONTEXT_MAX_PROJECTS = int(os.getenv("AI_CONTEXT_MAX_PROJECTS", "10"))
+AI_CONTEXT_MAX_EVENTS = int(os.getenv("AI_CONTEXT_MAX_EVENTS", "15"))
+AI_CONTEXT_EVENT_DAYS = int(os.getenv("AI_CONTEXT_EVENT_DAYS", "14"))  # 날짜 언급이 없을 때 볼 기간
+AI_CONTEXT_EVENT_SCAN = int(os.getenv("AI_CONTEXT_EVENT_SCAN", "300"))  # 기간 내 점수 계산할 최대 일정 수
+AI_CONTEXT_MATCH_THRESHOLD = float(os.getenv("AI_CONTEXT_MATCH_THRESHOLD", "0.75"))  # 이름 유사도 기준
+AI_CONTEXT_DEPARTMENT_BONUS = float(os.getenv("AI_CONTEXT_DEPARTMENT_BONUS", "0.1"))
+AI_CONTEXT_INDEX_TTL_SECONDS = int(os.getenv("AI_CONTEXT_INDEX_TTL_SECONDS", "300"))
+
+# 의미 검색 색인 (회의록/업무/업무 템플릿/표준 WBS). 임베딩: hashing(로컬, 기본) / gemini
+SEMANTIC_ENABLED = os.getenv("SEMANTIC_ENABLED", "true").lower() == "true"
+SEMANTIC_EMBEDDER = os.getenv("SEMANTIC_EMBEDDER", "hashing").lower()
+SEMANTIC_DIM = int(os.getenv("SEMANTIC_DIM", "512"))  # 벡터 차원 (바꾸면 전체 재색인)
+SEMANTIC_EMBED_MODEL = os.getenv("SEMANTIC_EMBED_MODEL", "models/text-embedding-004")
+SEMANTIC_INDEX_DIR = os.getenv("SEMANTIC_INDEX_DIR", os.path.join(basedir, "semantic_index"))
+SEMANTIC_MAX_CHARS = int(os.getenv("SEMANTIC_MAX_CHARS", "8000"))  # 문서당 임베딩할 최대 글자 수
+SEMANTIC_BATCH_SIZE = int(os.getenv("SEMANTIC_BATCH_SIZE", "256"))  # 한 번에 임베딩할 문서 수
+SEMANTIC_SEARCH_BLOCK_ROWS = int(os.getenv("SEMANTIC_SEARCH_BLOCK_ROWS", "32768"))  # 검색 시 한 번에 곱할 행 수
+SEMANTIC_RELOAD_SECONDS = float(os.getenv("SEMANTIC_RELOAD_SECONDS", "5"))  # 다른 프로세스의 변경 확인 주기
+SEMANTIC_SYNC_INTERVAL_MINUTES = int(os.getenv("SEMANTIC_SYNC_INTERVAL_MINUTES", "60"))
+
+# AIHelper 메서드별 모델/생성 설정 (model, temperature, max_output_tokens 등, 지정하지 않으면 기본값)
+# 예: AI_METHOD_SETTINGS='{"generate_work_report": {"model": "gemini-pro-latest", "temperature": 0.4}}'
+AI_METHOD_SETTINGS = json.loads(os.getenv("AI_METHOD_SETTINGS", "{}"))
+
 # 보안 설정
 SECRET_KEY = os.getenv("SECRET_KEY")
 if not SECRET_KEY:
@@ -33,12 +122,25 @@ ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 ADMIN_DEPARTMENT = os.getenv("ADMIN_DEPARTMENT", "시스템사업부")
 
 # 파일 업로드 설정
+UPLOAD_DIR = "uploads"
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 256 * 1024  # 스트리밍 저장 단위 (256KB)
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))  # 다중 업로드 시 동시 저장 파일 수
+MAX_FILES_PER_UPLOAD = int(os.getenv("MAX_FILES_PER_UPLOAD", "20"))
+# 업로드 요청 본문 전체 한도 (Content-Length로 폼 파싱 전에 거부). 기본: 파일 한도 x 최대 파일 수 + 폼 여유분
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv("MAX_UPLOAD_REQUEST_SIZE", str(MAX_FILE_SIZE * MAX_FILES_PER_UPLOAD + 1024 * 1024)))
 ALLOWED_EXTENSIONS = {
     '.pdf', '.doc', '.docx', '.xls', '.xlsx',
     '.ppt', '.pptx', '.txt', '.jpg', '.jpeg', '.png', '.gif'
 }
 
+# 업로드 후처리 (미리보기 생성 등) 워커 설정
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", str(min(2, os.cpu_count() or 1))))
+PREVIEW_ENABLED = os.getenv("PREVIEW_ENABLED", "true").lower() == "true"
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "320"))  # 썸네일 긴 변 픽셀
+EXTRACT_ENABLED = os.getenv("EXTRACT_ENABLED", "true").lower() == "true"  # 첨부파일 본문 추출/검색 색인
+EXTRACT_MAX_CHARS = int(os.getenv("EXTRACT_MAX_CHARS", "200000"))  # blob당 저장할 최대 글자 수
+
 # 목표 연도
 TARGET_YEAR = 2026
 
@@ -48,3 +150,19 @@ DEPARTMENT_MAPPING = {
     'Distribution': '유통사업부',
     'Management': '경영지원팀'
 }
+
+# 아카이브 설정 (일 단위 보관 기준)
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+ARCHIVE_PROJECT_AFTER_DAYS = int(os.getenv("ARCHIVE_PROJECT_AFTER_DAYS", "90"))  # 완료 프로젝트 종료 후
+ARCHIVE_TASK_AFTER_DAYS = int(os.getenv("ARCHIVE_TASK_AFTER_DAYS", "180"))  # 프로젝트 없는 완료 업무
+ARCHIVE_EVENT_AFTER_DAYS = int(os.getenv("ARCHIVE_EVENT_AFTER_DAYS", "365"))  # 지난 일정
+ARCHIVE_INTERVAL_HOURS = int(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+
+# 첨부파일 GC 설정 (참조가 끊긴 뒤 유예 기간이 지난 파일만 삭제)
+GC_ENABLED = os.getenv("GC_ENABLED", "true").lower() == "true"
+GC_GRACE_HOURS = int(os.getenv("GC_GRACE_HOURS", "24"))
+GC_INTERVAL_HOURS = int(os.getenv("GC_INTERVAL_HOURS", "24"))
+GC_BATCH_SIZE = int(os.getenv("GC_BATCH_SIZE", "200"))
+
+# 백그라운드 스케줄러 (여러 워커 실행 시 한 프로세스에서만 켜는 것을 권장)
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
@@ -0,0 +1,122 @@
+"""첨부파일 다운로드 응답
+
+TaskFile/ProjectFile/MeetingMinuteFile 다운로드와 /uploads 경로 제공에 공통으로 사용한다.
+- blob 저장소 파일은 내용 해시(SHA-256)를 strong ETag로 사용하고, 이름이 내용으로 정해지므로
+  Cache-Control: private, immutable 로 캐시 (If-None-Match 일치 시 본문 없이 304)
+- Range 요청은 starlette FileResponse가 206/416으로 처리 (요청한 바이트만 전송)
+- 서버가 ASGI pathsend 확장을 지원하면 파일 경로만 넘겨 서버가 sendfile로 전송 (zero-copy)
+"""
+import os
+import re
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+import blob_store
+import config
+
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})(\.[^./]*)?$")
+_BLOB_PREFIX = re.compile(r"^([0-9a-f]{64})(\.|$)")
+
+
+class AttachmentResponse(FileResponse):
+    """pathsend 확장을 지원하는 서버에서는 전체 본문 전송을 서버에 위임하는 FileResponse"""
+
+    chunk_size = config.UPLOAD_CHUNK_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        extensions = scope.get("extensions") or {}
+        if (
+            "http.response.pathsend" in extensions
+            and scope["method"].upper() != "HEAD"
+            and "range" not in {k.decode("latin-1").lower() for k, _ in scope.get("headers", [])}
+        ):
+            stat_result = self.stat_result or os.stat(self.path)
+            self.set_stat_headers(stat_result)
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            await send({"type": "http.response.pathsend", "path": os.path.abspath(self.path)})
+            if self.background is not None:
+                await self.background()
+            return
+        await super().__call__(scope, receive, send)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match는 약한 비교 (W/ 접두어 무시)
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def sha256_from_path(url: str) -> Optional[str]:
+    """blobs/ab/cd/<sha><ext> 경로에서 내용 해시 추출 (blob 경로가 아니면 None)"""
+    prefix = f"/{config.UPLOAD_DIR}/{blob_store.BLOB_SUBDIR}/"
+    if not url or not url.startswith(prefix):
+        return None
+    match = _BLOB_NAME.match(url.rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+
+def blob_sha256_of(url: str) -> Optional[str]:
+    """blob 원본이나 파생 파일(<sha>.thumb.png 등) 경로가 가리키는 blob 해시 (blob 경로가 아니면 None)"""
+    prefix = f"/{config.UPLOAD_DIR}/{blob_store.BLOB_SUBDIR}/"
+    if not url or not url.startswith(prefix):
+        return None
+    match = _BLOB_PREFIX.match(url.rsplit("/", 1)[-1])
+    return match.group(1) if match else None
+
+
+def file_response(request: Request, url: str, filename: Optional[str] = None,
+                  sha256: Optional[str] = None, inline: bool = True, variant: Optional[str] = None) -> Response:
+    """저장된 첨부파일(/uploads/... 경로)에 대한 다운로드 응답. 파일이 없으면 404
+
+    variant: 원본 blob에서 파생된 파일(썸네일 등)이면 그 이름. ETag가 원본과 구분된다.
+    """
+    disk_path = blob_store.blob_disk_path(url)
+    try:
+        stat_result = os.stat(disk_path)
+    except OSError:
+        return Response(status_code=404)
+    if not os.path.isfile(disk_path):
+        return Response(status_code=404)
+
+    sha256 = sha256 or sha256_from_path(url)
+    headers = {}
+    if sha256:
+        headers["ETag"] = f'"{sha256}-{variant}"' if variant else f'"{sha256}"'
+        headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        if _etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+    else:
+        headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+
+    response = AttachmentResponse(
+        disk_path,
+        headers=headers,
+        filename=filename or os.path.basename(disk_path),
+        stat_result=stat_result,
+        content_disposition_type="inline" if inline else "attachment",
+    )
+    if not sha256 and _etag_matches(request, response.headers["etag"]):
+        # 해시가 없는 레거시 파일은 mtime/크기 기반 ETag로 재검증
+        return Response(status_code=304, headers={"ETag": response.headers["etag"], **headers})
+    return response
+
+
+def resolve_upload_path(path: str) -> Optional[str]:
+    """/uploads/{path} 요청 경로를 검증해 공개 경로로 반환 (업로드 디렉토리 밖이면 None)"""
+    root = os.path.realpath(config.UPLOAD_DIR)
+    target = os.path.realpath(os.path.join(root, *path.split("/")))
+    if os.path.commonpath([root, target]) != root or target == root:
+        return None
+    return f"/{config.UPLOAD_DIR}/{os.path.relpath(target, root).replace(os.sep, '/')}"
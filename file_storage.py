@@ -0,0 +1,134 @@
+"""첨부파일 업로드 저장 파이프라인
+
+업로드 본문을 메모리에 통째로 올리지 않고 고정 크기 청크로 임시 파일에 기록한다.
+- 요청 전체 크기는 폼을 파싱하기 전에 Content-Length로 검사 (check_request_size, main 미들웨어)
+- 파일별 MAX_FILE_SIZE는 폼 파싱 뒤에 검사한다. 폼 파서가 파일 본문을 이미 임시 파일(spool)로 받아 둔
+  상태이므로 수신 자체를 중간에 끊지는 못하고, blob 저장소로 옮기는 도중 한도를 넘으면 중단해 임시 파일을 삭제
+- 디스크 I/O는 스레드풀에서 수행해 이벤트 루프를 막지 않음
+- 저장하면서 SHA-256을 계산해 내용 주소 저장소(blob_store)의 경로로 원자적으로 이동 (os.replace)
+- 같은 내용의 blob이 이미 있으면 임시 파일을 버리고 기존 blob을 재사용
+- 여러 파일은 save_uploads로 UPLOAD_CONCURRENCY개까지 동시에 저장
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import List, Mapping, NamedTuple, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+import blob_store
+import config
+import utils
+
+
+class UploadRejected(Exception):
+    """검증 실패로 저장하지 않은 업로드 (메시지는 사용자에게 그대로 노출)"""
+
+
+class StoredFile(NamedTuple):
+    filename: str  # 사용자가 올린 원래 파일명
+    path: str  # 디스크 경로
+    url: str  # /uploads/blobs/... 공개 경로 (DB filepath 컬럼 값)
+    size: int
+    sha256: str
+
+
+def _safe_name(filename: str) -> str:
+    # 경로 구분자를 포함한 파일명(../ 등)이 업로드 디렉토리를 벗어나지 않도록 basename만 사용
+    return os.path.basename(filename.replace("\\", "/")) or "file"
+
+
+def check_request_size(headers: Mapping[str, str]) -> Optional[str]:
+    """multipart 요청의 Content-Length가 MAX_UPLOAD_REQUEST_SIZE를 넘으면 오류 메시지 (본문을 읽기 전에 호출)"""
+    if not headers.get("content-type", "").startswith("multipart/form-data"):
+        return None
+    try:
+        length = int(headers.get("content-length", ""))
+    except ValueError:
+        return None  # chunked 등 길이를 모르는 요청은 파일별 한도로만 제한
+    if length > config.MAX_UPLOAD_REQUEST_SIZE:
+        return f"업로드 요청 크기가 {config.MAX_UPLOAD_REQUEST_SIZE / (1024*1024):.0f}MB를 초과합니다."
+    return None
+
+
+async def save_upload(file: UploadFile) -> StoredFile:
+    """폼 파서가 받아 둔 업로드 파일을 청크 단위로 blob 저장소에 저장. 검증 실패 시 UploadRejected 발생"""
+    is_valid, error_msg = utils.validate_file_extension(file.filename)
+    if not is_valid:
+        raise UploadRejected(error_msg)
+    if file.size is not None:  # 이미 받아 둔 크기 (청크를 옮기기 전에 거부)
+        is_valid, error_msg = utils.validate_file_size(file.size)
+        if not is_valid:
+            raise UploadRejected(error_msg)
+
+    staging_dir = os.path.join(config.UPLOAD_DIR, blob_store.BLOB_SUBDIR)
+    os.makedirs(staging_dir, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix=".upload-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+
+    def write_chunk(out, chunk):
+        out.write(chunk)
+        hasher.update(chunk)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(config.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                is_valid, error_msg = utils.validate_file_size(size)
+                if not is_valid:
+                    raise UploadRejected(error_msg)
+                await run_in_threadpool(write_chunk, out, chunk)
+
+        sha256 = hasher.hexdigest()
+        url = blob_store.find_blob_url(sha256)
+        if url:
+            try:
+                os.utime(blob_store.blob_disk_path(url))  # GC 유예 기간 동안 재사용된 blob 보호
+            except FileNotFoundError:
+                url = None  # 찾은 직후 GC가 삭제함 -> 새로 저장
+            else:
+                os.remove(tmp_path)  # 이미 저장된 내용 (중복 제거)
+        if not url:
+            url = f"/{config.UPLOAD_DIR}/{blob_store.blob_relpath(sha256, os.path.splitext(file.filename)[1])}"
+            final_path = blob_store.blob_disk_path(url)
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            await run_in_threadpool(os.replace, tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return StoredFile(filename=_safe_name(file.filename), path=blob_store.blob_disk_path(url),
+                      url=url, size=size, sha256=sha256)
+
+
+async def save_uploads(files: List[UploadFile]) -> Tuple[List[StoredFile], List[dict]]:
+    """여러 업로드 파일을 제한된 동시성으로 저장
+
+    저장된 파일(입력 순서 유지)과 거부된 파일의 {"filename", "error"} 목록을 반환한다.
+    """
+    semaphore = asyncio.Semaphore(config.UPLOAD_CONCURRENCY)
+
+    async def save_one(file: UploadFile) -> StoredFile:
+        async with semaphore:
+            return await save_upload(file)
+
+    results = await asyncio.gather(*(save_one(f) for f in files), return_exceptions=True)
+
+    stored_files: List[StoredFile] = []
+    errors: List[dict] = []
+    for file, result in zip(files, results):
+        if isinstance(result, UploadRejected):
+            errors.append({"filename": _safe_name(file.filename or ""), "error": str(result)})
+        elif isinstance(result, BaseException):
+            raise result  # 이미 저장된 blob은 참조가 없으므로 attachment_gc가 정리
+        else:
+            stored_files.append(result)
+    return stored_files, errors
@@ -73,6 +73,11 @@ def fix_schema(db_url=None):
             ]
             add_columns("events", events_columns)
 
+            # Attachment tables -> content-addressed blobs
+            for file_table in ["task_files", "project_files", "meeting_minute_files",
+                               "archived_task_files", "archived_project_files"]:
+                add_columns(file_table, [("blob_sha256", "VARCHAR(64)")])
+
             conn.commit()
             log("Schema update finished.")
 
@@ -0,0 +1,435 @@
+"""AI 백그라운드 작업 큐
+
+WBS 생성, 회의록 분석, 업무 리포트처럼 모델 응답이 수십 초 걸리는 작업은 요청 안에서 기다리지 않고
+ai_jobs 테이블에 등록한 뒤 작업 ID를 바로 돌려준다. 프로세스 안의 워커(workers.JobQueue)가 실행하고
+결과는 GET /api/jobs/{id} 폴링이나 GET /api/jobs/{id}/events(SSE)로 받는다.
+
+- 테이블이 원본이므로 재시작해도 대기 중인 작업은 시작 시 recover()로 다시 큐에 들어간다
+- 같은 사용자/종류/입력의 작업이 진행 중이면 새로 만들지 않고 그 작업 ID를 반환 (dedup_key 유니크)
+- 실패하면 AI_JOB_MAX_ATTEMPTS까지 AI_JOB_RETRY_BASE_SECONDS부터 두 배씩 늘려 재시도
+- 실행 전 status 조건부 UPDATE로 작업을 선점하므로 여러 프로세스가 같은 테이블을 써도 한 번만 실행된다
+"""
+import asyncio
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+import ai_client
+import ai_resilience
+import config
+import models
+import work_reports
+import workers
+from database import SessionLocal, engine
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+_jobs = models.AIJob.__table__
+_handlers: Dict[str, Callable[[int, int, dict], Awaitable[dict]]] = {}
+
+
+def handler(kind: str):
+    """작업 종류별 실행 함수 등록. 함수는 (job_id, user_id, params)를 받아 결과 dict를 반환"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def dedup_key(kind: str, user_id: int, params: dict) -> str:
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{kind}\n{user_id}\n{payload}".encode("utf-8")).hexdigest()
+
+
+def submit(kind: str, user_id: int, params: dict, fresh: bool = False) -> Tuple[int, bool]:
+    """작업 등록 후 큐에 추가. (작업 ID, 새로 만들었는지) 반환"""
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+    key = dedup_key(kind, user_id, params)
+    for _ in range(2):
+        try:
+            with engine.begin() as conn:
+                existing = conn.execute(select(_jobs.c.id).where(_jobs.c.dedup_key == key)).scalar()
+                if existing:
+                    return existing, False
+                job_id = conn.execute(insert(_jobs).values(
+                    kind=kind,
+                    user_id=user_id,
+                    status="queued",
+                    dedup_key=key,
+                    params=json.dumps(dict(params, fresh=fresh), ensure_ascii=False, default=str),
+                    progress=0,
+                    attempts=0,
+                    run_after=datetime.utcnow(),
+                    created_at=datetime.utcnow(),
+                )).inserted_primary_key[0]
+        except IntegrityError:
+            continue  # 같은 작업이 동시에 등록됨 -> 다시 조회해 기존 작업 반환
+        queue.put(job_id)
+        return job_id, True
+    raise RuntimeError("AI 작업 등록에 실패했습니다")
+
+
+def _row_to_dict(row) -> dict:
+    return {
+        "id": row.id,
+        "kind": row.kind,
+        "user_id": row.user_id,
+        "status": row.status,
+        "progress": row.progress or 0,
+        "attempts": row.attempts or 0,
+        "error": row.error,
+        "result": json.loads(row.result) if row.result else None,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+    }
+
+
+def get_job(job_id: int) -> Optional[dict]:
+    with engine.connect() as conn:
+        row = conn.execute(select(_jobs).where(_jobs.c.id == job_id)).first()
+    return _row_to_dict(row) if row else None
+
+
+def set_progress(job_id: int, percent: int):
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(_jobs.c.id == job_id).values(
+            progress=percent, heartbeat_at=datetime.utcnow(),
+        ))
+
+
+async def progress(job_id: int, percent: int):
+    """실행 중인 작업의 진행률 기록 (0~100). 임대는 _process가 따로 연장한다"""
+    await asyncio.to_thread(set_progress, job_id, percent)
+
+
+def _heartbeat(job_id: int):
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(_jobs.c.id == job_id, _jobs.c.status == "running").values(
+            heartbeat_at=datetime.utcnow(),
+        ))
+
+
+async def _keep_alive(job_id: int):
+    """실행 중인 동안 임대 기간의 1/3마다 heartbeat_at 갱신 (progress를 호출하지 않는 작업도 재실행되지 않게)"""
+    interval = max(config.AI_JOB_LEASE_SECONDS / 3, 1)
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(_heartbeat, job_id)
+        except Exception as e:
+            print(f"[{datetime.now()}] AI job {job_id} heartbeat failed: {e}")
+
+
+def _claim(job_id: int):
+    """대기 중인 작업을 running으로 선점 (다른 워커가 먼저 가져갔으면 None)"""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        claimed = conn.execute(
+            update(_jobs)
+            .where(_jobs.c.id == job_id, _jobs.c.status == "queued")
+            .values(status="running", started_at=now, heartbeat_at=now, attempts=_jobs.c.attempts + 1)
+        ).rowcount
+        if not claimed:
+            return None
+        return conn.execute(
+            select(_jobs.c.id, _jobs.c.kind, _jobs.c.user_id, _jobs.c.params, _jobs.c.attempts)
+            .where(_jobs.c.id == job_id)
+        ).first()
+
+
+def _finish(job_id: int, result):
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(_jobs.c.id == job_id).values(
+            status="succeeded", result=json.dumps(result, ensure_ascii=False, default=str), error=None,
+            progress=100, dedup_key=None, finished_at=datetime.utcnow(),
+        ))
+
+
+def _fail(job_id: int, attempts: int, error: Exception) -> Optional[float]:
+    """실패 기록. 재시도하면 대기 시간(초), 마지막 시도였으면 None"""
+    now = datetime.utcnow()
+    values = {"error": str(error) or error.__class__.__name__}
+    delay = None
+    if attempts < config.AI_JOB_MAX_ATTEMPTS:
+        delay = config.AI_JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+        values.update(status="queued", run_after=now + timedelta(seconds=delay))
+    else:
+        values.update(status="failed", dedup_key=None, finished_at=now)
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(_jobs.c.id == job_id).values(**values))
+    return delay
+
+
+def _release(job_id: int):
+    """종료로 중단된 작업을 대기 상태로 되돌림 (시도 횟수는 차감)"""
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(_jobs.c.id == job_id, _jobs.c.status == "running").values(
+            status="queued", attempts=_jobs.c.attempts - 1,
+        ))
+
+
+async def _process(job_id: int):
+    job = await asyncio.to_thread(_claim, job_id)
+    if job is None:
+        return
+    params = json.loads(job.params or "{}")
+    run = _handlers[job.kind]
+    keep_alive = asyncio.ensure_future(_keep_alive(job_id))
+    try:
+        result = await ai_client.run_for_user(
+            job.user_id, run(job.id, job.user_id, params), fresh=bool(params.get("fresh"))
+        )
+    except asyncio.CancelledError:
+        _release(job_id)
+        raise
+    except Exception as e:
+        print(f"[{datetime.now()}] AI job {job_id} ({job.kind}) attempt {job.attempts} failed: {e}")
+        delay = await asyncio.to_thread(_fail, job_id, job.attempts, e)
+        if delay is not None:
+            asyncio.get_running_loop().call_later(delay, queue.put, job_id)
+        return
+    finally:
+        keep_alive.cancel()
+    await asyncio.to_thread(_finish, job_id, result)
+
+
+queue = workers.JobQueue("ai_jobs", _process, concurrency=config.AI_JOB_WORKERS)
+
+
+def recover() -> int:
+    """중단된 작업을 되살리고 실행할 때가 된 대기 작업을 큐에 추가 (시작 시, 주기적으로 실행)"""
+    now = datetime.utcnow()
+    lease = func.coalesce(_jobs.c.heartbeat_at, _jobs.c.started_at)
+    stale = and_(_jobs.c.status == "running", lease < now - timedelta(seconds=config.AI_JOB_LEASE_SECONDS))
+    with engine.begin() as conn:
+        conn.execute(update(_jobs).where(stale, _jobs.c.attempts >= config.AI_JOB_MAX_ATTEMPTS).values(
+            status="failed", error="작업이 중단되었습니다", dedup_key=None, finished_at=now,
+        ))
+        conn.execute(update(_jobs).where(stale).values(status="queued"))
+        due = [job_id for (job_id,) in conn.execute(
+            select(_jobs.c.id).where(_jobs.c.status == "queued", _jobs.c.run_after <= now).order_by(_jobs.c.id)
+        )]
+    for job_id in due:
+        queue.put(job_id)
+    return len(due)
+
+
+def purge() -> int:
+    """보관 기간(AI_JOB_RETENTION_HOURS)이 지난 완료/실패 작업 삭제"""
+    cutoff = datetime.utcnow() - timedelta(hours=config.AI_JOB_RETENTION_HOURS)
+    with engine.begin() as conn:
+        return conn.execute(delete(_jobs).where(
+            _jobs.c.status.in_(FINISHED_STATUSES), _jobs.c.finished_at < cutoff
+        )).rowcount
+
+
+def maintain() -> dict:
+    """스케줄러 진입점"""
+    return {"requeued": recover(), "purged": purge()}
+
+
+def schedule_monthly_reports() -> Optional[int]:
+    """매월 WORK_REPORT_BATCH_DAY일에 지난달 월간 리포트 일괄 생성 작업 등록 (스케줄러 진입점)
+
+    작업은 첫 번째 관리자 이름으로 등록한다. 이미 리포트가 있는 직원은 건너뛰므로 같은 날 다시 등록돼도 안전하다.
+    """
+    today = date.today()
+    if today.day != config.WORK_REPORT_BATCH_DAY:
+        return None
+    last_month = today.replace(day=1) - timedelta(days=1)
+    with engine.connect() as conn:
+        admin_id = conn.execute(
+            select(models.User.id).where(models.User.role == "admin").order_by(models.User.id)
+        ).scalar()
+    if admin_id is None:
+        return None
+    job_id, _ = submit("work_report_batch", admin_id, {"type": "MONTHLY", "date": last_month.isoformat()})
+    return job_id
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def stream(request: Request, job_id: int):
+    """작업 상태가 바뀔 때마다 status 이벤트, 끝나면 결과와 함께 done 이벤트를 보내는 SSE 스트림"""
+    last = None
+    while True:
+        job = await asyncio.to_thread(get_job, job_id)
+        if job is None:
+            yield _sse("error", {"detail": "Job not found"})
+            return
+        state = (job["status"], job["progress"], job["attempts"])
+        if job["status"] in FINISHED_STATUSES:
+            yield _sse("done", job)
+            return
+        if state != last:
+            last = state
+            yield _sse("status", job)
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(config.AI_JOB_POLL_SECONDS)
+
+
+def _with_session(func: Callable, *args):
+    db = SessionLocal()
+    try:
+        return func(db, *args)
+    finally:
+        db.close()
+
+
+def _usernames(db) -> str:
+    return ", ".join(username for (username,) in db.query(models.User.username).all())
+
+
+@handler("wbs")
+async def _wbs(job_id: int, user_id: int, params: dict):
+    ai = ai_client.get_ai()
+    return await ai.generate_wbs_json(params.get("goal"), params.get("deadline"), params.get("type"),
+                                      params.get("scope"), params.get("stakeholders"))
+
+
+@handler("minutes")
+async def _minutes(job_id: int, user_id: int, params: dict):
+    user_ctx = await asyncio.to_thread(_with_session, _usernames)
+    ai = ai_client.get_ai()
+    return await ai.analyze_meeting_minutes(params["text"], user_ctx)
+
+
+@handler("work_report")
+async def _work_report(job_id: int, user_id: int, params: dict):
+    report_type = params["type"]
+    start_date, end_date = work_reports.report_range(report_type, date.fromisoformat(params["date"]))
+    log = await asyncio.to_thread(_with_session, work_reports.report_log, user_id, report_type, start_date, end_date)
+    await progress(job_id, 20)
+
+    ai = ai_client.get_ai()
+    ai_result = await ai.generate_work_report(log, report_type, start_date, end_date)
+    await progress(job_id, 90)
+
+    report = await asyncio.to_thread(
+        _with_session, work_reports.save_report, user_id, report_type, start_date, end_date, ai_result
+    )
+    return work_reports.response(report, ai_result)
+
+
+def _batch_plan(db, report_type: str, start_date: date, end_date: date, user_ids: Optional[List[int]],
+                include_idle: bool, overwrite: bool, saved: Optional[List[int]] = None) -> dict:
+    """일괄 생성 대상 사용자와 업무 목록 (업무 목록은 전 직원 한 번의 쿼리)
+
+    saved: 이 작업의 이전 시도에서 이미 저장한 사용자 (재시도 시 덮어쓰기여도 다시 만들지 않음)
+    """
+    users = db.query(models.User.id, models.User.username).order_by(models.User.id)
+    if user_ids:
+        users = users.filter(models.User.id.in_(user_ids))
+    names = dict(users.all())
+    saved = set(saved or ()) & set(names)
+    existing = set() if overwrite else work_reports.reported_users(db, report_type, start_date, end_date)
+    done = existing | saved
+    logs = work_reports.report_logs(db, [uid for uid in names if uid not in done], report_type, start_date, end_date)
+    targets = {uid: log for uid, log in logs.items() if log is not None or include_idle}
+    return {
+        "names": names,
+        "logs": {uid: log or work_reports.EMPTY_LOG for uid, log in targets.items()},
+        "saved": len(saved),
+        "skipped_existing": len((existing - saved) & set(names)),
+        "skipped_idle": len(logs) - len(targets),
+    }
+
+
+def _save_batch(db, job_id: int, report_type: str, start_date: date, end_date: date,
+                results: List[Tuple[int, dict]], replace: bool) -> int:
+    """리포트 저장과 함께 작업 params의 saved_user_ids에 저장한 사용자를 기록 (한 트랜잭션)"""
+    params = json.loads(db.execute(select(_jobs.c.params).where(_jobs.c.id == job_id)).scalar() or "{}")
+    params["saved_user_ids"] = sorted(set(params.get("saved_user_ids") or ()) | {uid for uid, _ in results})
+    db.execute(update(_jobs).where(_jobs.c.id == job_id).values(
+        params=json.dumps(params, ensure_ascii=False, default=str),
+    ))
+    return work_reports.save_reports(db, report_type, start_date, end_date, results, replace=replace)
+
+
+@handler("work_report_batch")
+async def _work_report_batch(job_id: int, user_id: int, params: dict):
+    """전 직원(또는 user_ids) 리포트 일괄 생성
+
+    WORK_REPORT_BATCH_CONCURRENCY개의 워커가 AI 호출을 나눠 처리하고(속도는 ai_resilience 토큰 버킷이 조절),
+    결과는 WORK_REPORT_BATCH_FLUSH_SIZE개씩 모아 한 번에 저장한다. 개별 실패는 결과에 기록하고 계속 진행하며,
+    서킷이 열리면 저장한 만큼 남기고 작업을 실패 처리한다. 저장한 직원은 작업 params(saved_user_ids)에
+    기록되므로 재시도 시 건너뛴다. overwrite면 기존 리포트를 새 리포트로 교체한다.
+    """
+    report_type = params["type"]
+    start_date, end_date = work_reports.report_range(report_type, date.fromisoformat(params["date"]))
+    overwrite = bool(params.get("overwrite"))
+    plan = await asyncio.to_thread(
+        _with_session, _batch_plan, report_type, start_date, end_date, params.get("user_ids"),
+        bool(params.get("include_idle")), overwrite, params.get("saved_user_ids"),
+    )
+    pending = asyncio.Queue()
+    for item in plan["logs"].items():
+        pending.put_nowait(item)
+    total = pending.qsize()
+    await progress(job_id, 5)
+
+    ai = ai_client.get_ai()
+    fresh = bool(params.get("fresh"))
+    results: List[Tuple[int, dict]] = []
+    failed: List[dict] = []
+    counts = {"done": 0, "saved": 0}
+    flush_lock = asyncio.Lock()
+
+    async def flush(final: bool = False):
+        async with flush_lock:
+            if not results or (not final and len(results) < config.WORK_REPORT_BATCH_FLUSH_SIZE):
+                return
+            batch = results[:]
+            del results[:]
+            counts["saved"] += await asyncio.to_thread(
+                _with_session, _save_batch, job_id, report_type, start_date, end_date, batch, overwrite
+            )
+
+    async def worker():
+        while not pending.empty():
+            uid, log = pending.get_nowait()
+            try:
+                ai_result = await ai_client.run_for_user(
+                    uid, ai.generate_work_report(log, report_type, start_date, end_date), fresh=fresh
+                )
+                results.append((uid, ai_result))
+            except ai_resilience.CircuitOpenError:
+                raise
+            except Exception as e:
+                failed.append({"user_id": uid, "username": plan["names"].get(uid), "error": str(e)})
+            counts["done"] += 1
+            await flush()
+            await progress(job_id, 5 + int(90 * counts["done"] / total))
+
+    workers_count = max(1, min(config.WORK_REPORT_BATCH_CONCURRENCY, total))
+    tasks = [asyncio.create_task(worker()) for _ in range(workers_count)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        await flush(final=True)
+
+    return {
+        "status": "success",
+        "report_type": report_type,
+        "date_range": f"{start_date} ~ {end_date}",
+        "total": total,
+        "generated": counts["saved"] + plan["saved"],
+        "skipped_existing": plan["skipped_existing"],
+        "skipped_idle": plan["skipped_idle"],
+        "failed": failed,
+    }
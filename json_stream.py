@@ -0,0 +1,127 @@
+"""조각으로 도착하는 JSON 텍스트의 점진적 파싱
+
+AI 응답을 스트리밍으로 받을 때 전체 JSON이 끝나기를 기다리지 않고, 지정한 경로의 값
+(예: phases[*].tasks[*], action_items[*])이 완성되는 즉시 꺼내기 위해 사용한다.
+문자열/이스케이프를 고려해 중첩 구조만 추적하고, 완성된 값의 구간만 json.loads 한다.
+
+    parser = JSONStreamParser([("phases", "*", "tasks", "*")])
+    for chunk in chunks:
+        for path, value in parser.feed(chunk):
+            ...  # path == ("phases", 0, "tasks", 2)
+"""
+import json
+import re
+from typing import Iterable, List, Optional, Tuple
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_LITERAL = re.compile(r'[^\s,:\[\]{}"]+')
+_WHITESPACE = " \t\r\n"
+
+WILDCARD = "*"
+
+
+def path_matches(pattern: Tuple, path: Tuple) -> bool:
+    """경로 패턴 비교 ("*"는 배열 인덱스/키 하나와 일치)"""
+    return len(pattern) == len(path) and all(p == WILDCARD or p == v for p, v in zip(pattern, path))
+
+
+class JSONStreamParser:
+    """feed()로 받은 텍스트를 이어 읽으며 패턴에 맞는 경로의 값이 완성될 때마다 (경로, 값)을 반환"""
+
+    def __init__(self, patterns: Iterable[Tuple]):
+        self.patterns = [tuple(p) for p in patterns]
+        self.text = ""
+        self._pos = 0
+        self._started = False
+        self._finished = False
+        # 열린 컨테이너: [종류("obj"/"arr"), 현재 키 또는 인덱스, 시작 위치, 상태]
+        self._stack: List[list] = []
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, object]]:
+        self.text += chunk
+        return self._scan(final=False)
+
+    def close(self) -> List[Tuple[Tuple, object]]:
+        """입력 끝. 버퍼 끝에 걸려 있던 숫자/리터럴을 마저 처리"""
+        return self._scan(final=True)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def _path(self) -> Tuple:
+        return tuple(frame[1] for frame in self._stack)
+
+    def _complete(self, start: int, end: int, out: list):
+        """값 하나가 text[start:end]로 완성됨"""
+        if self._stack:
+            path = self._path()
+            self._stack[-1][3] = "comma"
+        else:
+            path = ()
+            self._finished = True
+        if any(path_matches(pattern, path) for pattern in self.patterns):
+            out.append((path, json.loads(self.text[start:end])))
+
+    def _scan(self, final: bool) -> List[Tuple[Tuple, object]]:
+        out: List[Tuple[Tuple, object]] = []
+        text = self.text
+        while self._pos < len(text) and not self._finished:
+            pos = self._pos
+            char = text[pos]
+            if char in _WHITESPACE:
+                self._pos += 1
+                continue
+            if not self._started:
+                # ```json 같은 코드블록 머리말은 건너뜀
+                if char in "{[":
+                    self._started = True
+                else:
+                    self._pos += 1
+                    continue
+
+            top = self._stack[-1] if self._stack else None
+            state = top[3] if top else "value"
+
+            if char in "}]":
+                frame = self._stack.pop()
+                self._pos = pos + 1
+                self._complete(frame[2], pos + 1, out)
+            elif char == ",":
+                if top[0] == "arr":
+                    top[1] += 1
+                    top[3] = "value"
+                else:
+                    top[3] = "key"
+                self._pos = pos + 1
+            elif char == ":":
+                top[3] = "value"
+                self._pos = pos + 1
+            elif char == '"':
+                match = _STRING.match(text, pos)
+                if not match:
+                    break  # 문자열이 아직 다 오지 않음
+                self._pos = match.end()
+                if state == "key":
+                    top[1] = json.loads(match.group())
+                    top[3] = "colon"
+                else:
+                    self._complete(pos, match.end(), out)
+            elif char in "{[":
+                self._stack.append(["obj" if char == "{" else "arr", None if char == "{" else 0, pos,
+                                    "key" if char == "{" else "value"])
+                self._pos = pos + 1
+            else:
+                match = _LITERAL.match(text, pos)
+                if not match or (match.end() == len(text) and not final):
+                    break  # 숫자가 이어서 올 수 있음
+                self._pos = match.end()
+                self._complete(pos, match.end(), out)
+        return out
+
+    def result(self) -> Optional[object]:
+        """완성된 전체 JSON (아직 끝나지 않았으면 None)"""
+        if not self._finished:
+            return None
+        start = next(i for i, c in enumerate(self.text) if c in "{[")
+        return json.loads(self.text[start:self._pos])
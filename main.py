@@ -1,11 +1,12 @@
 from fastapi import FastAPI, Depends, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 import os
 import traceback
 from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import inspect, or_, select
 from database import SessionLocal, engine
 import models
 from typing import Optional, List
@@ -14,9 +15,27 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 import config
 import utils
-import google.generativeai as genai
+import ai_client
+import ai_cache
+import ai_context
+import ai_providers
+import jobs
+import semantic_index
+import work_reports
+import report_analytics
 import json
 import wbs_templates  # Template Module
+import rollups
+import task_service
+import archive
+import attachment_gc
+import scheduler
+import file_storage
+import blob_store
+import downloads
+import previews
+import attachment_text
+import workers
 import fix_production_schema  # Import migration script
 
 # ---------------------------------------------------------
@@ -126,12 +145,20 @@ async def log_work_report_cookies(request: Request, call_next):
     response = await call_next(request)
     return response
 
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    # 폼 파싱(임시 파일 수신) 전에 Content-Length로 너무 큰 업로드 요청을 거부
+    error_msg = file_storage.check_request_size(request.headers)
+    if error_msg:
+        return JSONResponse(status_code=413, content={"detail": error_msg})
+    return await call_next(request)
+
 # 정적 파일 및 템플릿 설정
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 업로드 파일은 StaticFiles 대신 소유자(업무/프로젝트/회의록) 열람 권한 확인 후 downloads 모듈로 제공 (/files/..., /uploads/...)
 
 templates = Jinja2Templates(directory="templates")
 
@@ -208,6 +235,46 @@ def on_startup():
                     db.rollback()
                     # 컬럼이 이미 존재하는 경우 무시
 
+            # 마이그레이션: 첨부파일 테이블에 blob_sha256 컬럼 추가 (내용 주소 저장소)
+            for table in ["task_files", "project_files", "meeting_minute_files",
+                          "archived_task_files", "archived_project_files"]:
+                try:
+                    db.execute(text(f"ALTER TABLE {table} ADD COLUMN blob_sha256 VARCHAR(64)"))
+                    db.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{table}_blob_sha256 ON {table} (blob_sha256)"))
+                    db.commit()
+                    print(f"마이그레이션: {table} 테이블에 blob_sha256 컬럼 추가")
+                except Exception:
+                    db.rollback()
+                    # 컬럼이 이미 존재하는 경우 무시
+
+            # 마이그레이션: ai_jobs 테이블에 heartbeat_at 컬럼 추가 (일괄 작업 임대 연장)
+            try:
+                db.execute(text("SELECT heartbeat_at FROM ai_jobs LIMIT 1"))
+            except Exception:
+                db.rollback()
+                print("마이그레이션: ai_jobs 테이블에 heartbeat_at 컬럼 추가")
+                db.execute(text("ALTER TABLE ai_jobs ADD COLUMN heartbeat_at TIMESTAMP"))
+                db.commit()
+
+            # 마이그레이션: project_rollups의 projects FK 제거 (집계 캐시라 다시 만들면 get_rollups가 채움)
+            if any(fk["referred_table"] == "projects" for fk in inspect(engine).get_foreign_keys("project_rollups")):
+                print("마이그레이션: project_rollups 테이블 재생성 (projects FK 제거)")
+                models.ProjectRollup.__table__.drop(bind=engine)
+                models.ProjectRollup.__table__.create(bind=engine)
+
+            # 인덱스: 업무 리포트의 사용자별 담당/생성 업무 + 기간 조회 (work_reports._task_lines), 리포트 히스토리
+            for name, table, columns in [
+                ("ix_task_assignees_user_task", "task_assignees", "user_id, task_id"),
+                ("ix_tasks_creator_due", "tasks", "creator_id, due_date, start_date"),
+                ("ix_tasks_due_start", "tasks", "due_date, start_date"),
+                ("ix_work_reports_user_id", "work_reports", "user_id, id"),  # 히스토리 페이지
+            ]:
+                db.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+            if engine.dialect.name == "postgresql":
+                # 첨부파일 본문 검색의 접두어 LIKE 'term%' (attachment_text.search)는 collation과 무관한 패턴 인덱스 필요
+                db.execute(text("CREATE INDEX IF NOT EXISTS ix_blob_terms_term_pattern ON blob_terms (term text_pattern_ops)"))
+            db.commit()
+
             # 마이그레이션: 부서명 한글화 (파라미터 바인딩으로 SQL Injection 방지)
             for eng, kor in config.DEPARTMENT_MAPPING.items():
                 db.execute(text("UPDATE users SET department = :kor WHERE department = :eng"), {"kor": kor, "eng": eng})
@@ -222,6 +289,49 @@ def on_startup():
     except Exception as e:
         print(f"시작 오류: {e}")
 
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """공유 AI 클라이언트, 업로드 후처리/AI 작업 워커와 주기 작업(아카이브 등) 시작"""
+    try:
+        ai_client.init()
+    except Exception as e:
+        print(f"AI client init failed: {e}")
+
+    if config.PREVIEW_ENABLED:
+        previews.queue.start()
+        await run_in_threadpool(previews.backfill)
+    if config.EXTRACT_ENABLED:
+        attachment_text.queue.start()
+        await run_in_threadpool(attachment_text.backfill)
+    jobs.queue.start()
+    await run_in_threadpool(jobs.recover)
+    if semantic_index.is_available():
+        semantic_index.queue.start()
+        semantic_index.request_sync()
+
+    if not config.SCHEDULER_ENABLED:
+        return
+    if config.ARCHIVE_ENABLED:
+        scheduler.register("archive", config.ARCHIVE_INTERVAL_HOURS * 3600, archive.run_archive)
+    if config.GC_ENABLED:
+        scheduler.register("attachment_gc", config.GC_INTERVAL_HOURS * 3600, attachment_gc.collect_garbage,
+                           initial_delay=300)
+    scheduler.register("ai_jobs", 60, jobs.maintain)
+    if semantic_index.is_available():
+        scheduler.register("semantic_index", config.SEMANTIC_SYNC_INTERVAL_MINUTES * 60, semantic_index.sync,
+                           initial_delay=config.SEMANTIC_SYNC_INTERVAL_MINUTES * 60)
+    if config.WORK_REPORT_BATCH_SCHEDULE_ENABLED:
+        scheduler.register("work_report_batch", 24 * 3600, jobs.schedule_monthly_reports, initial_delay=600)
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await scheduler.stop()
+    await workers.stop_all()
+
 # 개발용 디버그 라우트 (프로덕션에서는 제거 권장)
 
 
@@ -472,7 +582,7 @@ def read_root(request: Request,
 
         event = {
             "title": f"[{t.assignee.username if t.assignee else '미지정'}] {t.title}",
-            "url": f"javascript:openEditModal('{t.id}', '{t.title}', '{t.description or ''}', '{t.status}', '{t.department or ''}', {[u.id for u in t.assignees]}, '{t.start_date or ''}', '{t.due_date or ''}', '{t.project_id or 0}', {[f.filename for f in t.files]}, {[f.filepath for f in t.files]})"
+            "url": f"javascript:openEditModal('{t.id}', '{t.title}', '{t.description or ''}', '{t.status}', '{t.department or ''}', {[u.id for u in t.assignees]}, '{t.start_date or ''}', '{t.due_date or ''}', '{t.project_id or 0}', {[f.filename for f in t.files]}, {[f.download_url for f in t.files]})"
         }
 
         if start:
@@ -990,13 +1100,21 @@ def delete_bulk_users(request: Request, user_ids: str = Form(...), db: Session =
 
 
 @app.get("/projects", response_class=HTMLResponse)
-def read_projects(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def read_projects(request: Request, include_archived: bool = False, db: Session = Depends(get_db),
+                  current_user: models.User = Depends(get_current_user)):
     """프로젝트 목록 페이지"""
     if not current_user:
         return RedirectResponse(url="/login")
 
     try:
-        projects = db.query(models.Project).all()
+        # 템플릿에서 tojson으로 출력하는 관계는 미리 일괄 로딩 (프로젝트당 lazy load 방지)
+        projects = db.query(models.Project).options(
+            selectinload(models.Project.assignees),
+            selectinload(models.Project.files),
+            selectinload(models.Project.creator)
+        ).all()
+        # 업무 진행률/지연 현황은 개별 업무를 읽지 않고 집계 테이블에서 가져옴
+        project_rollups = rollups.get_rollups(db)
         scheduled = [p for p in projects if p.status == 'Scheduled']
         inprogress = [p for p in projects if p.status == 'In Progress']
         completed = [p for p in projects if p.status == 'Completed']
@@ -1009,6 +1127,9 @@ def read_projects(request: Request, db: Session = Depends(get_db), current_user:
             "scheduled": scheduled,
             "inprogress": inprogress,
             "completed": completed,
+            "rollups": project_rollups,
+            "include_archived": include_archived,
+            "archived_projects": archive.list_archived_projects(db.connection()) if include_archived else [],
             "users": users
         })
     except Exception as e:
@@ -1048,43 +1169,39 @@ def create_project(name: str = Form(...), description: str = Form(None),
         department=department,
         creator_id=current_user.id
     )
-    db.add(new_project)
-    db.commit()
-
     # 담당자 처리
     if assignee_ids:
-        users = db.query(models.User).filter(models.User.id.in_(assignee_ids)).all()
-        new_project.assignees = users
-        db.commit()
+        new_project.assignees = db.query(models.User).filter(models.User.id.in_(assignee_ids)).all()
+    db.add(new_project)
+    db.flush()  # 업무 생성에 필요한 프로젝트 ID 확보
 
-    # AI 제안 업무 생성
+    # AI 제안 업무 생성 (프로젝트와 함께 한 번에 커밋)
     if suggested_tasks:
         try:
             tasks_list = json.loads(suggested_tasks)
+            # 날짜 계산: 프로젝트 시작일 기준 (없으면 오늘)
+            p_start = s_date if s_date else date.today()
+            rows = []
             for t_data in tasks_list:
                 if not t_data.get('title'):
                     continue
-
-                # 날짜 계산: 프로젝트 시작일 기준 (없으면 오늘)
-                p_start = s_date if s_date else date.today()
                 est_days = int(t_data.get('estimated_days', 1))
-                t_due = p_start + timedelta(days=est_days)
-
-                new_task = models.Task(
-                    title=t_data['title'],
-                    description=t_data.get('description'),
-                    status="Todo",
-                    start_date=p_start,
-                    due_date=t_due,
-                    project_id=new_project.id,
-                    department=department or current_user.department,
-                    creator_id=current_user.id
-                )
-                db.add(new_task)
-            db.commit()
+                rows.append({
+                    "title": t_data['title'],
+                    "description": t_data.get('description'),
+                    "status": "Todo",
+                    "start_date": p_start,
+                    "due_date": p_start + timedelta(days=est_days),
+                    "project_id": new_project.id,
+                    "department": department or current_user.department,
+                })
+            # 업무 생성이 실패해도 프로젝트는 저장되도록 savepoint 사용
+            with db.begin_nested():
+                task_service.bulk_create_tasks(db, rows, current_user, commit=False)
         except Exception as e:
             print(f"Error creating suggested tasks: {e}")
 
+    db.commit()
     return RedirectResponse(url="/projects", status_code=303)
 
 
@@ -1136,7 +1253,15 @@ def get_project_tasks(project_id: int, db: Session = Depends(get_db), current_us
     if not current_user:
         return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
 
-    tasks = db.query(models.Task).filter(models.Task.project_id == project_id).all()
+    tasks = db.query(models.Task).options(
+        selectinload(models.Task.assignees),
+        selectinload(models.Task.files),
+        selectinload(models.Task.progresses).selectinload(models.TaskProgress.writer)
+    ).filter(models.Task.project_id == project_id).all()
+
+    # 보관된 프로젝트면 아카이브 테이블에서 조회
+    if not tasks and archive.is_archived_project(db.connection(), project_id):
+        return JSONResponse(content=archive.get_archived_project_tasks(db.connection(), project_id))
 
     data = []
     for t in tasks:
@@ -1154,7 +1279,7 @@ def get_project_tasks(project_id: int, db: Session = Depends(get_db), current_us
             "due_date": t.due_date.strftime("%Y-%m-%d") if t.due_date else None,
             "project_id": t.project_id,
             "filenames": [f.filename for f in t.files],
-            "filepaths": [f.filepath for f in t.files],
+            "filepaths": [f.download_url for f in t.files],
             "progresses": [{
                 "id": p.id,
                 "content": p.content,
@@ -1180,34 +1305,122 @@ async def upload_file(
     if not project:
         return RedirectResponse(url="/projects", status_code=303)
 
-    # 파일 검증
-    file_content = await file.read()
-    is_valid, error_msg = utils.validate_file_upload(file.filename, len(file_content))
-    if not is_valid:
-        return RedirectResponse(url=f"/projects?error={error_msg}", status_code=303)
-
-    upload_dir = "uploads"
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"{timestamp}_{file.filename}"
-    filepath = os.path.join(upload_dir, filename)
-
-    with open(filepath, "wb") as buffer:
-        buffer.write(file_content)
+    # 파일 검증 및 스트리밍 저장
+    try:
+        stored = await file_storage.save_upload(file)
+    except file_storage.UploadRejected as e:
+        return RedirectResponse(url=f"/projects?error={e}", status_code=303)
 
     new_file = models.ProjectFile(
-        filename=file.filename,
-        filepath=f"/uploads/{filename}",
+        filename=stored.filename,
+        filepath=stored.url,
+        blob_sha256=stored.sha256,
         project_id=project_id
     )
+    blob_store.acquire(db, stored)
     db.add(new_file)
     db.commit()
+    _enqueue_postprocessing([stored])
 
     return RedirectResponse(url="/projects", status_code=303)
 
 
+# 종류별 (첨부파일 테이블, 보관 테이블, 소유자 컬럼, 소유자 테이블들)
+_FILE_KINDS = {
+    "task": (models.TaskFile.__table__, models.archived_task_files, "task_id",
+             (models.Task.__table__, models.archived_tasks)),
+    "project": (models.ProjectFile.__table__, models.archived_project_files, "project_id",
+                (models.Project.__table__, models.archived_projects)),
+    "minute": (models.MeetingMinuteFile.__table__, None, "meeting_minute_id", (models.MeetingMinutes.__table__,)),
+}
+
+
+def _can_view_owner(db: Session, current_user: Optional[models.User], kind: str, owner_id: Optional[int]) -> bool:
+    """첨부파일의 소유자(업무/프로젝트/회의록)를 current_user가 볼 수 있는지
+
+    목록 페이지(/tasks, /projects와 보관 프로젝트 목록, /meeting_minutes)와 같은 규칙: 로그인한 사용자는
+    남아 있거나 보관된 소유자를 모두 본다. 소유자가 삭제된 첨부파일은 아무에게도 제공하지 않는다.
+    """
+    if not current_user or owner_id is None:
+        return False
+    return any(db.execute(select(owner.c.id).where(owner.c.id == owner_id)).first()
+               for owner in _FILE_KINDS[kind][3])
+
+
+def _get_file_row(db: Session, kind: str, file_id: int, current_user: models.User):
+    """current_user가 볼 수 있는 첨부파일 행(filename, filepath, blob_sha256) 조회. 보관된 업무/프로젝트 파일 포함"""
+    if kind not in _FILE_KINDS:
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+
+    row = None
+    table, archived_table, owner_column, _ = _FILE_KINDS[kind]
+    for t in (table, archived_table):
+        if t is not None and row is None:
+            row = db.execute(
+                select(t.c.filename, t.c.filepath, t.c.blob_sha256, t.c[owner_column].label("owner_id"))
+                .where(t.c.id == file_id)
+            ).first()
+    if not row or not row.filepath or not _can_view_owner(db, current_user, kind, row.owner_id):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return row
+
+
+def _can_view_upload(db: Session, current_user: models.User, url: str) -> bool:
+    """/uploads 경로를 참조하는 첨부파일 중 current_user가 소유자를 볼 수 있는 것이 있는지
+    (같은 내용의 blob과 썸네일 등 파생 파일은 blob 해시로 찾음)"""
+    sha256 = downloads.blob_sha256_of(url)
+    for kind, (table, archived_table, owner_column, _) in _FILE_KINDS.items():
+        for t in (table, archived_table):
+            if t is None:
+                continue
+            refers = or_(t.c.filepath == url, t.c.blob_sha256 == sha256) if sha256 else t.c.filepath == url
+            for (owner_id,) in db.execute(select(t.c[owner_column]).where(refers).distinct()):
+                if _can_view_owner(db, current_user, kind, owner_id):
+                    return True
+    return False
+
+
+@app.get("/files/{kind}/{file_id}")
+def download_file(kind: str, file_id: int, request: Request, download: bool = False,
+                  db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """첨부파일 다운로드 (Range, ETag/304 지원)"""
+    if not current_user:
+        return RedirectResponse(url="/login")
+    row = _get_file_row(db, kind, file_id, current_user)
+    return downloads.file_response(request, row.filepath, filename=row.filename,
+                                   sha256=row.blob_sha256, inline=not download)
+
+
+@app.get("/files/{kind}/{file_id}/thumbnail")
+def download_thumbnail(kind: str, file_id: int, request: Request,
+                       db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+    """첨부파일 썸네일 (아직 생성되지 않았으면 생성 작업을 걸고 404)"""
+    if not current_user:
+        raise HTTPException(status_code=401, detail="인증이 필요합니다")
+    row = _get_file_row(db, kind, file_id, current_user)
+    if not row.blob_sha256 or not previews.is_previewable(row.filepath):
+        raise HTTPException(status_code=404, detail="미리보기가 없습니다")
+
+    response = downloads.file_response(request, previews.thumbnail_url(row.filepath),
+                                       filename=f"{os.path.splitext(row.filename)[0]}.png",
+                                       sha256=row.blob_sha256, variant="thumb")
+    if response.status_code == 404:
+        previews.enqueue(row.filepath)
+    return response
+
+
+@app.get("/uploads/{path:path}")
+def serve_upload(path: str, request: Request, db: Session = Depends(get_db),
+                 current_user: models.User = Depends(get_current_user)):
+    """기존 /uploads 링크 호환 (참조하는 첨부파일의 소유자를 볼 수 있어야 함)"""
+    if not current_user:
+        return RedirectResponse(url="/login")
+    url = downloads.resolve_upload_path(path)
+    if not url or not _can_view_upload(db, current_user, url):
+        raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
+    return downloads.file_response(request, url)
+
+
 @app.get("/tasks", response_class=HTMLResponse)
 def read_tasks_page(request: Request, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     """업무 목록 페이지"""
@@ -1406,34 +1619,106 @@ async def upload_task_file(
     if not task:
         return RedirectResponse(url="/tasks", status_code=303)
 
-    # 파일 검증
-    file_content = await file.read()
-    is_valid, error_msg = utils.validate_file_upload(file.filename, len(file_content))
-    if not is_valid:
-        return RedirectResponse(url=f"/tasks?error={error_msg}", status_code=303)
-
-    upload_dir = "uploads/tasks"
-    if not os.path.exists(upload_dir):
-        os.makedirs(upload_dir)
-
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"{timestamp}_{file.filename}"
-    filepath = os.path.join(upload_dir, filename)
-
-    with open(filepath, "wb") as buffer:
-        buffer.write(file_content)
+    # 파일 검증 및 스트리밍 저장
+    try:
+        stored = await file_storage.save_upload(file)
+    except file_storage.UploadRejected as e:
+        return RedirectResponse(url=f"/tasks?error={e}", status_code=303)
 
     task_file = models.TaskFile(
-        filename=file.filename,
-        filepath=f"/uploads/tasks/{filename}",
+        filename=stored.filename,
+        filepath=stored.url,
+        blob_sha256=stored.sha256,
         task_id=task_id
     )
+    blob_store.acquire(db, stored)
     db.add(task_file)
     db.commit()
+    _enqueue_postprocessing([stored])
 
     return RedirectResponse(url="/tasks", status_code=303)
 
 
+def _enqueue_postprocessing(stored_files: List[file_storage.StoredFile]):
+    """커밋된 업로드의 썸네일 생성과 본문 추출 작업 추가"""
+    for stored in stored_files:
+        previews.enqueue(stored.url)
+        attachment_text.enqueue(stored.sha256)
+
+
+async def _attach_files(db: Session, files: List[UploadFile], model, owner_field: str, owner_id: int):
+    """여러 파일을 동시에 저장하고 첨부파일 행을 한 트랜잭션으로 추가"""
+    files = [f for f in files if f.filename]
+    if not files:
+        return JSONResponse(status_code=400, content={"status": "error", "detail": "업로드할 파일이 없습니다."})
+    if len(files) > config.MAX_FILES_PER_UPLOAD:
+        return JSONResponse(status_code=400, content={
+            "status": "error", "detail": f"한 번에 최대 {config.MAX_FILES_PER_UPLOAD}개까지 업로드할 수 있습니다."
+        })
+
+    stored_files, errors = await file_storage.save_uploads(files)
+    if not stored_files:
+        return JSONResponse(status_code=400, content={
+            "status": "error", "detail": errors[0]["error"], "errors": errors
+        })
+
+    rows = []
+    for stored in stored_files:
+        rows.append(model(filename=stored.filename, filepath=stored.url, blob_sha256=stored.sha256,
+                          **{owner_field: owner_id}))
+        blob_store.acquire(db, stored)
+    db.add_all(rows)
+    db.commit()
+    _enqueue_postprocessing(stored_files)
+
+    return JSONResponse(content={
+        "status": "success",
+        "files": [
+            {"id": row.id, "filename": row.filename, "url": row.download_url, "size": stored.size}
+            for row, stored in zip(rows, stored_files)
+        ],
+        "errors": errors
+    })
+
+
+@app.get("/api/attachments/search")
+def search_attachments(q: str, limit: int = 20, db: Session = Depends(get_db),
+                       current_user: models.User = Depends(get_current_user)):
+    """첨부파일 본문 검색"""
+    if not current_user:
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+    results = attachment_text.search(db.connection(), q, limit=min(max(limit, 1), 100))
+    return JSONResponse(content={"query": q, "results": results})
+
+
+@app.post("/api/tasks/{task_id}/files")
+async def upload_task_files(
+        task_id: int,
+        files: List[UploadFile] = File(...),
+        db: Session = Depends(get_db),
+        current_user: models.User = Depends(get_current_user)):
+    """업무 파일 다중 업로드 (JSON 응답)"""
+    if not current_user:
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+    if not db.query(models.Task.id).filter(models.Task.id == task_id).first():
+        return JSONResponse(status_code=404, content={"status": "error", "detail": "업무를 찾을 수 없습니다."})
+    return await _attach_files(db, files, models.TaskFile, "task_id", task_id)
+
+
+@app.post("/api/projects/{project_id}/files")
+async def upload_project_files(
+        project_id: int,
+        files: List[UploadFile] = File(...),
+        db: Session = Depends(get_db),
+        current_user: models.User = Depends(get_current_user)):
+    """프로젝트 파일 다중 업로드 (JSON 응답)"""
+    if not current_user:
+        return JSONResponse(status_code=401, content={"detail": "Unauthorized"})
+    if not db.query(models.Project.id).filter(models.Project.id == project_id).first():
+        return JSONResponse(status_code=404, content={"status": "error", "detail": "프로젝트를 찾을 수 없습니다."})
+    return await _attach_files(db, files, models.ProjectFile, "project_id", project_id)
+
+
 @app.post("/projects/{project_id}/delete", response_class=RedirectResponse)
 def delete_project(project_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
     if not current_user:
@@ -1445,6 +1730,47 @@ def delete_project(project_id: int, db: Session = Depends(get_db), current_user:
     return RedirectResponse(url="/projects", status_code=303)
 
 
+@app.post("/projects/{project_id}/restore", response_class=RedirectResponse)
+def restore_project(project_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+    """보관된 프로젝트 복원 (관리자)"""
+    archive.restore_project(db.connection(), project_id)
+    semantic_index.mark_changed(db, "task", archive.project_task_ids(db.connection(), [project_id]))
+    db.commit()
+    return RedirectResponse(url="/projects?include_archived=true", status_code=303)
+
+
+@app.get("/api/search/semantic")
+def semantic_search(q: str, kinds: Optional[str] = None, limit: int = 10,
+                    current_user: models.User = Depends(require_auth)):
+    """회의록/업무/업무 템플릿/표준 WBS 의미 검색 (kinds: minutes,task,template,wbs 중 쉼표 구분)"""
+    if not semantic_index.is_available():
+        raise HTTPException(status_code=503, detail="Semantic search is disabled")
+    kind_list = [k.strip() for k in kinds.split(",") if k.strip()] if kinds else None
+    if kind_list and any(k not in semantic_index.KINDS for k in kind_list):
+        raise HTTPException(status_code=400, detail=f"kinds must be one of {', '.join(semantic_index.KINDS)}")
+    return {"query": q, "results": semantic_index.search(q, kind_list, limit=min(max(limit, 1), 50))}
+
+
+@app.post("/admin/semantic-index/rebuild")
+def rebuild_semantic_index(current_user: models.User = Depends(require_admin)):
+    """의미 검색 색인 전체 재생성 (관리자, 임베딩 방식을 바꾼 뒤 등)"""
+    if not semantic_index.is_available():
+        raise HTTPException(status_code=503, detail="Semantic search is disabled")
+    return {"status": "success", "result": semantic_index.rebuild(), "index": semantic_index.get_index().status()}
+
+
+@app.post("/admin/archive/run")
+def run_archive_now(current_user: models.User = Depends(require_admin)):
+    """아카이브 즉시 실행 (관리자)"""
+    return {"status": "success", "moved": archive.run_archive()}
+
+
+@app.post("/admin/attachments/gc")
+def run_attachment_gc_now(dry_run: bool = False, current_user: models.User = Depends(require_admin)):
+    """첨부파일 GC 즉시 실행 (관리자)"""
+    return {"status": "success", "result": attachment_gc.collect_garbage(dry_run=dry_run)}
+
+
 @app.post("/projects/delete_bulk", response_class=RedirectResponse)
 def delete_bulk_projects(
         request: Request,
@@ -1640,57 +1966,33 @@ async def create_meeting_minute(
                     f.write(f"\n[{datetime.now()}] Processing Tasks Data: {tasks_data}\n")
 
                 print(f"[DEBUG] Processing AI Tasks: {tasks_data}")
-                import json
-                from datetime import timedelta
                 tasks_list = json.loads(tasks_data)
 
                 with open(log_path, "a") as f:
                     f.write(f"Parsed JSON: {tasks_list}\n")
 
+                rows = []
                 for t in tasks_list:
-                    # Find assignee
-                    assignee_id = None
-                    assignee_dept = None
-                    if t.get("assignee_name"):
-                        # Simple fuzzy match or exact match
-                        u = db.query(models.User).filter(models.User.username == t["assignee_name"]).first()
-                        if u:
-                            assignee_id = u.id
-                            assignee_dept = u.department
-                            with open(log_path, "a") as f:
-                                f.write(f"Found Assignee: {u.username} (ID: {u.id})\n")
-                        else:
-                            with open(log_path, "a") as f:
-                                f.write(f"Assignee not found: {t.get('assignee_name')}\n")
-
-                    # Use assignee's department if available, else creator's
-                    dept = assignee_dept if assignee_dept else current_user.department
-
                     # Default due date logic
-                    d_date = None
                     if t.get("due_date"):
                         d_date = utils.parse_date(t.get("due_date"), "%Y-%m-%d")
                     else:
                         d_date = m_date + timedelta(days=7)
 
-                    new_task = models.Task(
-                        title=t.get("title", "New Task"),
-                        description=f"[From Meeting: {topic}] Auto-generated task.",
-                        status="Todo",
-                        due_date=d_date,
-                        creator_id=current_user.id,
-                        project_id=None,  # No project link for now
-                        department=dept
-                    )
-                    db.add(new_task)
-                    db.flush()  # to get ID
+                    rows.append({
+                        "title": t.get("title", "New Task"),
+                        "description": f"[From Meeting: {topic}] Auto-generated task.",
+                        "status": "Todo",
+                        "due_date": d_date,
+                        "project_id": None,  # No project link for now
+                        # 부서는 담당자 부서 우선, 없으면 작성자 부서 (task_service 규칙)
+                        "assignee_names": [t["assignee_name"]] if t.get("assignee_name") else [],
+                    })
 
-                    with open(log_path, "a") as f:
-                        f.write(f"Created Task ID: {new_task.id}, Title: {new_task.title}\n")
+                created_ids = task_service.bulk_create_tasks(db, rows, current_user, commit=False)
 
-                    if assignee_id:
-                        u = db.query(models.User).get(assignee_id)
-                        new_task.assignees.append(u)
+                with open(log_path, "a") as f:
+                    f.write(f"Created Task IDs: {created_ids}\n")
 
                 db.commit()
                 print("[DEBUG] AI Tasks Created Successfully")
@@ -1698,6 +2000,7 @@ async def create_meeting_minute(
                     f.write(f"[{datetime.now()}] All tasks committed successfully.\n")
 
             except Exception as e:
+                db.rollback()
                 print(f"[ERROR] Failed to create AI tasks: {e}")
                 error_trace = traceback.format_exc()
                 print(error_trace)
@@ -1710,31 +2013,25 @@ async def create_meeting_minute(
 
         # 파일 업로드 처리
         if files:
-            upload_dir = "uploads/meeting_minutes"
-            if not os.path.exists(upload_dir):
-                os.makedirs(upload_dir)
-
+            stored_files = []
             for file in files:
                 if file.filename:
-                    file_content = await file.read()
-                    is_valid, error_msg = utils.validate_file_upload(file.filename, len(file_content))
-                    if not is_valid:
+                    try:
+                        stored = await file_storage.save_upload(file)
+                    except file_storage.UploadRejected:
                         continue  # 잘못된 파일은 건너뛰기
 
-                    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                    filename = f"{timestamp}_{file.filename}"
-                    filepath = os.path.join(upload_dir, filename)
-
-                    with open(filepath, "wb") as buffer:
-                        buffer.write(file_content)
-
                     new_file = models.MeetingMinuteFile(
-                        filename=file.filename,
-                        filepath=f"/uploads/meeting_minutes/{filename}",
+                        filename=stored.filename,
+                        filepath=stored.url,
+                        blob_sha256=stored.sha256,
                         meeting_minute_id=new_minute.id
                     )
+                    blob_store.acquire(db, stored)
                     db.add(new_file)
+                    stored_files.append(stored)
             db.commit()
+            _enqueue_postprocessing(stored_files)
 
         return RedirectResponse(url="/meeting_minutes", status_code=303)
 
@@ -1808,7 +2105,8 @@ async def read_calendar(request: Request, db: Session = Depends(get_db), current
 
 
 @app.get("/api/events")
-def get_events(scope: str = "all", db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
+def get_events(scope: str = "all", include_archived: bool = False, db: Session = Depends(get_db),
+               current_user: models.User = Depends(get_current_user)):
     """일정 조회 API"""
     if not current_user:
         raise HTTPException(status_code=401, detail="Unauthorized")
@@ -1853,6 +2151,28 @@ def get_events(scope: str = "all", db: Session = Depends(get_db), current_user:
                 "creator_name": creator_name
             }
         })
+
+    # 보관된 지난 일정 (회색, 읽기 전용)
+    if include_archived:
+        for row in db.execute(archive.archived_events_query(scope, current_user)):
+            display_title = f"[{row.assignee_name}] {row.title}" if row.assignee_name else row.title
+            formatted_events.append({
+                "id": row.id,
+                "title": display_title,
+                "start": row.start_time.isoformat() if row.start_time else None,
+                "end": row.end_time.isoformat() if row.end_time else None,
+                "allDay": row.is_all_day,
+                "description": row.description,
+                "backgroundColor": "#9ca3af",
+                "borderColor": "#9ca3af",
+                "editable": False,
+                "extendedProps": {
+                    "description": row.description,
+                    "assignee_id": row.assignee_id,
+                    "creator_name": row.creator_name or "Unknown",
+                    "archived": True
+                }
+            })
     return formatted_events
 
 
@@ -1966,239 +2286,16 @@ def delete_event(event_id: int, db: Session = Depends(get_db), current_user: mod
 # --- AI Helper & Routes ---
 
 
-class AIHelper:
-    def __init__(self):
-        if not config.GEMINI_API_KEY:
-            raise Exception("No AI API Key configured")
-        genai.configure(api_key=config.GEMINI_API_KEY)
-        # Use gemini-flash-latest (as 1.5-flash specific alias was not found)
-        self.model = genai.GenerativeModel(
-            'gemini-flash-latest',
-            generation_config={"response_mime_type": "application/json"}
-        )
-
-    def generate_task_json(self, text, user_context, project_context):
-        prompt = f"""
-        You are a project management assistant. Extract task details.
-
-        Current Date: {date.today()}
-        Users: {user_context}
-        Projects: {project_context}
-        User Input: "{text}"
-
-        Output Schema (JSON):
-        {{
-            "title": "string",
-            "description": "string",
-            "due_date": "YYYY-MM-DD" or null,
-            "assignee_ids": [int],
-            "project_id": int or 0,
-            "department": "string" or null
-        }}
-        """
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
-
-    def generate_event_action_json(self, text, user_context, event_context):
-        prompt = f"""
-        You are a calendar assistant. Determine if the user wants to CREATE, UPDATE, or DELETE an event.
-
-        Current Date: {date.today()}
-        Users: {user_context}
-        Upcoming Events: {event_context}
-        User Input: "{text}"
-
-        Output Schema (JSON):
-        {{
-            "action": "CREATE" | "UPDATE" | "DELETE",
-            "event_ids": [int] (Required for UPDATE/DELETE. If multiple match, list all.),
-            "payload": {{
-                "title": "string",
-                "description": "string",
-                "start_time": "YYYY-MM-DDTHH:MM:SS",
-                "end_time": "YYYY-MM-DDTHH:MM:SS" or null
-            }}
-        }}
-        """
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
-
-    def analyze_meeting_minutes(self, text, user_context):
-        prompt = f"""
-        You are a professional meeting secretary. Analyze the following meeting notes.
-
-        IMPORTANT: All output (summary, decisions, risks, tasks) MUST be in KOREAN (한국어).
-
-        Current Date: {date.today()}
-        Participants Context: {user_context}
-        Raw Notes:
-        "{text}"
-
-        Tasks:
-        1. Summarize the meeting (5 bullet points max) in Korean.
-        2. Extract key decisions (Decisions) in Korean.
-        3. Identify risks or dependencies (Risks) in Korean.
-        4. Extract actionable tasks (Action Items) in Korean. Try to match assignees from the context.
-
-        Output Schema (JSON):
-        {{
-            "summary": "string (markdown bullet points)",
-            "decisions": ["string"],
-            "risks": ["string"],
-            "action_items": [
-                {{
-                    "title": "string",
-                    "assignee_name": "string (or null)",
-                    "due_date": "YYYY-MM-DD" (or null),
-                    "priority": "High" | "Normal" | "Low"
-                }}
-            ]
-        }}
-        """
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
-
-    def generate_wbs_json(self, goal, deadline, p_type, scope, stakeholders):
-        prompt = f"""
-        You are a project management expert. Create a WBS (Work Breakdown Structure) for a new project.
-
-        Project Details:
-        - Goal/Deliverables: {goal}
-        - Deadline: {deadline}
-        - Type: {p_type}
-        - Scope: {scope}
-        - Stakeholders: {stakeholders}
-        - Current Date: {date.today()}
-
-        Task:
-        - Break down the project into standard phases: Planning, Preparation, Execution, Verification/Launch, Operation/Review.
-        - Create specific tasks for each phase.
-        - For each task, include a short checklist of sub-items.
-
-        Output Schema (JSON):
-        {{
-            "phases": [
-                {{
-                    "phase_name": "string (e.g., Planning, Execution)",
-                    "tasks": [
-                        {{
-                            "title": "string (Action-oriented task name)",
-                            "checklist": ["string", "string"],
-                            "estimated_days": int,
-                            "is_milestone": boolean,
-                            "is_core": boolean (true if essential, false if optional)
-                        }}
-                    ]
-                }}
-            ]
-        }}
-        """
-        # Retry logic for 429 errors
-        max_retries = 3
-        base_delay = 2
-
-        for attempt in range(max_retries):
-            try:
-                response = self.model.generate_content(prompt)
-                text = response.text
-                if text.startswith("```json"):
-                    text = text[7:]
-                if text.startswith("```"):
-                    text = text[3:]
-                if text.endswith("```"):
-                    text = text[:-3]
-                text = text.strip()
-                return json.loads(text)
-            except Exception as e:
-                import time
-                is_rate_limit = "429" in str(e) or "Resource has been exhausted" in str(e)
-                if is_rate_limit and attempt < max_retries - 1:
-                    time.sleep(base_delay * (2 ** attempt))  # Exponential backoff
-                    continue
-                else:
-                    raise e
-
-    def generate_work_report(self, task_list, report_type, start_date, end_date):
-        prompt = f"""
-        You are an HR and Project Management expert. Analyze the user's work logs and generate a performance report.
-
-        Report Type: {report_type}
-        Period: {start_date} ~ {end_date}
-
-        User's Task Log:
-        {task_list}
-
-        Instructions:
-        1. Analyze the tasks to understand the Context and Volume.
-        2. Evaluate performance based on 4 categories:
-           - Productivity (Task completion volume & speed)
-           - Quality (Complexity & impact of tasks)
-           - Consistency (Regular updates & management)
-           - Communication (clarity of titles/descriptions)
-        3. Assign a score (0-100) for each category.
-        4. Calculate the Average Score.
-        5. Organize the tasks into a structured list for display. Infer a 'Category' for each task (e.g., Development, Meeting, Planning).
-
-        IMPORTANT: Output content MUST be in KOREAN (한국어), BUT JSON Keys MUST remain in English.
-
-        Output Schema (JSON):
-        {{
-            "summary": "string (Overall summary of the period, markdown allowed)",
-            "scores": {{
-                "productivity": int,
-                "quality": int,
-                "consistency": int,
-                "communication": int
-            }},
-            "average_score": int,
-            "tasks_processed": [
-                {{
-                    "date": "YYYY-MM-DD" (or "Unknown"),
-                    "category": "string (Inferred Category)",
-                    "title": "string",
-                    "status": "string (Done/In Progress/Todo)",
-                    "feedback": "string (Brief specific comment on this task)"
-                }}
-            ],
-            "strengths": ["string (Key strength 1)", "string (Key strength 2)"],
-            "improvements": ["string (Area for improvement 1)", "string (Area for improvement 2)"],
-            "overall_comment": "string (Short overall summary/comment)"
-        }}
-        """
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
-
-    def generate_template_json(self, topic):
-        prompt = f"""
-        You are a process improvement expert. Create a new Work Template for the following topic:
-        Topic: "{topic}"
-
-        The template should follow the standard structure with Phases and Tasks.
-        Language: KOREAN (한국어) - Titles and descriptions must be in Korean.
-
-        Output Schema (JSON):
-        {{
-            "name": "string (Template Name)",
-            "category": "string (Category Name e.g. 'Marketing', 'Development', 'HR')",
-            "description": "string (Brief description of this process)",
-            "phases": [
-                {{
-                    "phase_name": "string (e.g., 기획, 실행, 검토)",
-                    "tasks": [
-                        {{
-                            "title": "string",
-                            "description": "string",
-                            "estimated_days": int,
-                            "is_core": boolean,
-                            "checklist": ["string", "string"]
-                        }}
-                    ]
-                }}
-            ]
-        }}
-        """
-        response = self.model.generate_content(prompt)
-        return json.loads(response.text)
+async def _submit_ai_job(kind: str, user: models.User, data: dict, params: dict):
+    """AI 작업을 백그라운드 큐에 등록하고 작업 ID 반환 (202). 결과는 /api/jobs/{id}로 조회"""
+    job_id, created = await run_in_threadpool(jobs.submit, kind, user.id, params, bool(data.get("fresh")))
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "job_id": job_id,
+        "deduplicated": not created,
+        "status_url": f"/api/jobs/{job_id}",
+        "events_url": f"/api/jobs/{job_id}/events",
+    })
 
 
 @app.post("/api/projects/ai-wbs")
@@ -2219,14 +2316,52 @@ async def generate_project_wbs(
         if not goal:
             raise HTTPException(status_code=400, detail="Project goal is required")
 
-        ai = AIHelper()
-        result = ai.generate_wbs_json(goal, deadline, p_type, scope, stakeholders)
+        if data.get("async"):
+            return await _submit_ai_job("wbs", current_user, data, {
+                "goal": goal, "deadline": deadline, "type": p_type, "scope": scope, "stakeholders": stakeholders,
+            })
+
+        ai = ai_client.get_ai()
+        result = await ai_client.run(request, current_user, ai.generate_wbs_json(goal, deadline, p_type, scope, stakeholders), fresh=bool(data.get("fresh")))
         return result
     except Exception as e:
         print(f"AI WBS Error: {e}")
         return JSONResponse(status_code=500, content={"detail": str(e)})
 
 
+# 스트리밍 응답에서 완성되는 즉시 보낼 항목 (JSON 경로 패턴 -> SSE 이벤트 이름)
+WBS_STREAM_EVENTS = {
+    ("phases", "*", "phase_name"): "phase",
+    ("phases", "*", "tasks", "*"): "task",
+}
+MINUTES_STREAM_EVENTS = {
+    ("summary",): "summary",
+    ("decisions", "*"): "decision",
+    ("risks", "*"): "risk",
+    ("action_items", "*"): "action_item",
+}
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}  # 프록시 버퍼링 방지
+
+
+@app.post("/api/projects/ai-wbs/stream")
+async def stream_project_wbs(
+    request: Request,
+    current_user: models.User = Depends(require_auth)
+):
+    """AI WBS 생성 (SSE). 단계 이름(phase)과 업무(task)를 완성되는 대로 보내고 마지막에 done"""
+    data = await request.json()
+    goal = data.get("goal")
+    if not goal:
+        raise HTTPException(status_code=400, detail="Project goal is required")
+
+    ai = ai_client.get_ai()
+    chunks = ai.stream_wbs_json(goal, data.get("deadline"), data.get("type"), data.get("scope"), data.get("stakeholders"))
+    return StreamingResponse(
+        ai_client.stream(request, current_user, chunks, WBS_STREAM_EVENTS, fresh=bool(data.get("fresh"))),
+        media_type="text/event-stream", headers=SSE_HEADERS,
+    )
+
+
 @app.post("/api/work-templates/generate")
 async def generate_work_template_api(
     request: Request,
@@ -2242,8 +2377,8 @@ async def generate_work_template_api(
         if not topic:
             raise HTTPException(status_code=400, detail="Topic is required")
 
-        ai = AIHelper()
-        result = ai.generate_template_json(topic)
+        ai = ai_client.get_ai()
+        result = await ai_client.run(request, current_user, ai.generate_template_json(topic), fresh=bool(data.get("fresh")))
         return result
     except Exception as e:
         print(f"Template Gen Error: {e}")
@@ -2366,17 +2501,43 @@ async def analyze_minutes(
         if not text:
             raise HTTPException(status_code=400, detail="No text provided")
 
+        if data.get("async"):
+            return await _submit_ai_job("minutes", current_user, data, {"text": text})
+
         users = db.query(models.User).all()
         user_ctx = ", ".join([f"{u.username}" for u in users])
 
-        ai = AIHelper()
-        result = ai.analyze_meeting_minutes(text, user_ctx)
+        ai = ai_client.get_ai()
+        result = await ai_client.run(request, current_user, ai.analyze_meeting_minutes(text, user_ctx), fresh=bool(data.get("fresh")))
         return result
     except Exception as e:
         print(f"AI Analysis Error: {e}")
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
 
+@app.post("/api/minutes/ai-analyze/stream")
+async def stream_minutes_analysis(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(require_auth)
+):
+    """AI 회의록 분석 (SSE). 요약/결정사항/리스크/액션아이템을 완성되는 대로 보내고 마지막에 done"""
+    data = await request.json()
+    text = data.get("text")
+    if not text:
+        raise HTTPException(status_code=400, detail="No text provided")
+
+    users = db.query(models.User).all()
+    user_ctx = ", ".join([f"{u.username}" for u in users])
+
+    ai = ai_client.get_ai()
+    return StreamingResponse(
+        ai_client.stream(request, current_user, ai.stream_meeting_minutes(text, user_ctx),
+                         MINUTES_STREAM_EVENTS, fresh=bool(data.get("fresh"))),
+        media_type="text/event-stream", headers=SSE_HEADERS,
+    )
+
+
 @app.post("/api/tasks/ai")
 async def create_task_from_ai(
     request: Request,
@@ -2390,43 +2551,28 @@ async def create_task_from_ai(
         if not user_text:
             raise HTTPException(status_code=400, detail="No text provided")
 
-        # Context fetching
-        users = db.query(models.User).all()
-        projects = db.query(models.Project).all()
-        user_ctx = ", ".join([f"{u.username}(ID:{u.id})" for u in users])
-        project_ctx = ", ".join([f"{p.name}(ID:{p.id})" for p in projects])
+        # 입력에서 언급된 사용자/프로젝트와 같은 부서 항목만 컨텍스트로 사용
+        user_ctx, project_ctx = ai_context.task_context(db, current_user, user_text)
 
         # Generate JSON
-        ai = AIHelper()
-        task_data = ai.generate_task_json(user_text, user_ctx, project_ctx)
+        ai = ai_client.get_ai()
+        task_data = await ai_client.run(request, current_user, ai.generate_task_json(user_text, user_ctx, project_ctx), fresh=bool(data.get("fresh")))
 
         # Logic to create task (reuse previous logic)
         dept = task_data.get('department') or current_user.department
 
-        new_task = models.Task(
-            title=task_data.get('title', 'New Task'),
-            description=task_data.get('description'),
-            status="Todo",
-            start_date=date.today(),
-            due_date=utils.parse_date(task_data.get('due_date'), "%Y-%m-%d") if task_data.get('due_date') else None,
-            project_id=task_data.get('project_id', 0),
-            department=dept,
-            creator_id=current_user.id
-        )
-        db.add(new_task)
-        db.commit()
-        db.refresh(new_task)
-
-        # Assignees
-        a_ids = task_data.get('assignee_ids', [])
-        if a_ids:
-            for uid in a_ids:
-                u = db.query(models.User).get(uid)
-                if u:
-                    new_task.assignees.append(u)
-            db.commit()
-
-        return {"status": "success", "task_id": new_task.id}
+        task_ids = task_service.bulk_create_tasks(db, [{
+            "title": task_data.get('title', 'New Task'),
+            "description": task_data.get('description'),
+            "status": "Todo",
+            "start_date": date.today(),
+            "due_date": utils.parse_date(task_data.get('due_date'), "%Y-%m-%d") if task_data.get('due_date') else None,
+            "project_id": task_data.get('project_id', 0),
+            "department": dept,
+            "assignee_ids": task_data.get('assignee_ids', []),
+        }], current_user)
+
+        return {"status": "success", "task_id": task_ids[0]}
     except Exception as e:
         print(f"AI Task Error: {e}")
         # traceback.print_exc()
@@ -2440,15 +2586,16 @@ def work_reports_page(request: Request, db: Session = Depends(get_db), current_u
     if not current_user:
         print(f"[{datetime.now()}] Work Reports Page: Not authenticated, redirecting to login")
         return RedirectResponse(url="/login", status_code=302)
-    # Simply render the template. History will be fetched via API or injected here.
-    # Check for existing reports to list in sidebar or history tab
-    history = db.query(models.WorkReport).filter(models.WorkReport.user_id == current_user.id).order_by(models.WorkReport.created_at.desc()).all()
+    # 히스토리는 첫 페이지 목록만 (본문은 선택 시 /api/work-reports/{id}, 나머지 페이지는 /api/work-reports)
+    page = work_reports.history(db, current_user.id)
 
     response = templates.TemplateResponse("work_reports.html", {
         "request": request,
         "user": current_user,
         "current_user": current_user,  # 호환성을 위해 둘 다 전달
-        "history": history,
+        "history": page["items"],
+        "history_next": page["next_before"],
+        "history_total": work_reports.history_count(db, current_user.id),
         "today": date.today()
     })
     response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
@@ -2473,97 +2620,22 @@ async def generate_work_report_endpoint(
         else:
             target_date = datetime.strptime(target_date_str, "%Y-%m-%d").date()
 
-        # Calculate Date Range
-        if report_type == "DAILY":
-            start_date = target_date
-            end_date = target_date
-        elif report_type == "WEEKLY":
-            start_date = target_date - timedelta(days=target_date.weekday())  # Monday
-            end_date = start_date + timedelta(days=6)  # Sunday
-        elif report_type == "MONTHLY":
-            start_date = target_date.replace(day=1)
-            next_month = start_date.replace(day=28) + timedelta(days=4)
-            end_date = next_month - timedelta(days=next_month.day)
-        else:
+        if report_type not in work_reports.REPORT_TYPES:
             raise HTTPException(status_code=400, detail="Invalid report type")
+        start_date, end_date = work_reports.report_range(report_type, target_date)
 
-        # Fetch Tasks
-        # Tasks started or due or updated within this range?
-        # Let's say: Created OR Updated OR Due within this range.
-        # Simplification: Tasks that overlap with this range or are 'Done' in this range.
-
-        # We'll fetch tasks where (start_date <= range_end) AND (due_date >= range_start)
-        # But allow None dates to match generously if updated_at is in range (if we had updated_at on Task)
-        # Using creating/due/status for now.
-
-        tasks_query = db.query(models.Task).filter(
-            or_(
-                models.Task.assignees.any(id=current_user.id),
-                models.Task.creator_id == current_user.id
-            )
-        )
-
-        all_tasks = tasks_query.all()
-
-        # Filter in python for complex logic (simplify db query)
-        relevant_tasks = []
-        for t in all_tasks:
-            # Check overlap
-            t_start = t.start_date or date.min
-            t_end = t.due_date or date.max
-
-            # Since task dates might be null, let's also check status.
-            # If Done, include if likely done recently? (Hard without completed_at)
-            # Reverting: Just include ALL active tasks + Done tasks if they 'seem' relevant.
-            # BETTER APPROACH: Just fetch everything for the prompt to filter? No, context limit.
+        if data.get("async"):
+            return await _submit_ai_job("work_report", current_user, data,
+                                        {"type": report_type, "date": target_date.isoformat()})
 
-            # Strict logic:
-            # - If DAILY: Active tasks on that day.
-            # - If WEEKLY: Active tasks in that week.
-
-            is_relevant = False
-            # 1. Date overlap
-            if not (t_start > end_date or t_end < start_date):
-                is_relevant = True
-
-            # 2. If no dates, include if status is NOT Done (backlog)
-            if not t.start_date and not t.due_date and t.status != "Done":
-                is_relevant = True
-
-            if is_relevant:
-                relevant_tasks.append(f"- [{t.status}] {t.title} (Due: {t.due_date}): {t.description or ''}")
-
-        if not relevant_tasks:
-            # If empty, maybe add a note
-            relevant_tasks.append("No specific tasks found for this period.")
-
-        task_log_str = "\n".join(relevant_tasks)
+        task_log_str = work_reports.report_log(db, current_user.id, report_type, start_date, end_date)
 
         # Call AI
-        ai = AIHelper()
-        ai_result = ai.generate_work_report(task_log_str, report_type, start_date, end_date)
-
-        # Save Report
-        new_report = models.WorkReport(
-            user_id=current_user.id,
-            report_type=report_type,
-            start_date=start_date,
-            end_date=end_date,
-            summary=ai_result.get("summary"),
-            evaluation=json.dumps(ai_result, ensure_ascii=False),  # Save full JSON for frontend parsing
-            score=ai_result.get("average_score"),  # AI returns 'average_score'
-            created_at=datetime.now()
-        )
-        db.add(new_report)
-        db.commit()
-        db.refresh(new_report)
+        ai = ai_client.get_ai()
+        ai_result = await ai_client.run(request, current_user, ai.generate_work_report(task_log_str, report_type, start_date, end_date), fresh=bool(data.get("fresh")))
 
-        return {
-            "status": "success",
-            "report_id": new_report.id,
-            "data": ai_result,
-            "date_range": f"{start_date} ~ {end_date}"
-        }
+        report = work_reports.save_report(db, current_user.id, report_type, start_date, end_date, ai_result)
+        return work_reports.response(report, ai_result)
 
     except Exception as e:
         print(f"Report Generation Error: {e}")
@@ -2571,12 +2643,69 @@ async def generate_work_report_endpoint(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/admin/work-reports/batch")
+async def generate_work_reports_batch(request: Request, current_user: models.User = Depends(require_admin)):
+    """전 직원 업무 리포트 일괄 생성 (관리자, 백그라운드 작업). 진행률은 /api/jobs/{id}로 확인
+
+    body: type, date, user_ids(생략 시 전체), include_idle(업무 없는 직원 포함), overwrite(기존 리포트가 있어도 생성)
+    """
+    data = await request.json()
+    report_type = data.get("type", "MONTHLY")
+    if report_type not in work_reports.REPORT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    try:
+        target_date = datetime.strptime(data["date"], "%Y-%m-%d").date() if data.get("date") else date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    params = {"type": report_type, "date": target_date.isoformat()}
+    if data.get("user_ids"):
+        user_ids = data["user_ids"]
+        if not isinstance(user_ids, list) or not all(
+                isinstance(uid, int) and not isinstance(uid, bool) or isinstance(uid, str) and uid.isdigit()
+                for uid in user_ids):
+            raise HTTPException(status_code=400, detail="user_ids must be a list of user IDs")
+        params["user_ids"] = sorted({int(uid) for uid in user_ids})
+    for flag in ("include_idle", "overwrite"):
+        if data.get(flag):
+            params[flag] = True
+    return await _submit_ai_job("work_report_batch", current_user, data, params)
+
+
+@app.get("/api/admin/work-reports/analytics")
+def work_report_analytics(type: Optional[str] = None, period: str = "month", start: Optional[str] = None,
+                          end: Optional[str] = None, department: Optional[str] = None, window: int = 3,
+                          db: Session = Depends(get_db), current_user: models.User = Depends(require_admin)):
+    """부서/기간별 리포트 점수 추이, 이동 평균(window 기간), 백분위, 부서 비교 (관리자)
+
+    type: DAILY/WEEKLY/MONTHLY (생략 시 전체), period: week/month, start/end: 리포트 시작일 범위(YYYY-MM-DD)
+    """
+    if not report_analytics.is_available():
+        raise HTTPException(status_code=503, detail="Report analytics requires numpy")
+    if type and type not in work_reports.REPORT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid report type")
+    if period not in report_analytics.PERIODS:
+        raise HTTPException(status_code=400, detail="period must be week or month")
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+        end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    return report_analytics.analyze(db, type, period, start_date, end_date, department, min(max(window, 1), 24))
+
+
+@app.get("/api/work-reports")
+def list_work_reports(before: Optional[int] = None, limit: Optional[int] = None, db: Session = Depends(get_db),
+                      current_user: models.User = Depends(require_auth)):
+    """리포트 히스토리 페이지 (본문 제외). 다음 페이지는 before=next_before"""
+    return work_reports.history(db, current_user.id, before, limit)
+
+
 @app.get("/api/work-reports/{report_id}")
 def get_report_detail(report_id: int, db: Session = Depends(get_db), current_user: models.User = Depends(require_auth)):
-    report = db.query(models.WorkReport).filter(models.WorkReport.id == report_id, models.WorkReport.user_id == current_user.id).first()
-    if not report:
+    body = work_reports.detail_json(db, current_user.id, report_id)
+    if body is None:
         raise HTTPException(status_code=404, detail="Report not found")
-    return report
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/api/events/ai")
@@ -2592,22 +2721,11 @@ async def process_event_from_ai(
         if not user_text:
             raise HTTPException(status_code=400, detail="No text provided")
 
-        # Context: Fetch upcoming events (e.g., next 30 days) to allow update/delete
-        # Also need users to map 'meeting with X'
-        users = db.query(models.User).all()
-        user_ctx = ", ".join([f"{u.username}(ID:{u.id})" for u in users])
-
-        upcoming_events = db.query(models.Event).filter(
-            models.Event.start_time >= (datetime.now() - timedelta(days=1))  # Include recently passed events too for context
-        ).limit(30).all()
-
-        event_ctx_list = []
-        for e in upcoming_events:
-            event_ctx_list.append(f"ID:{e.id}|Title:{e.title}|Time:{e.start_time}")
-        event_ctx = "\n".join(event_ctx_list)
+        # Context: 입력의 날짜 표현으로 정한 기간 안에서 관련도 높은 일정과 언급된 사용자만 사용
+        user_ctx, event_ctx = ai_context.event_context(db, current_user, user_text)
 
-        ai = AIHelper()
-        result = ai.generate_event_action_json(user_text, user_ctx, event_ctx)
+        ai = ai_client.get_ai()
+        result = await ai_client.run(request, current_user, ai.generate_event_action_json(user_text, user_ctx, event_ctx), fresh=bool(data.get("fresh")))
 
         action = result.get('action')
         payload = result.get('payload', {})
@@ -2680,24 +2798,59 @@ async def process_event_from_ai(
         raise HTTPException(status_code=500, detail=f"AI Error: {str(e)}")
 
 
+@app.get("/api/jobs/{job_id}")
+def get_ai_job(job_id: int, current_user: models.User = Depends(require_auth)):
+    """AI 백그라운드 작업 상태/결과 조회"""
+    job = jobs.get_job(job_id)
+    if not job or (job["user_id"] != current_user.id and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/jobs/{job_id}/events")
+def stream_ai_job(job_id: int, request: Request, current_user: models.User = Depends(require_auth)):
+    """AI 백그라운드 작업 상태 SSE 스트림 (끝나면 done 이벤트로 결과 전달)"""
+    job = jobs.get_job(job_id)
+    if not job or (job["user_id"] != current_user.id and current_user.role != "admin"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(jobs.stream(request, job_id), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@app.get("/api/ai/cache")
+def get_ai_cache_metrics(current_user: models.User = Depends(require_admin)):
+    """AI 응답 캐시 적중/실패 통계 (관리자)"""
+    return ai_cache.cache.metrics()
+
+
+@app.delete("/api/ai/cache")
+def clear_ai_cache(current_user: models.User = Depends(require_admin)):
+    """AI 응답 캐시 비우기 (관리자)"""
+    return {"status": "success", "deleted": ai_cache.cache.clear()}
+
+
+@app.get("/api/ai/resilience")
+def get_ai_resilience_status(current_user: models.User = Depends(require_admin)):
+    """AI 호출 속도 제한/서킷 브레이커 상태와 재시도·헤지 통계 (관리자)"""
+    helper = ai_client.init()
+    if helper is None:
+        raise HTTPException(status_code=503, detail="AI backend is not configured")
+    return helper.resilience.status()
+
+
 @app.get("/api/ai/test")
 async def test_ai_connection():
     """Test AI connectivity and List Models"""
     try:
-        if not config.GEMINI_API_KEY:
+        if not ai_providers.is_available():
             return {"status": "error", "message": "API Key is missing in config"}
 
-        genai.configure(api_key=config.GEMINI_API_KEY)
-
-        available_models = []
-        for m in genai.list_models():
-            if 'generateContent' in m.supported_generation_methods:
-                available_models.append(m.name)
+        available_models = ai_client.get_ai().list_models()
 
         return {
             "status": "success",
+            "backend": config.AI_BACKEND,
             "available_models": available_models,
-            "key_masked": config.GEMINI_API_KEY[:5] + "..."
+            "key_masked": config.GEMINI_API_KEY[:5] + "..." if config.GEMINI_API_KEY else None
         }
     except Exception as e:
         return {"status": "error", "message": str(e), "type": str(type(e))}
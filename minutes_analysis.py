@@ -0,0 +1,169 @@
+"""긴 회의록의 분할 분석 (map-reduce)
+
+워크숍 녹취록처럼 긴 회의록을 한 프롬프트로 보내면 컨텍스트 한도에 걸리고 응답 시간이 크게 늘어난다.
+회의록을 안건/섹션과 발언자 경계에서 AI_MINUTES_CHUNK_CHARS 이하 조각으로 나눠 각각 분석한 뒤
+(ai_client가 AI 동시성 제한 안에서 동시에 실행) 결과를 합친다.
+
+- 조각 수는 AI_MINUTES_MAX_CHUNKS를 넘지 않는다 (넘으면 조각 크기를 키움) -> 분석 시간이 입력 길이와 무관하게 제한됨
+- 요약은 조각별 요약 항목을 번갈아 골라 회의 전체를 고르게 담고, 결정/리스크/할 일은 비슷한 항목을 합침
+"""
+import math
+import re
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+import config
+
+# 안건/섹션 시작: 마크다운 제목, 번호 목록, 기호 머리말, [안건 1], 구분선 등
+_SECTION = re.compile(
+    r"^\s*(#{1,6}\s|[■□▶▷●◆◇○]\s*|\d{1,2}[.)]\s|[IVX]{1,4}\.\s|\[[^\]]{1,30}\]\s*$|(안건|의제|agenda|topic)\b|[=\-]{3,}\s*$)",
+    re.I,
+)
+# 발언자 시작: "홍길동: ...", "홍길동 팀장: ...", "[홍길동] ...", "- 홍길동: ..."
+_SPEAKER = re.compile(r"^\s*[-*]?\s*(\[[^\]\n]{1,20}\]|[^\s:：\[\]]{1,10}(\s[^\s:：]{1,6})?\s*[:：])")
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+_PRIORITY_RANK = {"High": 3, "Normal": 2, "Low": 1}
+_CONTAIN_MIN_CHARS = 4
+_CONTAIN_RATIO = 0.6
+
+
+def _segments(text: str) -> List[tuple]:
+    """(섹션 시작 여부, 텍스트) 목록. 섹션/발언자 경계 줄에서 새 구간을 시작"""
+    segments: List[tuple] = []
+    current: List[str] = []
+    is_section = False
+    for line in text.splitlines():
+        section = bool(_SECTION.match(line))
+        if current and (section or _SPEAKER.match(line)):
+            segments.append((is_section, "\n".join(current)))
+            current = []
+        if not current:
+            is_section = section
+        current.append(line)
+    if current:
+        segments.append((is_section, "\n".join(current)))
+    return segments
+
+
+def _split_long(text: str, limit: int) -> List[str]:
+    """한 발언/섹션이 limit보다 길면 문단 -> 줄 -> 글자 수 순으로 잘라 나눔"""
+    if len(text) <= limit:
+        return [text]
+    for pattern in (_PARAGRAPH, re.compile(r"\n"), re.compile(r"(?<=[.!?。])\s+")):
+        pieces = [p for p in pattern.split(text) if p.strip()]
+        if len(pieces) > 1:
+            out: List[str] = []
+            for piece in pieces:
+                out.extend(_split_long(piece, limit))
+            return out
+    return [text[i:i + limit] for i in range(0, len(text), limit)]
+
+
+def split_minutes(text: str, max_chars: Optional[int] = None, max_chunks: Optional[int] = None) -> List[str]:
+    """회의록을 섹션/발언자 경계에서 max_chars 이하 조각으로 나눔 (짧으면 [text])"""
+    text = (text or "").strip()
+    max_chars = max_chars or config.AI_MINUTES_CHUNK_CHARS
+    max_chunks = max_chunks or config.AI_MINUTES_MAX_CHUNKS
+    if len(text) <= max_chars:
+        return [text]
+    # 조각 수 상한을 지키도록 조각 크기 조정 (경계에서 자르므로 약간 여유를 둠)
+    limit = max(max_chars, math.ceil(len(text) / max_chunks * 1.1))
+
+    chunks: List[str] = []
+    current = ""
+    for is_section, segment in _segments(text):
+        for piece in _split_long(segment, limit):
+            joined = f"{current}\n{piece}" if current else piece
+            # 새 안건은 현재 조각이 절반 이상 찼으면 새 조각에서 시작
+            if current and (len(joined) > limit or (is_section and len(current) >= limit / 2)):
+                chunks.append(current)
+                joined = piece
+            current = joined
+            is_section = False
+    if current.strip():
+        chunks.append(current)
+    # 안건 경계 우선으로 조각이 늘어났으면 가장 짧은 이웃끼리 합쳐 상한을 지킴
+    while len(chunks) > max_chunks:
+        i = min(range(len(chunks) - 1), key=lambda k: len(chunks[k]) + len(chunks[k + 1]))
+        chunks[i:i + 2] = [f"{chunks[i]}\n{chunks[i + 1]}"]
+    return chunks
+
+
+def _key(text) -> str:
+    return _NON_WORD.sub("", str(text or "").lower())
+
+
+def _similar(a: str, b: str) -> bool:
+    if not a or not b:
+        return a == b
+    short, long = sorted((a, b), key=len)
+    # 포함 관계는 짧은 쪽이 긴 쪽 대부분을 차지할 때만 중복 ("예산"이 긴 결정 사항을 삼키지 않게)
+    if len(short) >= _CONTAIN_MIN_CHARS and len(short) >= len(long) * _CONTAIN_RATIO and short in long:
+        return True
+    return SequenceMatcher(None, a, b).ratio() >= config.AI_MINUTES_DEDUP_THRESHOLD
+
+
+def _dedup(items: List[str]) -> List[str]:
+    out: List[str] = []
+    keys: List[str] = []
+    for item in items:
+        if not isinstance(item, str) or not item.strip():
+            continue
+        key = _key(item)
+        if any(_similar(key, other) for other in keys):
+            continue
+        keys.append(key)
+        out.append(item.strip())
+    return out
+
+
+def _summary_points(summary) -> List[str]:
+    if isinstance(summary, list):
+        lines = summary
+    else:
+        lines = str(summary or "").splitlines()
+    return [_BULLET.sub("", str(line)).strip() for line in lines if str(line).strip()]
+
+
+def _merge_summaries(summaries: List[List[str]]) -> str:
+    """조각별 요약 항목을 번갈아 골라(회의 앞부분에 치우치지 않게) 중복 없이 최대 AI_MINUTES_SUMMARY_POINTS개"""
+    ordered: List[str] = []
+    for i in range(max((len(points) for points in summaries), default=0)):
+        ordered.extend(points[i] for points in summaries if i < len(points))
+    points = _dedup(ordered)[:config.AI_MINUTES_SUMMARY_POINTS]
+    return "\n".join(f"- {point}" for point in points)
+
+
+def _merge_action_items(items: List[dict]) -> List[dict]:
+    """제목이 비슷하고 담당자가 같거나 한쪽이 비어 있으면 같은 할 일로 보고 빈 값/우선순위를 합침"""
+    merged: List[dict] = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get("title"):
+            continue
+        key = _key(item.get("title"))
+        for existing in merged:
+            same_owner = not item.get("assignee_name") or not existing.get("assignee_name") \
+                or _key(item["assignee_name"]) == _key(existing["assignee_name"])
+            if same_owner and _similar(key, _key(existing["title"])):
+                for field in ("assignee_name", "due_date"):
+                    existing[field] = existing.get(field) or item.get(field)
+                if _PRIORITY_RANK.get(item.get("priority"), 0) > _PRIORITY_RANK.get(existing.get("priority"), 0):
+                    existing["priority"] = item["priority"]
+                break
+        else:
+            merged.append(dict(item))
+    return merged
+
+
+def merge_results(results: List[dict]) -> dict:
+    """조각별 분석 결과(summary, decisions, risks, action_items)를 하나로 합침"""
+    if len(results) == 1:
+        return results[0]
+    return {
+        "summary": _merge_summaries([_summary_points(r.get("summary")) for r in results]),
+        "decisions": _dedup([d for r in results for d in (r.get("decisions") or [])]),
+        "risks": _dedup([d for r in results for d in (r.get("risks") or [])]),
+        "action_items": _merge_action_items([a for r in results for a in (r.get("action_items") or [])]),
+    }
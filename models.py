@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text, Boolean, DateTime, LargeBinary
 from sqlalchemy.orm import relationship
 from database import Base
 import datetime
@@ -47,7 +47,7 @@ class Project(Base):
     creator = relationship("User", foreign_keys=[creator_id])
     assignees = relationship("User", secondary=project_assignees, backref="projects_assigned")
     tasks = relationship("Task", back_populates="project")
-    files = relationship("ProjectFile", back_populates="project")
+    files = relationship("ProjectFile", back_populates="project", cascade="all, delete-orphan")
 
 
 class Task(Base):
@@ -81,9 +81,15 @@ class TaskFile(Base):
     filepath = Column(String)
     uploaded_at = Column(DateTime, default=datetime.datetime.utcnow)
     task_id = Column(Integer, ForeignKey("tasks.id"))
+    blob_sha256 = Column(String(64), nullable=True, index=True)  # blobs.sha256 (내용 주소 저장소)
 
     task = relationship("Task", back_populates="files")
 
+    @property
+    def download_url(self):
+        """인증된 다운로드 경로 (/files/task/<id>)"""
+        return f"/files/task/{self.id}"
+
 
 class ProjectFile(Base):
     __tablename__ = "project_files"
@@ -93,9 +99,47 @@ class ProjectFile(Base):
     filepath = Column(String)
     uploaded_at = Column(DateTime, default=datetime.datetime.utcnow)
     project_id = Column(Integer, ForeignKey("projects.id"))
+    blob_sha256 = Column(String(64), nullable=True, index=True)  # blobs.sha256 (내용 주소 저장소)
 
     project = relationship("Project", back_populates="files")
 
+    @property
+    def download_url(self):
+        """인증된 다운로드 경로 (/files/project/<id>)"""
+        return f"/files/project/{self.id}"
+
+
+# 내용(SHA-256) 주소 기반 첨부파일 저장소. 같은 파일은 한 번만 저장하고 참조 수로 관리
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(Integer)
+    path = Column(String)  # /uploads/blobs/ab/cd/<sha256><ext>
+    ref_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    last_unref_at = Column(DateTime, nullable=True)  # 마지막으로 참조가 줄어든 시각 (GC 유예 기준)
+
+
+# 첨부파일 본문 텍스트 (blob 단위, zlib 압축). 내용 주소이므로 blob당 한 번만 추출
+class BlobText(Base):
+    __tablename__ = "blob_texts"
+
+    sha256 = Column(String(64), primary_key=True)
+    status = Column(String(20))  # ok / empty / unsupported / error
+    char_count = Column(Integer, default=0)
+    content = Column(LargeBinary, nullable=True)
+    extracted_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+# 첨부파일 본문 역색인 (단어 -> blob, 빈도)
+class BlobTerm(Base):
+    __tablename__ = "blob_terms"
+
+    term = Column(String(64), primary_key=True)
+    sha256 = Column(String(64), primary_key=True, index=True)
+    tf = Column(Integer, default=1)
+
 
 class AnnualGoal(Base):
     __tablename__ = "annual_goals"
@@ -144,7 +188,7 @@ class MeetingMinutes(Base):
 
     writer_id = Column(Integer, ForeignKey("users.id"))
     writer = relationship("User")
-    files = relationship("MeetingMinuteFile", back_populates="meeting_minute")
+    files = relationship("MeetingMinuteFile", back_populates="meeting_minute", cascade="all, delete-orphan")
 
 
 class MeetingMinuteFile(Base):
@@ -155,9 +199,15 @@ class MeetingMinuteFile(Base):
     filepath = Column(String)
     uploaded_at = Column(DateTime, default=datetime.datetime.utcnow)
     meeting_minute_id = Column(Integer, ForeignKey("meeting_minutes.id"))
+    blob_sha256 = Column(String(64), nullable=True, index=True)  # blobs.sha256 (내용 주소 저장소)
 
     meeting_minute = relationship("MeetingMinutes", back_populates="files")
 
+    @property
+    def download_url(self):
+        """인증된 다운로드 경로 (/files/minute/<id>)"""
+        return f"/files/minute/{self.id}"
+
 
 class Event(Base):
     __tablename__ = "events"
@@ -243,3 +293,80 @@ class WorkReport(Base):
     created_at = Column(DateTime, default=datetime.datetime.now)
 
     user = relationship("User", backref="work_reports")
+
+
+# 오래 걸리는 AI 작업(WBS, 회의록 분석, 업무 리포트) 큐. 요청은 작업 ID만 받고 워커가 처리
+class AIJob(Base):
+    __tablename__ = "ai_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(50))  # wbs / minutes / work_report / work_report_batch
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    status = Column(String(20), default="queued", index=True)  # queued / running / succeeded / failed
+    # 같은 입력의 진행 중 작업 중복 방지 키. 끝나면 NULL로 비워 같은 입력을 다시 제출할 수 있게 함
+    dedup_key = Column(String(64), unique=True, nullable=True)
+    params = Column(Text)  # 입력 JSON
+    result = Column(Text, nullable=True)  # 결과 JSON
+    error = Column(Text, nullable=True)
+    progress = Column(Integer, default=0)  # 0~100
+    attempts = Column(Integer, default=0)
+    run_after = Column(DateTime, default=datetime.datetime.utcnow)  # 재시도 대기 (이 시각 이후 실행)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)  # 실행 중 주기적으로(진행률 기록 시에도) 갱신하는 임대 연장 시각
+    finished_at = Column(DateTime, nullable=True)
+
+
+# 의미 검색 색인 문서 (semantic_index). 벡터는 slot 번째 행으로 memmap 파일에 저장
+class SemanticDocument(Base):
+    __tablename__ = "semantic_documents"
+
+    id = Column(Integer, primary_key=True, index=True)
+    doc_key = Column(String(100), unique=True)  # "<kind>:<ref_id>" (예: task:12, wbs:baby_kc)
+    kind = Column(String(20), index=True)  # minutes / task / template / wbs
+    ref_id = Column(String(64))
+    slot = Column(Integer, unique=True)
+    title = Column(String, nullable=True)
+    snippet = Column(String, nullable=True)
+    content_sha = Column(String(40))  # 색인한 본문 해시 (같으면 다시 임베딩하지 않음)
+    embedder = Column(String(50))  # 임베딩 방식/차원 (바뀌면 전체 재색인)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ProjectRollup(Base):
+    __tablename__ = "project_rollups"
+
+    project_id = Column(Integer, primary_key=True)  # projects.id (파생 캐시라 FK 없음: 프로젝트 삭제/아카이브를 막지 않게)
+    total_count = Column(Integer, default=0)
+    todo_count = Column(Integer, default=0)
+    inprogress_count = Column(Integer, default=0)
+    done_count = Column(Integer, default=0)
+    overdue_count = Column(Integer, default=0)  # due_date < refreshed_on and status != Done
+    next_due_date = Column(Date, nullable=True)
+    last_activity_at = Column(DateTime, nullable=True)
+    refreshed_on = Column(Date, nullable=True)  # overdue 계산 기준일 (날짜가 바뀌면 재계산)
+
+    @property
+    def progress_percent(self) -> int:
+        if not self.total_count:
+            return 0
+        return int(round(self.done_count * 100 / self.total_count))
+
+
+# --- Archive tables ---
+# 완료 프로젝트/오래된 업무·일정을 옮겨 두는 보관 테이블 (원본과 같은 컬럼 + archived_at).
+# 원본 ID를 그대로 보존해 복원 시 재삽입할 수 있도록 FK 제약은 두지 않는다.
+def _archive_table(source: Table) -> Table:
+    columns = [Column(c.name, c.type, primary_key=c.primary_key, index=c.index) for c in source.columns]
+    columns.append(Column("archived_at", DateTime, default=datetime.datetime.utcnow, index=True))
+    return Table(f"archived_{source.name}", Base.metadata, *columns)
+
+
+archived_projects = _archive_table(Project.__table__)
+archived_project_assignees = _archive_table(project_assignees)
+archived_project_files = _archive_table(ProjectFile.__table__)
+archived_tasks = _archive_table(Task.__table__)
+archived_task_assignees = _archive_table(task_assignees)
+archived_task_files = _archive_table(TaskFile.__table__)
+archived_task_progress = _archive_table(TaskProgress.__table__)
+archived_events = _archive_table(Event.__table__)
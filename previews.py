@@ -0,0 +1,101 @@
+"""첨부파일 썸네일/미리보기 생성
+
+업로드가 커밋된 뒤 enqueue()로 작업 큐에 넣으면 워커 프로세스 풀에서 이미지 썸네일과
+PDF 첫 페이지 미리보기를 만들어 blob 옆에 <sha>.thumb.png 로 저장한다.
+업로드 요청은 큐에 넣기만 하므로 지연 시간이 늘지 않는다.
+
+이미지는 Pillow, PDF는 PyMuPDF(선택 설치)가 있을 때만 처리한다.
+"""
+import os
+from typing import Optional
+
+from sqlalchemy import select
+
+import blob_store
+import config
+import models
+import workers
+from database import engine
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 미설치 시 미리보기 비활성화
+    Image = None
+
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
+THUMB_SUFFIX = ".thumb.png"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif"}
+
+
+def is_previewable(filename: str) -> bool:
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in IMAGE_EXTENSIONS:
+        return Image is not None
+    if ext == ".pdf":
+        return Image is not None and fitz is not None
+    return False
+
+
+def thumbnail_url(blob_url: str) -> str:
+    """blob 공개 경로에 대응하는 썸네일 공개 경로"""
+    return os.path.splitext(blob_url)[0] + THUMB_SUFFIX
+
+
+def render_thumbnail(src: str, dst: str, size: int) -> bool:
+    """원본 파일로 PNG 썸네일 생성 (워커 프로세스에서 실행)"""
+    ext = os.path.splitext(src)[1].lower()
+    if ext == ".pdf":
+        with fitz.open(src) as doc:
+            if doc.page_count == 0:
+                return False
+            page = doc.load_page(0)
+            zoom = size / max(page.rect.width, page.rect.height)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            image = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    else:
+        image = Image.open(src)
+        image.draft("RGB", (size, size))  # JPEG는 디코딩 단계에서 축소
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+
+    image.thumbnail((size, size))
+    tmp = dst + ".part"
+    image.save(tmp, "PNG", optimize=True)
+    os.replace(tmp, dst)
+    return True
+
+
+async def _process(blob_url: str):
+    dst = blob_store.derived_path(blob_url, THUMB_SUFFIX)
+    src = blob_store.blob_disk_path(blob_url)
+    if os.path.exists(dst) or not os.path.isfile(src):
+        return
+    await workers.run_in_process(render_thumbnail, src, dst, config.THUMBNAIL_SIZE)
+
+
+queue = workers.JobQueue("previews", _process, concurrency=config.WORKER_PROCESSES)
+
+
+def enqueue(blob_url: Optional[str]):
+    """미리보기 대상이면 생성 작업 추가 (이미 썸네일이 있으면 무시)"""
+    if not config.PREVIEW_ENABLED or not blob_url or not is_previewable(blob_url):
+        return
+    if not blob_url.startswith(f"/{config.UPLOAD_DIR}/{blob_store.BLOB_SUBDIR}/"):
+        return  # blob 저장소로 옮기지 않은 레거시 파일은 제외
+    if os.path.exists(blob_store.derived_path(blob_url, THUMB_SUFFIX)):
+        return
+    queue.put(blob_url)
+
+
+def backfill() -> int:
+    """썸네일이 없는 기존 blob을 큐에 추가 (시작 시 실행). 추가한 수를 반환"""
+    count = 0
+    with engine.connect() as conn:
+        for (path,) in conn.execute(select(models.Blob.path)):
+            if is_previewable(path) and not os.path.exists(blob_store.derived_path(path, THUMB_SUFFIX)):
+                enqueue(path)
+                count += 1
+    return count
@@ -0,0 +1,251 @@
+"""업무 리포트 점수 분석 (부서/기간별 추이, 이동 평균, 백분위, 부서 비교)
+
+리포트 점수와 evaluation JSON의 항목별 점수(productivity 등)를 열 단위 NumPy 배열로 메모리에 두고
+bincount/cumsum/정렬로 한 번에 집계한다. 수만 건도 요청 하나에서 바로 계산된다.
+
+- 열 배열은 id 순으로 새 리포트만 이어 붙인다 (evaluation 파싱은 리포트당 한 번). 리포트가 삭제되어
+  개수가 맞지 않으면 다시 읽는다
+- 부서는 요청 시점의 users.department 기준
+- 결과는 (마지막 리포트 id, 리포트 수, 사용자별 부서, 조건)으로 캐시 -> 새 리포트가 생기면 자동 무효화
+"""
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from work_reports import REPORT_TYPES
+
+try:
+    import numpy as np
+except ImportError:  # numpy 미설치 시 분석 비활성화
+    np = None
+
+CATEGORIES = ("productivity", "quality", "consistency", "communication")
+PERIODS = ("week", "month")
+PERCENTILES = (10, 25, 50, 75, 90)
+UNASSIGNED = "미지정"
+_SCORES = re.compile(r'"scores"\s*:\s*(\{[^{}]*\})')
+_EPOCH = date(1970, 1, 1).toordinal()
+_MAX_CACHED = 32
+_LOAD_BATCH = 5000
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+def _category_scores(evaluation: Optional[str]) -> List[float]:
+    """evaluation JSON의 scores 항목 (없으면 NaN). 본문 전체 대신 scores 객체만 파싱"""
+    found = _SCORES.search(evaluation or "")
+    try:
+        scores = json.loads(found.group(1)) if found else {}
+    except ValueError:
+        scores = {}
+    values = []
+    for name in CATEGORIES:
+        value = scores.get(name)
+        values.append(float(value) if isinstance(value, (int, float)) else math.nan)
+    return values
+
+
+class _Columns:
+    """리포트 점수 열 배열 (id 순)"""
+
+    def __init__(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.user_ids = np.zeros(0, dtype=np.int64)
+        self.types = np.zeros(0, dtype=np.int8)  # REPORT_TYPES 순번 (-1: 알 수 없음)
+        self.days = np.zeros(0, dtype=np.int32)  # start_date (1970-01-01부터 일 수)
+        self.scores = np.zeros(0, dtype=np.float32)
+        self.categories = np.zeros((0, len(CATEGORIES)), dtype=np.float32)
+
+    @property
+    def last_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def append(self, rows: list):
+        if not rows:
+            return
+        type_codes = {name: code for code, name in enumerate(REPORT_TYPES)}
+        self.ids = np.concatenate([self.ids, np.fromiter((r.id for r in rows), np.int64, len(rows))])
+        self.user_ids = np.concatenate([self.user_ids, np.fromiter((r.user_id or 0 for r in rows), np.int64, len(rows))])
+        self.types = np.concatenate([self.types, np.fromiter(
+            (type_codes.get(r.report_type, -1) for r in rows), np.int8, len(rows))])
+        self.days = np.concatenate([self.days, np.fromiter(
+            ((r.start_date.toordinal() - _EPOCH) if r.start_date else 0 for r in rows), np.int32, len(rows))])
+        self.scores = np.concatenate([self.scores, np.fromiter(
+            (math.nan if r.score is None else r.score for r in rows), np.float32, len(rows))])
+        self.categories = np.concatenate([self.categories, np.asarray(
+            [_category_scores(r.evaluation) for r in rows], dtype=np.float32).reshape(-1, len(CATEGORIES))])
+
+
+_columns: Optional[_Columns] = None
+_results: "OrderedDict[tuple, dict]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _append_new(db: Session, columns: _Columns) -> _Columns:
+    report = models.WorkReport
+    while True:
+        rows = db.query(report.id, report.user_id, report.report_type, report.start_date, report.score,
+                        report.evaluation).filter(report.id > columns.last_id) \
+            .order_by(report.id).limit(_LOAD_BATCH).all()
+        columns.append(rows)
+        if len(rows) < _LOAD_BATCH:
+            return columns
+
+
+def _load(db: Session, columns: _Columns) -> _Columns:
+    """columns 뒤에 새 리포트를 이어 붙임. 이미 읽은 id 범위에서 삭제가 있었으면 처음부터 한 번만 다시 읽음
+    (개수는 읽은 범위 안에서만 세므로 그 사이 추가된 리포트와 혼동하지 않음)"""
+    columns = _append_new(db, columns)
+    report = models.WorkReport
+    if db.query(func.count(report.id)).filter(report.id <= columns.last_id).scalar() != len(columns.ids):
+        columns = _append_new(db, _Columns())
+    return columns
+
+
+def _values(array) -> list:
+    return [None if math.isnan(v) else v for v in np.round(array.astype(np.float64), 1).tolist()]
+
+
+def _means(sums, counts):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _rolling(sums, counts, window: int):
+    """기간 축(마지막 축)으로 최근 window 기간의 리포트 수 가중 평균"""
+    def trailing(values):
+        cumulative = np.cumsum(values, axis=-1)
+        shifted = np.zeros_like(cumulative)
+        shifted[..., window:] = cumulative[..., :-window]
+        return cumulative - shifted
+    return _means(trailing(sums), trailing(counts))
+
+
+def _percentiles(values) -> dict:
+    if not len(values):
+        return {f"p{p}": None for p in PERCENTILES}
+    return {f"p{p}": round(float(v), 1) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def _period_labels(period: str, first: int, size: int) -> List[str]:
+    index = np.arange(first, first + size)
+    if period == "month":
+        return [str(m) for m in index.astype("datetime64[M]")]
+    return [str(d) for d in (index * 7 - 3).astype("datetime64[D]")]  # 주 시작(월요일)
+
+
+def analyze(db: Session, report_type: Optional[str] = None, period: str = "month",
+            start_date: Optional[date] = None, end_date: Optional[date] = None,
+            department: Optional[str] = None, window: int = 3) -> dict:
+    """부서/기간별 점수 추이와 이동 평균, 백분위, 부서 비교 (리포트 시작일 기준으로 기간을 나눔)"""
+    global _columns
+    window = max(1, window)
+    users = tuple(db.query(models.User.id, models.User.department).order_by(models.User.id).all())
+
+    with _lock:
+        _columns = columns = _load(db, _columns or _Columns())
+        last_id = columns.last_id
+        key = (last_id, len(columns.ids), hash(users), report_type, period, start_date, end_date, department, window)
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+
+        departments = sorted({d or UNASSIGNED for _, d in users} | {UNASSIGNED})
+        codes = {name: code for code, name in enumerate(departments)}
+        lookup = np.full(max([uid for uid, _ in users] + [0]) + 1, codes[UNASSIGNED], dtype=np.int64)
+        for uid, dept in users:
+            lookup[uid] = codes[dept or UNASSIGNED]
+        dept = np.where(columns.user_ids < len(lookup),
+                        lookup[np.minimum(columns.user_ids, len(lookup) - 1)], codes[UNASSIGNED])
+
+        mask = np.isfinite(columns.scores)
+        if report_type:
+            mask &= columns.types == REPORT_TYPES.index(report_type)
+        if start_date:
+            mask &= columns.days >= start_date.toordinal() - _EPOCH
+        if end_date:
+            mask &= columns.days <= end_date.toordinal() - _EPOCH
+        if department:
+            mask &= dept == codes.get(department, -1)
+
+        days, dept, scores, categories = columns.days[mask], dept[mask], columns.scores[mask], columns.categories[mask]
+        if period == "month":
+            periods = days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+        else:
+            periods = (days.astype(np.int64) + 3) // 7  # 1970-01-01은 목요일 -> 월요일 시작 주
+        first = int(periods.min()) if len(periods) else 0
+        size = int(periods.max()) - first + 1 if len(periods) else 0
+
+        # (부서, 기간) 칸별 합계/개수
+        n_dept = len(departments)
+        cells = dept * size + (periods - first)
+        shape = (n_dept, size)
+        counts = np.bincount(cells, minlength=n_dept * size).reshape(shape).astype(np.float64)
+        sums = np.bincount(cells, weights=scores, minlength=n_dept * size).reshape(shape)
+        valid = ~np.isnan(categories)
+        category_counts = np.stack([np.bincount(dept, weights=valid[:, i], minlength=n_dept) for i in range(len(CATEGORIES))], axis=1)
+        category_sums = np.stack([np.bincount(dept, weights=np.where(valid[:, i], categories[:, i], 0), minlength=n_dept)
+                                  for i in range(len(CATEGORIES))], axis=1)
+
+        dept_counts = counts.sum(axis=1)
+        dept_means = _means(sums.sum(axis=1), dept_counts)
+        overall_mean = float(scores.mean()) if len(scores) else math.nan
+
+        # 부서별 백분위: 부서, 점수 순으로 정렬해 부서 구간별로 계산
+        order = np.lexsort((scores, dept))
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(dept, minlength=n_dept))])
+        sorted_scores = scores[order]
+
+        result = {
+            "filters": {
+                "type": report_type, "period": period, "window": window, "department": department,
+                "start_date": start_date.isoformat() if start_date else None,
+                "end_date": end_date.isoformat() if end_date else None,
+            },
+            "last_report_id": last_id,
+            "reports": int(mask.sum()),
+            "periods": _period_labels(period, first, size),
+            "overall": {
+                "mean": _values(np.array([overall_mean]))[0],
+                "percentiles": _percentiles(scores),
+                "categories": dict(zip(CATEGORIES, _values(_means(category_sums.sum(axis=0), category_counts.sum(axis=0))))),
+                "trend": _values(_means(sums.sum(axis=0), counts.sum(axis=0))),
+                "rolling": _values(_rolling(sums.sum(axis=0), counts.sum(axis=0), window)),
+                "counts": counts.sum(axis=0).astype(int).tolist(),
+            },
+            "departments": [],
+        }
+        trend, rolling = _means(sums, counts), _rolling(sums, counts, window)
+        category_means = _means(category_sums, category_counts)
+        ranks = np.argsort(np.argsort(-np.nan_to_num(dept_means, nan=-np.inf)))
+        for code, name in enumerate(departments):
+            if not dept_counts[code]:
+                continue
+            result["departments"].append({
+                "department": name,
+                "reports": int(dept_counts[code]),
+                "mean": _values(dept_means[code:code + 1])[0],
+                "vs_overall": _values(np.array([dept_means[code] - overall_mean]))[0],
+                "rank": int(ranks[code]) + 1,
+                "percentiles": _percentiles(sorted_scores[bounds[code]:bounds[code + 1]]),
+                "categories": dict(zip(CATEGORIES, _values(category_means[code]))),
+                "trend": _values(trend[code]),
+                "rolling": _values(rolling[code]),
+                "counts": counts[code].astype(int).tolist(),
+            })
+        result["departments"].sort(key=lambda d: d["rank"])
+
+        _results[key] = result
+        while len(_results) > _MAX_CACHED:
+            _results.popitem(last=False)
+        return result
@@ -0,0 +1,191 @@
+"""프로젝트 업무 집계 (project_rollups)
+
+프로젝트별 업무 수(상태별), 지연 업무 수, 다음 마감일, 최근 활동 시각을
+단일 GROUP BY 쿼리로 계산해 project_rollups 테이블에 저장한다.
+업무/진행사항이 변경되면 세션 flush 시점에 해당 프로젝트만 증분 갱신한다.
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import and_, case, event, func, inspect, literal, select
+from sqlalchemy.orm import Session
+
+import models
+from database import engine
+
+_PENDING_KEY = "rollup_project_ids"
+_PENDING_TASK_KEY = "rollup_task_ids"
+
+
+def _rollup_select(project_ids: Optional[Iterable[int]], today: date):
+    """프로젝트별 집계 SELECT (업무가 없는 프로젝트는 0으로 채움)"""
+    tasks = models.Task.__table__
+    projects = models.Project.__table__
+    progress = models.TaskProgress.__table__
+
+    task_agg = (
+        select(
+            tasks.c.project_id.label("project_id"),
+            func.count(tasks.c.id).label("total_count"),
+            func.sum(case((tasks.c.status == "Todo", 1), else_=0)).label("todo_count"),
+            func.sum(case((tasks.c.status == "In Progress", 1), else_=0)).label("inprogress_count"),
+            func.sum(case((tasks.c.status == "Done", 1), else_=0)).label("done_count"),
+            func.sum(case((and_(tasks.c.due_date < today, tasks.c.status != "Done"), 1), else_=0)).label("overdue_count"),
+            func.min(case((and_(tasks.c.due_date >= today, tasks.c.status != "Done"), tasks.c.due_date))).label("next_due_date"),
+        )
+        .where(tasks.c.project_id.isnot(None))
+        .group_by(tasks.c.project_id)
+    )
+    activity_agg = (
+        select(
+            tasks.c.project_id.label("project_id"),
+            func.max(progress.c.created_at).label("last_activity_at"),
+        )
+        .select_from(progress.join(tasks, progress.c.task_id == tasks.c.id))
+        .where(tasks.c.project_id.isnot(None))
+        .group_by(tasks.c.project_id)
+    )
+    if project_ids is not None:
+        task_agg = task_agg.where(tasks.c.project_id.in_(project_ids))
+        activity_agg = activity_agg.where(tasks.c.project_id.in_(project_ids))
+    task_agg = task_agg.subquery()
+    activity_agg = activity_agg.subquery()
+
+    stmt = (
+        select(
+            projects.c.id.label("project_id"),
+            func.coalesce(task_agg.c.total_count, 0).label("total_count"),
+            func.coalesce(task_agg.c.todo_count, 0).label("todo_count"),
+            func.coalesce(task_agg.c.inprogress_count, 0).label("inprogress_count"),
+            func.coalesce(task_agg.c.done_count, 0).label("done_count"),
+            func.coalesce(task_agg.c.overdue_count, 0).label("overdue_count"),
+            task_agg.c.next_due_date,
+            activity_agg.c.last_activity_at,
+            literal(today, models.ProjectRollup.refreshed_on.type).label("refreshed_on"),
+        )
+        .select_from(
+            projects
+            .outerjoin(task_agg, task_agg.c.project_id == projects.c.id)
+            .outerjoin(activity_agg, activity_agg.c.project_id == projects.c.id)
+        )
+    )
+    if project_ids is not None:
+        stmt = stmt.where(projects.c.id.in_(project_ids))
+    return stmt
+
+
+def _upsert(conn, rows, touch: bool):
+    """project_rollups에 행 단위 upsert (SQLite/PostgreSQL ON CONFLICT)"""
+    if not rows:
+        return
+    table = models.ProjectRollup.__table__
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    now = datetime.utcnow()
+    values = []
+    for row in rows:
+        data = dict(row._mapping)
+        if touch:
+            last = data.get("last_activity_at")
+            data["last_activity_at"] = max(last, now) if last else now
+        values.append(data)
+
+    stmt = dialect_insert(table)
+    update_cols = {c.name: stmt.excluded[c.name] for c in table.columns if c.name != "project_id"}
+    if not touch:
+        # 전체 재계산 시에는 기존 활동 시각(업무 수정 시점)을 유지
+        update_cols["last_activity_at"] = func.coalesce(table.c.last_activity_at, stmt.excluded.last_activity_at)
+    conn.execute(stmt.on_conflict_do_update(index_elements=["project_id"], set_=update_cols), values)
+
+
+def refresh(conn, project_ids: Optional[Iterable[int]] = None, touch: bool = False, today: Optional[date] = None):
+    """지정한 프로젝트(없으면 전체)의 집계를 한 번의 GROUP BY 쿼리로 재계산"""
+    today = today or date.today()
+    if project_ids is not None:
+        project_ids = sorted({pid for pid in project_ids if pid})
+        if not project_ids:
+            return
+    rows = conn.execute(_rollup_select(project_ids, today)).fetchall()
+    _upsert(conn, rows, touch)
+
+    # 삭제된 프로젝트의 집계 행 정리
+    table = models.ProjectRollup.__table__
+    projects = models.Project.__table__
+    stale = table.delete().where(table.c.project_id.notin_(select(projects.c.id)))
+    if project_ids is not None:
+        stale = stale.where(table.c.project_id.in_(project_ids))
+    conn.execute(stale)
+
+
+def get_rollups(db: Session, project_ids: Optional[Iterable[int]] = None) -> Dict[int, models.ProjectRollup]:
+    """프로젝트 집계 조회. 누락되었거나 날짜가 지난 행만 재계산한다."""
+    today = date.today()
+    query = db.query(models.ProjectRollup)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        query = query.filter(models.ProjectRollup.project_id.in_(project_ids))
+    rollups = {r.project_id: r for r in query.all()}
+
+    if project_ids is None:
+        wanted = {pid for (pid,) in db.query(models.Project.id).all()}
+    else:
+        wanted = set(project_ids)
+    stale = {pid for pid in wanted if pid not in rollups or rollups[pid].refreshed_on != today}
+
+    if stale:
+        # 호출자 세션은 커밋하지 않도록 별도 트랜잭션에서 재계산/저장
+        with engine.begin() as conn:
+            refresh(conn, stale, today=today)
+        for r in db.query(models.ProjectRollup).filter(models.ProjectRollup.project_id.in_(stale)).all():
+            db.refresh(r)
+            rollups[r.project_id] = r
+    return rollups
+
+
+def refresh_projects(db: Session, project_ids: Iterable[int]):
+    """ORM flush를 거치지 않는 쓰기(bulk insert/update) 후 호출 (커밋은 호출자가 수행)"""
+    refresh(db.connection(), project_ids, touch=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_dirty_projects(session, flush_context, instances):
+    project_ids = session.info.setdefault(_PENDING_KEY, set())
+    task_ids = session.info.setdefault(_PENDING_TASK_KEY, set())
+    moved = set()  # 이전 프로젝트 값이 로드되지 않은 채(만료 후) 프로젝트가 바뀐 업무
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, models.Task):
+            project_ids.add(obj.project_id)
+            history = inspect(obj).attrs.project_id.history
+            project_ids.update(history.deleted or ())
+            if history.added and not history.deleted and obj.id is not None:
+                moved.add(obj.id)
+        elif isinstance(obj, models.TaskProgress):
+            task_ids.add(obj.task_id)
+        elif isinstance(obj, models.Project) and obj in session.deleted and obj.id is not None:
+            # 프로젝트 DELETE보다 먼저 집계 행 삭제 (FK가 남아 있는 기존 DB에서도 삭제가 막히지 않게)
+            table = models.ProjectRollup.__table__
+            session.connection().execute(table.delete().where(table.c.project_id == obj.id))
+    if moved:
+        # flush 전이므로 DB에는 아직 이전 프로젝트가 남아 있음
+        tasks = models.Task.__table__
+        project_ids.update(pid for (pid,) in session.connection().execute(
+            select(tasks.c.project_id).where(tasks.c.id.in_(moved))
+        ))
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _refresh_dirty_projects(session, flush_context):
+    project_ids = session.info.pop(_PENDING_KEY, set())
+    task_ids = {tid for tid in session.info.pop(_PENDING_TASK_KEY, set()) if tid}
+    conn = session.connection()
+    if task_ids:
+        tasks = models.Task.__table__
+        project_ids.update(pid for (pid,) in conn.execute(
+            select(tasks.c.project_id).where(tasks.c.id.in_(task_ids)).distinct()
+        ))
+    project_ids.discard(None)
+    if project_ids:
+        refresh(conn, project_ids, touch=True)
@@ -0,0 +1,69 @@
+"""프로세스 내 주기 작업 스케줄러
+
+아카이브, 첨부파일 정리 등 주기 작업을 등록해 두면 앱 시작 시 asyncio 태스크로 실행한다.
+작업 함수는 동기 함수이며 이벤트 루프를 막지 않도록 스레드에서 실행된다.
+"""
+import asyncio
+import traceback
+from datetime import datetime
+from typing import Callable, Dict, List
+
+_jobs: Dict[str, dict] = {}
+_tasks: List[asyncio.Task] = []
+
+
+def register(name: str, interval_seconds: float, func: Callable[[], object], initial_delay: float = 60):
+    """주기 작업 등록 (같은 이름으로 다시 등록하면 덮어씀)"""
+    _jobs[name] = {
+        "func": func,
+        "interval": interval_seconds,
+        "initial_delay": initial_delay,
+        "last_run": None,
+        "last_result": None,
+        "last_error": None,
+    }
+
+
+async def _run_periodic(name: str, job: dict):
+    await asyncio.sleep(job["initial_delay"])
+    while True:
+        try:
+            job["last_result"] = await asyncio.to_thread(job["func"])
+            job["last_error"] = None
+            print(f"[{datetime.now()}] Scheduler: {name} finished -> {job['last_result']}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job["last_error"] = str(e)
+            print(f"[{datetime.now()}] Scheduler: {name} failed: {e}")
+            traceback.print_exc()
+        job["last_run"] = datetime.now()
+        await asyncio.sleep(job["interval"])
+
+
+def start():
+    """등록된 작업 실행 시작 (실행 중인 이벤트 루프에서 호출)"""
+    for name, job in _jobs.items():
+        _tasks.append(asyncio.create_task(_run_periodic(name, job), name=f"scheduler:{name}"))
+
+
+async def stop():
+    """실행 중인 작업 취소"""
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+def status() -> List[dict]:
+    """작업별 마지막 실행 정보"""
+    return [
+        {
+            "name": name,
+            "interval_seconds": job["interval"],
+            "last_run": job["last_run"].isoformat() if job["last_run"] else None,
+            "last_result": job["last_result"],
+            "last_error": job["last_error"],
+        }
+        for name, job in _jobs.items()
+    ]
@@ -0,0 +1,598 @@
+"""의미 검색 색인 (회의록, 업무, 업무 템플릿, 표준 WBS 템플릿)
+
+"KC 시험 업체를 정한 회의"처럼 단어가 정확히 일치하지 않는 질문도 찾도록 문서를 벡터로 색인한다.
+
+- 임베딩은 교체 가능 (SEMANTIC_EMBEDDER). hashing: 단어와 글자 n-gram을 feature hashing한 로컬 벡터로
+  검색어에는 문서 빈도로 IDF 가중치를 준다 (TF-IDF 근사, 네트워크 불필요). gemini: 임베딩 API
+- 벡터는 SEMANTIC_INDEX_DIR의 memmap 파일(float32, 문서당 한 행), 문서 정보는 semantic_documents 테이블
+- 검색은 블록 단위 행렬 곱으로 코사인 유사도를 계산하고 블록마다 argpartition으로 상위 k개만 남긴다
+- 업무/회의록/템플릿이 ORM으로 커밋되면 해당 문서만 다시 색인 (본문 해시가 같으면 건너뜀).
+  ORM을 거치지 않은 변경은 호출한 쪽이 remove/mark_changed로 알리고, 빠진 것은 주기적인 sync()가 맞춘다
+
+사용법:
+    python semantic_index.py              # 색인 동기화
+    python semantic_index.py KC 시험 업체  # 검색
+"""
+import abc
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import attachment_text
+import config
+import models
+import wbs_templates
+import workers
+from database import engine
+
+try:
+    import numpy as np
+except ImportError:  # numpy 미설치 시 의미 검색 비활성화
+    np = None
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+KINDS = ("minutes", "task", "template", "wbs")
+_KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+_PENDING_KEY = "semantic_index_keys"
+_SYNC = "__sync__"
+_INITIAL_CAPACITY = 1024
+
+_docs = models.SemanticDocument.__table__
+
+
+def is_available() -> bool:
+    return config.SEMANTIC_ENABLED and np is not None
+
+
+# --- 임베딩 ---
+
+class Embedder(abc.ABC):
+    """텍스트 목록 -> L2 정규화된 float32 행렬 (문서 수 x dim)"""
+    name = ""
+    dim = 0
+    uses_idf = False
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}-{self.dim}"
+
+    @abc.abstractmethod
+    def embed(self, texts: List[str], query: bool = False) -> "np.ndarray":
+        """query: 검색어 임베딩인지 (문서와 다르게 처리하는 임베딩용)"""
+
+
+def _normalize_rows(vectors: "np.ndarray") -> "np.ndarray":
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder(Embedder):
+    """단어(가중치 1)와 단어 안 글자 2/3-gram(가중치 0.5)을 signed feature hashing.
+    글자 n-gram 덕분에 조사가 붙거나 붙여 쓴 단어(KC시험/시험을)도 겹친다"""
+    name = "hashing"
+    uses_idf = True
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> Counter:
+        counts: Counter = Counter()
+        for word in attachment_text.tokenize(text):
+            counts[word] += 1
+            padded = f"<{word}>"
+            for n in (2, 3):
+                for i in range(len(padded) - n + 1):
+                    counts["#" + padded[i:i + n]] += 0.5
+        return counts
+
+    def embed(self, texts: List[str], query: bool = False) -> "np.ndarray":
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self.features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if h & 0x80000000 else -1.0
+                # 반복 횟수는 로그로 눌러 긴 문서의 흔한 단어가 점수를 독차지하지 않게 함
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(weight) if weight > 1 else weight)
+        return _normalize_rows(vectors)
+
+
+class GeminiEmbedder(Embedder):
+    """Gemini 임베딩 API (SEMANTIC_EMBED_MODEL, output_dimensionality=SEMANTIC_DIM)"""
+    name = "gemini"
+
+    def __init__(self, dim: int):
+        if genai is None:
+            raise Exception("google-generativeai is not installed")
+        if not config.GEMINI_API_KEY:
+            raise Exception("No AI API Key configured")
+        genai.configure(api_key=config.GEMINI_API_KEY)
+        self.dim = dim
+
+    def embed(self, texts: List[str], query: bool = False) -> "np.ndarray":
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        result = genai.embed_content(
+            model=config.SEMANTIC_EMBED_MODEL,
+            content=texts,
+            task_type="retrieval_query" if query else "retrieval_document",
+            output_dimensionality=self.dim,
+        )
+        return _normalize_rows(np.asarray(result["embedding"], dtype=np.float32).reshape(len(texts), self.dim))
+
+
+EMBEDDERS = {"hashing": HashingEmbedder, "gemini": GeminiEmbedder}
+
+
+def create_embedder() -> Embedder:
+    if config.SEMANTIC_EMBEDDER not in EMBEDDERS:
+        raise ValueError(f"Unknown SEMANTIC_EMBEDDER: {config.SEMANTIC_EMBEDDER}")
+    return EMBEDDERS[config.SEMANTIC_EMBEDDER](config.SEMANTIC_DIM)
+
+
+# --- 색인 대상 문서 ---
+
+def _content_sha(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _doc(kind: str, ref_id, title: Optional[str], *parts) -> dict:
+    text = "\n".join(str(p) for p in (title, *parts) if p)[:config.SEMANTIC_MAX_CHARS]
+    return {
+        "doc_key": f"{kind}:{ref_id}",
+        "kind": kind,
+        "ref_id": str(ref_id),
+        "title": title or "",
+        "text": text,
+        "snippet": " ".join(text.split())[:200],
+    }
+
+
+def _phase_lines(phases) -> List[str]:
+    """템플릿 phases의 단계/업무 제목, 설명, 체크리스트"""
+    lines = []
+    for phase in phases or []:
+        if not isinstance(phase, dict):
+            continue
+        lines.append(phase.get("phase_name") or phase.get("name") or "")
+        for task in phase.get("tasks") or []:
+            if isinstance(task, dict):
+                lines.append(" ".join(str(v) for v in (task.get("title"), task.get("description")) if v))
+                lines.extend(str(item) for item in task.get("checklist") or [])
+    return lines
+
+
+def _wbs_docs() -> Dict[str, dict]:
+    docs = {}
+    for key, template in wbs_templates.TEMPLATES.items():
+        doc = _doc("wbs", key, template.get("name"), template.get("category"), template.get("description"),
+                   *_phase_lines(template.get("phases")))
+        docs[doc["doc_key"]] = doc
+    return docs
+
+
+def load_documents(conn, keys: Iterable[str]) -> Dict[str, dict]:
+    """doc_key 목록의 현재 원본 문서 (원본이 없으면 결과에서 빠짐)"""
+    keys = list(keys)
+    ids: Dict[str, List[int]] = {kind: [] for kind in KINDS}
+    for key in keys:
+        kind, _, ref_id = key.partition(":")
+        if kind in ("minutes", "task", "template") and ref_id.isdigit():
+            ids[kind].append(int(ref_id))
+
+    docs: Dict[str, dict] = {}
+    if ids["minutes"]:
+        m = models.MeetingMinutes.__table__
+        for row in conn.execute(select(m.c.id, m.c.topic, m.c.attendees, m.c.date, m.c.content)
+                                .where(m.c.id.in_(ids["minutes"]))):
+            docs[f"minutes:{row.id}"] = _doc("minutes", row.id, row.topic, row.date, row.attendees, row.content)
+    if ids["task"]:
+        t = models.Task.__table__
+        for row in conn.execute(select(t.c.id, t.c.title, t.c.description).where(t.c.id.in_(ids["task"]))):
+            docs[f"task:{row.id}"] = _doc("task", row.id, row.title, row.description)
+    if ids["template"]:
+        w = models.WorkTemplate.__table__
+        for row in conn.execute(select(w.c.id, w.c.name, w.c.category, w.c.description, w.c.content_json)
+                                .where(w.c.id.in_(ids["template"]))):
+            try:
+                phases = json.loads(row.content_json or "[]")
+            except ValueError:
+                phases = []
+            if isinstance(phases, dict):
+                phases = phases.get("phases")
+            docs[f"template:{row.id}"] = _doc("template", row.id, row.name, row.category, row.description,
+                                              *_phase_lines(phases))
+    wbs = _wbs_docs()
+    docs.update({key: wbs[key] for key in keys if key in wbs})
+    return docs
+
+
+def source_keys(conn) -> List[str]:
+    """색인해야 할 모든 문서 키"""
+    keys = [f"minutes:{i}" for (i,) in conn.execute(select(models.MeetingMinutes.id))]
+    keys += [f"task:{i}" for (i,) in conn.execute(select(models.Task.id))]
+    keys += [f"template:{i}" for (i,) in conn.execute(select(models.WorkTemplate.id))]
+    return keys + list(_wbs_docs())
+
+
+def url_for(kind: str, ref_id: str) -> str:
+    if kind == "minutes":
+        return f"/meeting_minutes/{ref_id}"
+    if kind == "task":
+        return "/tasks"
+    return "/work-templates"
+
+
+# --- 벡터 저장소 ---
+
+class SemanticIndex:
+    """memmap 벡터 + semantic_documents 테이블. 쓰기는 한 번에 하나씩 (프로세스 안에서 lock)"""
+
+    def __init__(self, embedder: Embedder, directory: str):
+        self.embedder = embedder
+        self.path = os.path.join(directory, f"vectors-{embedder.key}.f32")
+        self._lock = threading.RLock()
+        self._vectors = None
+        self._active = None  # 사용 중인 slot
+        self._kinds = None  # slot별 문서 종류 코드
+        self._df = None  # 차원별 문서 빈도 (hashing의 IDF용)
+        self._size = 0  # 사용한 적 있는 slot 수 (검색 범위)
+        self._signature = None
+        self._checked_at = 0.0
+
+    # 파일/메모리 상태
+
+    def _open(self, capacity: int):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        row_bytes = self.embedder.dim * 4
+        current = os.path.getsize(self.path) // row_bytes if os.path.exists(self.path) else 0
+        capacity = max(capacity, current, _INITIAL_CAPACITY)
+        if self._vectors is not None and len(self._vectors) >= capacity:
+            return
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self.path, "ab") as f:
+            f.truncate(capacity * row_bytes)
+        self._vectors = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(capacity, self.embedder.dim))
+        for name in ("_active", "_kinds"):
+            old = getattr(self, name)
+            grown = np.zeros(capacity, dtype=bool if name == "_active" else np.int8)
+            if old is not None:
+                grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _db_signature(self, conn):
+        return tuple(conn.execute(select(func.count(_docs.c.id), func.max(_docs.c.updated_at))).first())
+
+    def _load(self, conn):
+        """테이블 기준으로 slot 상태와 문서 빈도를 다시 만듦"""
+        rows = conn.execute(select(_docs.c.slot, _docs.c.kind).where(_docs.c.embedder == self.embedder.key)).fetchall()
+        size = max((slot for slot, _ in rows), default=-1) + 1
+        self._active = None
+        self._kinds = None
+        self._vectors = None
+        self._open(size)
+        for slot, kind in rows:
+            self._active[slot] = True
+            self._kinds[slot] = _KIND_CODES.get(kind, 0)
+        self._size = size
+        self._df = np.zeros(self.embedder.dim, dtype=np.float64)
+        block = config.SEMANTIC_SEARCH_BLOCK_ROWS
+        for start in range(0, size, block):
+            rows_block = self._vectors[start:start + block][self._active[start:start + block]]
+            self._df += np.count_nonzero(rows_block, axis=0)
+        self._signature = self._db_signature(conn)
+        self._checked_at = time.monotonic()
+
+    def _ensure_loaded(self, conn, force: bool = False):
+        """다른 프로세스가 색인을 바꿨으면 다시 읽음 (SEMANTIC_RELOAD_SECONDS마다 확인)"""
+        if self._vectors is None or force:
+            self._load(conn)
+            return
+        if time.monotonic() - self._checked_at < config.SEMANTIC_RELOAD_SECONDS:
+            return
+        self._checked_at = time.monotonic()
+        if self._db_signature(conn) != self._signature:
+            self._load(conn)
+
+    def _free_slot(self, taken: set) -> int:
+        free = np.flatnonzero(~self._active[:self._size])
+        for slot in free:
+            if int(slot) not in taken:
+                return int(slot)
+        slot = max(self._size, max(taken, default=-1) + 1)
+        self._open(slot + 1 if slot < len(self._active) else max(slot + 1, len(self._active) * 2))
+        return slot
+
+    def _set_vector(self, slot: int, vector: Optional["np.ndarray"], kind: Optional[str]):
+        old = self._vectors[slot]
+        if self._active[slot]:
+            self._df -= old != 0
+        if vector is None:
+            self._vectors[slot] = 0
+            self._active[slot] = False
+            return
+        self._vectors[slot] = vector
+        self._active[slot] = True
+        self._kinds[slot] = _KIND_CODES[kind]
+        self._df += vector != 0
+        self._size = max(self._size, slot + 1)
+
+    # 쓰기
+
+    def upsert(self, docs: List[dict]) -> int:
+        """문서 색인/갱신 (본문이 바뀐 문서만 임베딩). 새로 임베딩한 문서 수 반환"""
+        if not docs:
+            return 0
+        with self._lock, engine.begin() as conn:
+            self._ensure_loaded(conn)
+            existing = {row.doc_key: row for row in conn.execute(
+                select(_docs.c.doc_key, _docs.c.slot, _docs.c.content_sha, _docs.c.embedder)
+                .where(_docs.c.doc_key.in_([d["doc_key"] for d in docs]))
+            )}
+            changed = []
+            for doc in docs:
+                doc["content_sha"] = _content_sha(doc["text"])
+                row = existing.get(doc["doc_key"])
+                if row is None or row.content_sha != doc["content_sha"] or row.embedder != self.embedder.key:
+                    changed.append(doc)
+            if not changed:
+                return 0
+
+            vectors = self.embedder.embed([doc["text"] for doc in changed])
+            now = datetime.utcnow()
+            taken: set = set()
+            for doc, vector in zip(changed, vectors):
+                row = existing.get(doc["doc_key"])
+                slot = row.slot if row is not None and row.embedder == self.embedder.key else self._free_slot(taken)
+                taken.add(slot)
+                self._set_vector(slot, vector, doc["kind"])
+                values = {k: doc[k] for k in ("kind", "ref_id", "title", "snippet", "content_sha")}
+                values.update(slot=slot, embedder=self.embedder.key, updated_at=now)
+                if row is None:
+                    conn.execute(insert(_docs).values(doc_key=doc["doc_key"], **values))
+                else:
+                    conn.execute(update(_docs).where(_docs.c.doc_key == doc["doc_key"]).values(**values))
+            self._vectors.flush()
+            self._signature = self._db_signature(conn)
+        return len(changed)
+
+    def remove(self, keys: List[str]) -> int:
+        if not keys:
+            return 0
+        with self._lock, engine.begin() as conn:
+            self._ensure_loaded(conn)
+            rows = conn.execute(select(_docs.c.doc_key, _docs.c.slot, _docs.c.embedder)
+                                .where(_docs.c.doc_key.in_(keys))).fetchall()
+            for row in rows:
+                if row.embedder == self.embedder.key:
+                    self._set_vector(row.slot, None, None)
+            conn.execute(delete(_docs).where(_docs.c.doc_key.in_(keys)))
+            self._vectors.flush()
+            self._signature = self._db_signature(conn)
+        return len(rows)
+
+    # 검색
+
+    def _refresh(self):
+        with self._lock, engine.connect() as conn:
+            self._ensure_loaded(conn)
+            # 쓰기가 배열을 바꿔 끼워도 검색 중인 참조는 그대로 유지되도록 한 번에 가져감
+            return self._vectors, self._active[:self._size].copy(), self._kinds, self._df.copy()
+
+    def search_many(self, queries: List[str], kinds: Optional[List[str]] = None,
+                    limit: int = 10) -> List[List[Tuple[int, float]]]:
+        """질문별 (slot, 코사인 유사도) 상위 limit개. 여러 질문을 한 번의 행렬 곱으로 처리"""
+        vectors, mask, slot_kinds, df = self._refresh()
+        size = len(mask)
+        query_vectors = self.embedder.embed(queries, query=True)
+        if self.embedder.uses_idf:
+            documents = max(int(mask.sum()), 1)
+            idf = np.log((1 + documents) / (1 + df)).astype(np.float32) + 1
+            query_vectors = _normalize_rows(query_vectors * idf)
+
+        if kinds:
+            mask &= np.isin(slot_kinds[:size], [_KIND_CODES[k] for k in kinds if k in _KIND_CODES])
+        candidates: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        block = config.SEMANTIC_SEARCH_BLOCK_ROWS
+        for start in range(0, size, block):
+            block_mask = mask[start:start + block]
+            if not block_mask.any():
+                continue
+            scores = np.asarray(vectors[start:start + len(block_mask)]) @ query_vectors.T  # (행 수, 질문 수)
+            scores[~block_mask] = -np.inf
+            k = min(limit, len(scores))
+            top = np.argpartition(-scores, k - 1, axis=0)[:k]
+            for q in range(len(queries)):
+                candidates[q].extend(
+                    (start + int(i), float(scores[i, q])) for i in top[:, q] if scores[i, q] > 0
+                )
+        return [sorted(found, key=lambda item: -item[1])[:limit] for found in candidates]
+
+    def search(self, query: str, kinds: Optional[List[str]] = None, limit: int = 10) -> List[dict]:
+        """질문과 가까운 문서 (종류, 원본 ID, 제목, 미리보기, 점수, 링크)"""
+        found = self.search_many([query], kinds, limit)[0]
+        if not found:
+            return []
+        with engine.connect() as conn:
+            rows = {row.slot: row for row in conn.execute(
+                select(_docs.c.slot, _docs.c.kind, _docs.c.ref_id, _docs.c.title, _docs.c.snippet)
+                .where(_docs.c.slot.in_([slot for slot, _ in found]), _docs.c.embedder == self.embedder.key)
+            )}
+        return [
+            {
+                "kind": rows[slot].kind,
+                "id": rows[slot].ref_id,
+                "title": rows[slot].title,
+                "snippet": rows[slot].snippet,
+                "score": round(score, 4),
+                "url": url_for(rows[slot].kind, rows[slot].ref_id),
+            }
+            for slot, score in found if slot in rows
+        ]
+
+    def status(self) -> dict:
+        vectors, mask, _, _ = self._refresh()
+        return {
+            "embedder": self.embedder.key,
+            "documents": int(mask.sum()),
+            "capacity": len(vectors),
+            "path": self.path,
+        }
+
+
+_index: Optional[SemanticIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SemanticIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SemanticIndex(create_embedder(), config.SEMANTIC_INDEX_DIR)
+    return _index
+
+
+def index_keys(keys: List[str]) -> dict:
+    """문서 키 목록을 원본 기준으로 색인/삭제"""
+    index = get_index()
+    with engine.connect() as conn:
+        docs = load_documents(conn, keys)
+    indexed = 0
+    for start in range(0, len(docs), config.SEMANTIC_BATCH_SIZE):
+        batch = list(docs.values())[start:start + config.SEMANTIC_BATCH_SIZE]
+        try:
+            indexed += index.upsert(batch)
+        except IntegrityError:
+            # 다른 프로세스가 같은 slot을 먼저 썼음 -> 다시 읽고 한 번 더
+            with index._lock, engine.connect() as conn:
+                index._ensure_loaded(conn, force=True)
+            indexed += index.upsert(batch)
+    removed = index.remove([key for key in keys if key not in docs])
+    return {"indexed": indexed, "removed": removed}
+
+
+def sync() -> dict:
+    """원본과 색인 맞추기: 빠진 문서 색인, 원본이 없는 문서 제거, 임베딩 방식이 바뀐 문서 재색인"""
+    index = get_index()
+    with engine.connect() as conn:
+        sources = source_keys(conn)
+        indexed = dict(conn.execute(select(_docs.c.doc_key, _docs.c.embedder)).fetchall())
+    source_set = set(sources)
+    key = index.embedder.key
+    # 원본이 없거나 다른 임베딩 방식으로 만든 문서를 먼저 지워 slot을 비움
+    removed = index.remove([k for k, embedder in indexed.items() if k not in source_set or embedder != key])
+    # 표준 WBS 템플릿은 코드에 있으므로 매번 확인 (본문이 같으면 upsert에서 건너뜀)
+    result = index_keys([k for k in sources if indexed.get(k) != key or k.startswith("wbs:")])
+    result["removed"] += removed
+    return result
+
+
+def rebuild() -> dict:
+    """색인을 비우고 처음부터 다시 만듦"""
+    index = get_index()
+    with index._lock:
+        with engine.begin() as conn:
+            conn.execute(delete(_docs))
+        if os.path.exists(index.path):
+            index._vectors = None
+            os.remove(index.path)
+        with engine.connect() as conn:
+            index._ensure_loaded(conn, force=True)
+    return sync()
+
+
+def search(query: str, kinds: Optional[List[str]] = None, limit: int = 10) -> List[dict]:
+    return get_index().search(query, kinds, limit)
+
+
+# --- 쓰기 시 증분 갱신 ---
+
+async def _process(item: str):
+    if item == _SYNC:
+        print(f"[{datetime.now()}] Semantic index sync: {await asyncio.to_thread(sync)}")
+    else:
+        await asyncio.to_thread(index_keys, [item])
+
+
+queue = workers.JobQueue("semantic_index", _process, concurrency=1)
+
+
+def request_sync():
+    """백그라운드 동기화 요청 (시작 시)"""
+    if is_available():
+        queue.put(_SYNC)
+
+
+def remove(kind: str, ref_ids: Iterable) -> int:
+    """ORM을 거치지 않고 원본에서 빠진 문서(아카이브 등)를 바로 색인에서 제거 (원본 커밋 후 호출)"""
+    keys = [f"{kind}:{ref_id}" for ref_id in ref_ids]
+    if not keys or not is_available():
+        return 0
+    return get_index().remove(keys)
+
+
+def mark_changed(session: Session, kind: str, ref_ids: Iterable):
+    """ORM을 거치지 않은 변경(Core INSERT, 복원 등)도 session이 커밋되면 다시 색인되도록 등록"""
+    if is_available():
+        session.info.setdefault(_PENDING_KEY, set()).update(f"{kind}:{ref_id}" for ref_id in ref_ids)
+
+
+def _doc_key(obj) -> Optional[str]:
+    if isinstance(obj, models.MeetingMinutes):
+        return f"minutes:{obj.id}"
+    if isinstance(obj, models.Task):
+        return f"task:{obj.id}"
+    if isinstance(obj, models.WorkTemplate):
+        return f"template:{obj.id}"
+    return None
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if not is_available():
+        return
+    keys = session.info.setdefault(_PENDING_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        key = _doc_key(obj)
+        if key and obj.id is not None:
+            keys.add(key)
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_changes(session):
+    for key in session.info.pop(_PENDING_KEY, ()):
+        queue.put(key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        for hit in search(" ".join(sys.argv[1:])):
+            print(f"{hit['score']:.3f}  [{hit['kind']}] {hit['title']}  {hit['url']}")
+    else:
+        print(sync())
@@ -0,0 +1,101 @@
+"""업무 일괄 생성 서비스
+
+AI 제안 업무, WBS 템플릿, 회의록 액션 아이템처럼 한 번에 많은 업무를 만드는 경로에서
+사용한다. 담당자는 IN 쿼리 한 번으로 조회하고, 업무와 task_assignees 연결은
+INSERT ... RETURNING / executemany로 일괄 삽입한다.
+"""
+from typing import Dict, List, Tuple
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+
+import models
+import rollups
+import semantic_index
+
+
+def _resolve_users(db: Session, rows: List[dict]) -> Tuple[Dict[int, models.User], Dict[str, models.User]]:
+    """모든 행의 담당자 ID/이름을 한 번의 쿼리로 조회"""
+    ids = set()
+    names = set()
+    for row in rows:
+        ids.update(uid for uid in row.get("assignee_ids") or [] if uid)
+        names.update(name for name in row.get("assignee_names") or [] if name)
+
+    if not ids and not names:
+        return {}, {}
+
+    conditions = []
+    if ids:
+        conditions.append(models.User.id.in_(ids))
+    if names:
+        conditions.append(models.User.username.in_(names))
+    users = db.query(models.User).filter(or_(*conditions)).all()
+    return {u.id: u for u in users}, {u.username: u for u in users}
+
+
+def bulk_create_tasks(db: Session, rows: List[dict], creator: models.User, commit: bool = True) -> List[int]:
+    """업무 일괄 생성
+
+    rows: title, description, status, start_date, due_date, project_id, department,
+          assignee_ids(list[int]), assignee_names(list[str]) 키를 가진 dict 목록.
+    department가 없으면 첫 담당자의 부서, 그마저 없으면 생성자의 부서를 사용한다.
+    생성된 업무 ID 목록을 rows 순서대로 반환한다.
+    """
+    rows = [row for row in rows if row.get("title")]
+    if not rows:
+        return []
+
+    users_by_id, users_by_name = _resolve_users(db, rows)
+
+    task_values = []
+    assignees_per_row = []
+    for row in rows:
+        assignees = []
+        for uid in row.get("assignee_ids") or []:
+            if uid in users_by_id and users_by_id[uid] not in assignees:
+                assignees.append(users_by_id[uid])
+        for name in row.get("assignee_names") or []:
+            if name in users_by_name and users_by_name[name] not in assignees:
+                assignees.append(users_by_name[name])
+        assignees_per_row.append(assignees)
+
+        department = row.get("department")
+        if not department:
+            department = assignees[0].department if assignees and assignees[0].department else creator.department
+
+        task_values.append({
+            "title": row["title"],
+            "description": row.get("description"),
+            "status": row.get("status") or "Todo",
+            "start_date": row.get("start_date"),
+            "due_date": row.get("due_date"),
+            "project_id": row.get("project_id") or None,
+            "department": department,
+            "assignee_id": assignees[0].id if assignees else None,  # 레거시 단일 담당자
+            "creator_id": creator.id,
+        })
+
+    if db.get_bind().dialect.name == "sqlite":
+        # SQLite는 정렬 보장 RETURNING을 행 단위 INSERT로 처리하므로, 한 문장으로 삽입한 뒤
+        # 순차 할당된 rowid를 정렬해 입력 순서와 맞춘다 (단일 writer, 단일 문장 내 단조 증가).
+        task_ids = sorted(db.scalars(insert(models.Task).returning(models.Task.id), task_values))
+    else:
+        stmt = insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True)
+        task_ids = list(db.scalars(stmt, task_values))
+
+    links = [
+        {"task_id": task_id, "user_id": user.id}
+        for task_id, assignees in zip(task_ids, assignees_per_row)
+        for user in assignees
+    ]
+    if links:
+        db.execute(models.task_assignees.insert(), links)
+
+    # Core 삽입은 flush 훅을 거치지 않으므로 프로젝트 집계를 직접 갱신하고 의미 검색 색인 대상으로 등록
+    rollups.refresh_projects(db, {v["project_id"] for v in task_values})
+    semantic_index.mark_changed(db, "task", task_ids)
+
+    if commit:
+        db.commit()
+    return task_ids
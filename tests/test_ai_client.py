@@ -0,0 +1,38 @@
+"""AI 클라이언트 동시성 제한: 사용자별 슬롯 정리"""
+import asyncio
+
+import pytest
+
+import ai_client
+import ai_providers
+import config
+
+
+def test_user_slots_limit_concurrency_and_are_evicted_when_idle(monkeypatch):
+    monkeypatch.setattr(config, "AI_MAX_CONCURRENCY_PER_USER", 1)
+    helper = ai_client.AIHelper(provider=ai_providers.StubProvider())
+    running = []
+
+    async def call(user_id):
+        async def body():
+            async with helper._slot():
+                running.append(user_id)
+                assert running.count(user_id) == 1  # 사용자별 1개
+                await asyncio.sleep(0.01)
+                running.remove(user_id)
+        await ai_client.run_for_user(user_id, body())
+
+    async def main():
+        await asyncio.gather(*(call(user_id) for user_id in [1, 1, 2, 3, 3, 3]))
+
+    asyncio.run(main())
+    assert helper._user_semaphores == {}
+
+
+def test_provider_interface_requires_generate_and_model_name():
+    class Incomplete(ai_providers.AIProvider):
+        def model_name(self, method):
+            return "m"
+
+    with pytest.raises(TypeError):
+        Incomplete()
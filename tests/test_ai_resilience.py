@@ -0,0 +1,73 @@
+"""AI 호출 복원력: 백오프, 서킷 브레이커, 헤지"""
+import asyncio
+
+import pytest
+
+import ai_resilience
+
+
+def _caller(hedge_after=0.05, failures=3, attempts=1):
+    return ai_resilience.ResilientCaller(
+        ai_resilience.TokenBucket(0, 1), ai_resilience.CircuitBreaker(failures, 60),
+        max_attempts=attempts, retry_base=0.001, retry_cap=0.001, hedge_after=hedge_after,
+    )
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(10):
+        assert 0 <= ai_resilience.backoff_delay(attempt, 1, 8) <= min(8, 2 ** attempt)
+
+
+def test_circuit_opens_after_consecutive_retryable_failures():
+    caller = _caller(hedge_after=0)
+
+    async def failing():
+        raise TimeoutError("timed out")
+
+    for _ in range(3):
+        with pytest.raises(TimeoutError):
+            asyncio.run(caller.call(failing))
+    with pytest.raises(ai_resilience.CircuitOpenError):
+        asyncio.run(caller.call(failing))
+    assert caller.stats["rejected"] == 1
+
+
+def test_non_retryable_errors_do_not_open_circuit():
+    caller = _caller(hedge_after=0, failures=1)
+
+    async def bad_request():
+        raise ValueError("invalid prompt")
+
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            asyncio.run(caller.call(bad_request))
+    assert caller.breaker.state == "closed"
+
+
+def test_slow_call_is_hedged_and_faster_hedge_wins():
+    caller = _caller()
+
+    async def slow():
+        await asyncio.sleep(1)
+        return "slow"
+
+    async def fast():
+        return "fast"
+
+    assert asyncio.run(caller.call(slow, hedge=fast)) == "fast"
+    assert caller.stats["hedges"] == 1 and caller.stats["hedge_wins"] == 1
+
+
+def test_hedge_is_skipped_when_hedge_threads_are_busy():
+    caller = _caller()
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "slow"
+
+    async def never():
+        raise AssertionError("hedge must not run")
+
+    assert asyncio.run(caller.call(slow, hedge=never, can_hedge=lambda: False)) == "slow"
+    assert asyncio.run(caller.call(slow)) == "slow"  # hedge 없으면 헤지하지 않음
+    assert caller.stats["hedges"] == 0 and caller.stats["hedges_skipped"] == 1
@@ -0,0 +1,75 @@
+"""아카이브를 FK 강제 DB(SQLite foreign_keys=ON, 운영 Postgres와 같은 조건)에서 실행"""
+from datetime import date
+
+from sqlalchemy import create_engine, event, text
+
+import archive
+import models
+import rollups
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _foreign_keys_on(dbapi_conn, _):
+        dbapi_conn.execute("PRAGMA foreign_keys=ON")
+
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # project_rollups FK가 남아 있는 기존 DB와 같은 조건
+        conn.execute(text("DROP TABLE project_rollups"))
+        conn.execute(text(
+            "CREATE TABLE project_rollups (project_id INTEGER PRIMARY KEY REFERENCES projects(id), "
+            "total_count INTEGER, todo_count INTEGER, inprogress_count INTEGER, done_count INTEGER, "
+            "overdue_count INTEGER, next_due_date DATE, last_activity_at DATETIME, refreshed_on DATE)"
+        ))
+    return engine
+
+
+def test_archive_and_restore_project_with_foreign_keys():
+    engine = _engine()
+    with engine.begin() as conn:
+        conn.execute(models.Project.__table__.insert(), [
+            {"id": 1, "name": "done", "status": "Completed", "end_date": date(2020, 1, 31)},
+            {"id": 2, "name": "active", "status": "In Progress", "end_date": date(2020, 1, 31)},
+        ])
+        conn.execute(models.Task.__table__.insert(), [
+            {"id": 10, "title": "t", "status": "Done", "project_id": 1, "due_date": date(2020, 1, 20)},
+        ])
+        conn.execute(models.TaskProgress.__table__.insert(), [{"task_id": 10, "content": "p", "date": date(2020, 1, 10)}])
+        rollups.refresh(conn)
+
+    with engine.begin() as conn:
+        assert archive.find_archivable_projects(conn) == [1]
+        moved = archive.archive_projects(conn, [1])
+    assert moved["projects"] == 1 and moved["tasks"] == 1 and moved["task_progress"] == 1
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM projects")).fetchall() == [(2,)]
+        assert conn.execute(text("SELECT project_id FROM project_rollups")).fetchall() == [(2,)]
+        assert conn.execute(text("PRAGMA foreign_key_check")).fetchall() == []
+
+    with engine.begin() as conn:
+        assert archive.restore_project(conn, 1)["tasks"] == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT total_count FROM project_rollups WHERE project_id = 1")).scalar() == 1
+
+
+def test_run_archive_removes_archived_tasks_from_semantic_index(monkeypatch):
+    engine = _engine()
+    with engine.begin() as conn:
+        conn.execute(models.Project.__table__.insert(), [
+            {"id": 1, "name": "done", "status": "Completed", "end_date": date(2020, 1, 31)},
+        ])
+        conn.execute(models.Task.__table__.insert(), [
+            {"id": 10, "title": "in project", "status": "Done", "project_id": 1, "due_date": date(2020, 1, 20)},
+            {"id": 11, "title": "standalone", "status": "Done", "project_id": None, "due_date": date(2020, 1, 20)},
+            {"id": 12, "title": "open", "status": "Todo", "project_id": None, "due_date": date(2020, 1, 20)},
+        ])
+    removed = []
+    monkeypatch.setattr(archive, "engine", engine)
+    monkeypatch.setattr(archive.semantic_index, "remove", lambda kind, ids: removed.append((kind, sorted(ids))))
+
+    assert archive.run_archive()["tasks"] == 2
+    assert removed == [("task", [10, 11])]
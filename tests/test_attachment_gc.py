@@ -0,0 +1,60 @@
+"""첨부파일 GC: 미참조 blob 삭제, 삭제 직전에 재사용된 blob 보호"""
+import os
+import time
+
+from sqlalchemy import create_engine, select
+
+import attachment_gc
+import blob_store
+import config
+import models
+
+
+def _setup(tmp_path, monkeypatch, contents):
+    monkeypatch.chdir(tmp_path)
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(attachment_gc, "engine", engine)
+    old = time.time() - (config.GC_GRACE_HOURS + 1) * 3600
+    paths = {}
+    with engine.begin() as conn:
+        for sha256, data in contents.items():
+            url = f"/{config.UPLOAD_DIR}/{blob_store.blob_relpath(sha256, '.txt')}"
+            path = blob_store.blob_disk_path(url)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            os.utime(path, (old, old))
+            conn.execute(models.Blob.__table__.insert().values(sha256=sha256, size=len(data), path=url, ref_count=0))
+            conn.execute(models.BlobText.__table__.insert().values(sha256=sha256))
+            paths[sha256] = path
+    return engine, paths
+
+
+def _shas(engine, model):
+    with engine.connect() as conn:
+        return {sha for (sha,) in conn.execute(select(model.sha256))}
+
+
+def test_collect_garbage_deletes_unreferenced_blob_with_row_and_text(tmp_path, monkeypatch):
+    engine, paths = _setup(tmp_path, monkeypatch, {"a" * 64: b"aaa"})
+    stats = attachment_gc.collect_garbage()
+    assert stats["blobs_deleted"] == 1 and stats["bytes_reclaimed"] == 3
+    assert not os.path.exists(paths["a" * 64])
+    assert _shas(engine, models.Blob) == set() and _shas(engine, models.BlobText) == set()
+
+
+def test_collect_garbage_keeps_row_of_blob_reused_after_scan(tmp_path, monkeypatch):
+    engine, paths = _setup(tmp_path, monkeypatch, {"a" * 64: b"aaa", "b" * 64: b"bbb"})
+    scan = attachment_gc._scan
+
+    def scan_then_reuse(*args):
+        candidates = list(scan(*args))
+        os.utime(paths["b" * 64])  # 스캔 직후 중복 업로드가 재사용 (file_storage의 mtime 갱신)
+        return iter(candidates)
+
+    monkeypatch.setattr(attachment_gc, "_scan", scan_then_reuse)
+    stats = attachment_gc.collect_garbage()
+    assert stats["blobs_deleted"] == 1
+    assert os.path.exists(paths["b" * 64])
+    assert _shas(engine, models.Blob) == {"b" * 64} and _shas(engine, models.BlobText) == {"b" * 64}
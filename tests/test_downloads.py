@@ -0,0 +1,52 @@
+"""첨부파일 다운로드 응답: ETag/304, Range, blob 해시 추출"""
+import os
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+import blob_store
+import config
+import downloads
+
+SHA = "ab" * 32
+
+
+def _client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = f"/{config.UPLOAD_DIR}/{blob_store.blob_relpath(SHA, '.txt')}"
+    path = blob_store.blob_disk_path(url)
+    os.makedirs(os.path.dirname(path))
+    with open(path, "wb") as f:
+        f.write(b"0123456789")
+
+    app = FastAPI()
+
+    @app.get("/file")
+    def get_file(request: Request):
+        return downloads.file_response(request, url, filename="a.txt")
+
+    return TestClient(app)
+
+
+def test_blob_file_has_content_etag_and_answers_304(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/file")
+    assert response.status_code == 200 and response.content == b"0123456789"
+    assert response.headers["etag"] == f'"{SHA}"'
+    assert response.headers["cache-control"] == downloads.IMMUTABLE_CACHE_CONTROL
+    assert client.get("/file", headers={"If-None-Match": f'W/"{SHA}"'}).status_code == 304
+
+
+def test_range_request_returns_partial_content(tmp_path, monkeypatch):
+    client = _client(tmp_path, monkeypatch)
+    response = client.get("/file", headers={"Range": "bytes=2-4"})
+    assert response.status_code == 206 and response.content == b"234"
+    assert client.get("/file", headers={"Range": "bytes=20-30"}).status_code == 416
+
+
+def test_blob_sha256_of_covers_derived_files():
+    base = f"/{config.UPLOAD_DIR}/{blob_store.BLOB_SUBDIR}/ab/ab/"
+    assert downloads.blob_sha256_of(base + SHA + ".pdf") == SHA
+    assert downloads.blob_sha256_of(base + SHA + ".thumb.png") == SHA
+    assert downloads.blob_sha256_of(f"/{config.UPLOAD_DIR}/legacy.pdf") is None
+    assert downloads.sha256_from_path(base + SHA + ".thumb.png") is None
@@ -0,0 +1,59 @@
+"""업로드 저장: 요청 크기 검사, 파일 크기 한도, 내용 중복 제거"""
+import asyncio
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+import config
+import file_storage
+
+
+def _upload(data: bytes, filename: str = "a.txt") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+def test_check_request_size_uses_content_length_of_multipart_requests():
+    too_large = str(config.MAX_UPLOAD_REQUEST_SIZE + 1)
+    assert file_storage.check_request_size({"content-type": "multipart/form-data; boundary=x",
+                                            "content-length": too_large})
+    assert file_storage.check_request_size({"content-type": "multipart/form-data; boundary=x",
+                                            "content-length": "100"}) is None
+    assert file_storage.check_request_size({"content-type": "application/json", "content-length": too_large}) is None
+    assert file_storage.check_request_size({"content-type": "multipart/form-data; boundary=x"}) is None
+
+
+def test_save_upload_rejects_oversized_file_and_removes_partial(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, "MAX_FILE_SIZE", 10)
+    monkeypatch.setattr(config, "UPLOAD_CHUNK_SIZE", 4)
+    with pytest.raises(file_storage.UploadRejected):
+        asyncio.run(file_storage.save_upload(_upload(b"x" * 11)))
+    assert os.listdir(os.path.join(config.UPLOAD_DIR, "blobs")) == []
+
+
+def test_save_upload_reuses_blob_with_same_content(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = asyncio.run(file_storage.save_upload(_upload(b"hello", "a.txt")))
+    second = asyncio.run(file_storage.save_upload(_upload(b"hello", "b.pdf")))
+    assert second.url == first.url and second.filename == "b.pdf"
+    with open(first.path, "rb") as f:
+        assert f.read() == b"hello"
+
+
+def test_save_upload_stores_again_when_found_blob_is_collected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first = asyncio.run(file_storage.save_upload(_upload(b"hello")))
+    found = file_storage.blob_store.find_blob_url
+
+    def find_then_collect(sha256):
+        url = found(sha256)
+        os.remove(file_storage.blob_store.blob_disk_path(url))  # GC가 찾은 직후 삭제
+        return url
+
+    monkeypatch.setattr(file_storage.blob_store, "find_blob_url", find_then_collect)
+    second = asyncio.run(file_storage.save_upload(_upload(b"hello")))
+    assert second.url == first.url
+    with open(second.path, "rb") as f:
+        assert f.read() == b"hello"
@@ -0,0 +1,125 @@
+"""AI 작업 큐: 등록 중복 제거, 선점, 임대 회수, 재시도, 일괄 리포트 재시도/덮어쓰기"""
+import asyncio
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import config
+import jobs
+import models
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=uid, username=f"u{uid}") for uid in (1, 2, 3)])
+    db.add(models.AIJob(id=1, kind="work_report_batch", status="running", params=json.dumps({"type": "MONTHLY"})))
+    db.commit()
+    return db
+
+
+def _reports(db):
+    return sorted(db.query(models.WorkReport.user_id, models.WorkReport.summary)
+                  .filter(models.WorkReport.start_date == START).all())
+
+
+def _result(summary):
+    return {"summary": summary, "score": 80}
+
+
+def test_batch_retry_skips_users_saved_by_earlier_attempt():
+    db = _session()
+    jobs._save_batch(db, 1, "MONTHLY", START, END, [(1, _result("a")), (2, _result("b"))], False)
+    saved = json.loads(db.query(models.AIJob.params).filter(models.AIJob.id == 1).scalar())["saved_user_ids"]
+    assert saved == [1, 2]
+
+    # 덮어쓰기 재시도여도 이전 시도에서 저장한 사용자는 다시 만들지 않음
+    plan = jobs._batch_plan(db, "MONTHLY", START, END, None, True, True, saved)
+    assert sorted(plan["logs"]) == [3]
+    assert plan["saved"] == 2 and plan["skipped_existing"] == 0
+
+
+def test_batch_overwrite_replaces_existing_reports():
+    db = _session()
+    jobs._save_batch(db, 1, "MONTHLY", START, END, [(1, _result("old")), (2, _result("old"))], False)
+    assert jobs._batch_plan(db, "MONTHLY", START, END, None, True, False)["skipped_existing"] == 2
+
+    jobs._save_batch(db, 1, "MONTHLY", START, END, [(1, _result("new"))], True)
+    assert _reports(db) == [(1, "new"), (2, "old")]
+
+
+def _queue_engine(monkeypatch):
+    # 작업 함수는 스레드에서 DB를 쓰므로 모든 스레드가 같은 메모리 DB를 보게 함
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    monkeypatch.setattr(jobs, "engine", engine)
+    monkeypatch.setattr(jobs.queue, "put", lambda job_id: True)
+    return engine
+
+
+def _status(job_id):
+    job = jobs.get_job(job_id)
+    return job["status"], job["attempts"]
+
+
+def test_submit_dedups_active_jobs_until_finished(monkeypatch):
+    _queue_engine(monkeypatch)
+    job_id, created = jobs.submit("wbs", 1, {"goal": "a"})
+    assert created and jobs.submit("wbs", 1, {"goal": "a"}) == (job_id, False)
+    assert jobs.submit("wbs", 2, {"goal": "a"})[0] != job_id
+
+    jobs._finish(job_id, {"ok": True})
+    again, created = jobs.submit("wbs", 1, {"goal": "a"})
+    assert created and again != job_id
+
+
+def test_claim_is_exclusive_and_release_restores_attempts(monkeypatch):
+    _queue_engine(monkeypatch)
+    job_id, _ = jobs.submit("wbs", 1, {"goal": "a"})
+    assert jobs._claim(job_id).attempts == 1
+    assert jobs._claim(job_id) is None
+    jobs._release(job_id)
+    assert _status(job_id) == ("queued", 0)
+
+
+def test_recover_requeues_only_jobs_with_expired_lease(monkeypatch):
+    engine = _queue_engine(monkeypatch)
+    stale_id, _ = jobs.submit("wbs", 1, {"goal": "stale"})
+    live_id, _ = jobs.submit("wbs", 1, {"goal": "live"})
+    jobs._claim(stale_id)
+    jobs._claim(live_id)
+    expired = datetime.utcnow() - timedelta(seconds=config.AI_JOB_LEASE_SECONDS + 1)
+    with engine.begin() as conn:
+        conn.execute(update(jobs._jobs).values(started_at=expired, heartbeat_at=expired))
+    jobs._heartbeat(live_id)
+
+    jobs.recover()
+    assert _status(stale_id)[0] == "queued" and _status(live_id)[0] == "running"
+
+
+def test_failed_attempt_is_retried_then_marked_failed(monkeypatch):
+    engine = _queue_engine(monkeypatch)
+    monkeypatch.setattr(config, "AI_JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(config, "AI_JOB_RETRY_BASE_SECONDS", 60)
+
+    async def broken(job_id, user_id, params):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs._handlers, "broken", broken)
+    job_id, _ = jobs.submit("broken", 1, {})
+
+    async def run():
+        await jobs._process(job_id)
+        assert _status(job_id) == ("queued", 1)
+        await jobs._process(job_id)
+
+    asyncio.run(run())
+    assert _status(job_id) == ("failed", 2)
+    with engine.connect() as conn:
+        assert conn.execute(select(jobs._jobs.c.dedup_key).where(jobs._jobs.c.id == job_id)).scalar() is None
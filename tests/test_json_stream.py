@@ -0,0 +1,45 @@
+"""스트리밍 JSON 파서: 조각 경계와 무관하게 완성된 값만 순서대로 반환"""
+import json
+
+import json_stream
+
+DOC = {
+    "summary": "회의 \"요약\" {괄호} [대괄호]",
+    "phases": [
+        {"name": "설계", "tasks": [{"title": "A", "days": 3}, {"title": "B\\n", "days": 1.5}]},
+        {"name": "구현", "tasks": [{"title": "C", "done": True, "owner": None}]},
+    ],
+}
+PATTERN = ("phases", "*", "tasks", "*")
+
+
+def _parse(text: str, size: int):
+    parser = json_stream.JSONStreamParser([PATTERN])
+    found = []
+    for i in range(0, len(text), size):
+        found += parser.feed(text[i:i + size])
+    found += parser.close()
+    return parser, found
+
+
+def test_values_are_identical_for_every_chunk_size():
+    text = "```json\n" + json.dumps(DOC, ensure_ascii=False, indent=1) + "\n```"
+    expected = [(("phases", p, "tasks", t), task)
+                for p, phase in enumerate(DOC["phases"]) for t, task in enumerate(phase["tasks"])]
+    for size in (1, 2, 7, len(text)):
+        parser, found = _parse(text, size)
+        assert found == expected
+        assert parser.finished and parser.result() == DOC
+
+
+def test_unfinished_value_is_not_returned():
+    parser = json_stream.JSONStreamParser([PATTERN])
+    assert parser.feed('{"phases": [{"tasks": [{"title": "A"}, {"title": "B') == [
+        (("phases", 0, "tasks", 0), {"title": "A"})
+    ]
+    assert not parser.finished and parser.result() is None
+
+
+def test_path_matches_wildcards():
+    assert json_stream.path_matches(("a", "*"), ("a", 3))
+    assert not json_stream.path_matches(("a", "*"), ("a", 3, "b"))
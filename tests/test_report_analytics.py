@@ -0,0 +1,57 @@
+"""리포트 점수 분석: 부서/기간 집계, 이동 평균, 새 리포트/삭제 반영"""
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import report_analytics
+import work_reports
+
+pytestmark = pytest.mark.skipif(not report_analytics.is_available(), reason="numpy not installed")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    monkeypatch.setattr(report_analytics, "_columns", None)
+    monkeypatch.setattr(report_analytics, "_results", report_analytics.OrderedDict())
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, username="kim", department="A"), models.User(id=2, username="lee", department="B")])
+    db.commit()
+    return db
+
+
+def _save(db, user_id, month, score, productivity=None):
+    result = {"summary": "", "average_score": score}
+    if productivity is not None:
+        result["scores"] = {"productivity": productivity}
+    start = date(2024, month, 1)
+    work_reports.save_reports(db, "MONTHLY", start, start.replace(day=28), [(user_id, result)])
+
+
+def test_monthly_trend_by_department(db):
+    _save(db, 1, 1, 60, productivity=50)
+    _save(db, 1, 2, 80)
+    _save(db, 2, 1, 90)
+    result = report_analytics.analyze(db, period="month", window=2)
+
+    assert result["periods"] == ["2024-01", "2024-02"]
+    assert result["overall"]["trend"] == [75.0, 80.0] and result["overall"]["counts"] == [2, 1]
+    by_name = {d["department"]: d for d in result["departments"]}
+    assert by_name["A"]["trend"] == [60.0, 80.0] and by_name["A"]["rolling"] == [60.0, 70.0]
+    assert by_name["A"]["categories"]["productivity"] == 50.0
+    assert by_name["B"]["rank"] == 1 and by_name["B"]["trend"] == [90.0, None]
+
+
+def test_cached_result_follows_new_and_deleted_reports(db):
+    assert report_analytics.analyze(db)["reports"] == 0
+    _save(db, 1, 1, 60)
+    _save(db, 2, 1, 90)
+    assert report_analytics.analyze(db)["reports"] == 2
+
+    db.query(models.WorkReport).filter(models.WorkReport.user_id == 2).delete()
+    db.commit()
+    assert report_analytics.analyze(db)["overall"]["mean"] == 60.0
@@ -0,0 +1,54 @@
+"""프로젝트 집계: GROUP BY 재계산과 ORM 변경 시 증분 갱신"""
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import rollups
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _rollup(db, project_id):
+    db.expire_all()
+    return db.get(models.ProjectRollup, project_id)
+
+
+def test_refresh_counts_status_overdue_and_next_due():
+    db = _session()
+    db.add(models.Project(id=1, name="p", status="In Progress"))
+    db.add_all([
+        models.Task(title="a", status="Todo", project_id=1, due_date=date(2024, 1, 5)),
+        models.Task(title="b", status="In Progress", project_id=1, due_date=date(2024, 1, 20)),
+        models.Task(title="c", status="Done", project_id=1, due_date=date(2024, 1, 1)),
+    ])
+    db.commit()
+
+    rollups.refresh(db.connection(), [1], today=date(2024, 1, 10))
+    row = _rollup(db, 1)
+    assert (row.total_count, row.todo_count, row.inprogress_count, row.done_count) == (3, 1, 1, 1)
+    assert row.overdue_count == 1 and row.next_due_date == date(2024, 1, 20)
+
+
+def test_task_changes_refresh_their_projects_on_flush():
+    db = _session()
+    db.add_all([models.Project(id=1, name="p1", status="In Progress"),
+                models.Project(id=2, name="p2", status="In Progress")])
+    task = models.Task(title="a", status="Todo", project_id=1)
+    db.add(task)
+    db.commit()
+    assert _rollup(db, 1).total_count == 1
+
+    task.project_id = 2  # 이전 프로젝트와 새 프로젝트 모두 갱신
+    db.commit()
+    assert _rollup(db, 1).total_count == 0 and _rollup(db, 2).total_count == 1
+
+    db.delete(db.get(models.Project, 2))
+    db.delete(task)
+    db.commit()
+    assert _rollup(db, 2) is None
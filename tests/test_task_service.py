@@ -0,0 +1,36 @@
+"""업무 일괄 생성: 입력 순서 ID, 담당자 연결, 의미 검색 색인 등록"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import semantic_index
+import task_service
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, username="kim", department="A"), models.User(id=2, username="lee", department="B")])
+    db.commit()
+    return db
+
+
+def test_bulk_create_returns_ids_in_input_order_with_assignees():
+    db = _session()
+    creator = db.get(models.User, 1)
+    rows = [{"title": f"t{i}", "assignee_names": ["lee"] if i % 2 else []} for i in range(5)]
+    rows.insert(2, {"title": ""})  # 제목 없는 행은 건너뜀
+
+    task_ids = task_service.bulk_create_tasks(db, rows, creator)
+    titles = {t.id: t for t in db.query(models.Task).all()}
+    assert [titles[tid].title for tid in task_ids] == [f"t{i}" for i in range(5)]
+    assert [titles[tid].department for tid in task_ids] == ["A", "B", "A", "B", "A"]
+    assert [u.username for u in titles[task_ids[1]].assignees] == ["lee"]
+
+
+def test_bulk_create_registers_tasks_for_semantic_indexing(monkeypatch):
+    monkeypatch.setattr(semantic_index, "is_available", lambda: True)
+    db = _session()
+    task_ids = task_service.bulk_create_tasks(db, [{"title": "a"}, {"title": "b"}], db.get(models.User, 1), commit=False)
+    assert {f"task:{tid}" for tid in task_ids} <= db.info[semantic_index._PENDING_KEY]
@@ -0,0 +1,44 @@
+"""업무 리포트: 이력 keyset 페이지, 상세 조회 권한"""
+import json
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import models
+import work_reports
+
+
+def _session(reports_per_user=5):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([models.User(id=1, username="kim"), models.User(id=2, username="lee")])
+    db.commit()
+    for day in range(reports_per_user):
+        start = date(2024, 1, 1) + timedelta(days=day)
+        work_reports.save_reports(db, "DAILY", start, start, [
+            (1, {"summary": f"kim {day}", "average_score": 80}), (2, {"summary": f"lee {day}", "average_score": 70}),
+        ])
+    return db
+
+
+def test_history_pages_are_newest_first_without_gaps():
+    db = _session()
+    seen, before = [], None
+    while True:
+        page = work_reports.history(db, 1, before_id=before, limit=2)
+        seen += [item["start_date"] for item in page["items"]]
+        before = page["next_before"]
+        if before is None:
+            break
+    assert seen == [(date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(4, -1, -1)]
+    assert work_reports.history_count(db, 1) == 5
+
+
+def test_detail_json_only_returns_own_report():
+    db = _session(1)
+    own = work_reports.history(db, 1)["items"][0]["id"]
+    detail = json.loads(work_reports.detail_json(db, 1, own))
+    assert detail["summary"] == "kim 0" and json.loads(detail["evaluation"])["average_score"] == 80
+    assert work_reports.detail_json(db, 2, own) is None
@@ -53,14 +53,25 @@ def parse_date(date_str: Optional[str], format_str: str = "%Y-%m-%d") -> Optiona
         return None
 
 
-def validate_file_upload(filename: str, file_size: int) -> tuple[bool, Optional[str]]:
-    """파일 업로드 검증"""
-    if file_size > config.MAX_FILE_SIZE:
-        return False, f"파일 크기가 {config.MAX_FILE_SIZE / (1024*1024):.0f}MB를 초과합니다."
-
+def validate_file_extension(filename: str) -> tuple[bool, Optional[str]]:
+    """파일 확장자 검증 (본문을 읽기 전에 호출)"""
     if filename:
         ext = os.path.splitext(filename)[1].lower()
         if ext not in config.ALLOWED_EXTENSIONS:
             return False, f"허용되지 않은 파일 형식입니다. 허용 형식: {', '.join(config.ALLOWED_EXTENSIONS)}"
+    return True, None
+
 
+def validate_file_size(file_size: int) -> tuple[bool, Optional[str]]:
+    """파일 크기 검증"""
+    if file_size > config.MAX_FILE_SIZE:
+        return False, f"파일 크기가 {config.MAX_FILE_SIZE / (1024*1024):.0f}MB를 초과합니다."
     return True, None
+
+
+def validate_file_upload(filename: str, file_size: int) -> tuple[bool, Optional[str]]:
+    """파일 업로드 검증"""
+    is_valid, error_msg = validate_file_size(file_size)
+    if not is_valid:
+        return is_valid, error_msg
+    return validate_file_extension(filename)
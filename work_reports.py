@@ -0,0 +1,304 @@
+"""업무 리포트 생성
+
+리포트 기간 계산, 기간 내 업무 목록 조회, AI 평가 결과 저장.
+주간/월간 리포트는 이미 저장된 하위 리포트(일간/주간) 요약으로 만들고, 하위 리포트가 없는 날짜만
+업무 목록을 직접 보낸다 (report_logs).
+요청 안에서 바로 생성하는 라우트와 백그라운드 작업(jobs, 전 직원 일괄 생성 포함)이 같이 사용한다.
+"""
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, func, insert, or_, select, union
+from sqlalchemy.orm import Session
+
+import config
+import models
+
+REPORT_TYPES = ("DAILY", "WEEKLY", "MONTHLY")
+EMPTY_LOG = "No specific tasks found for this period."
+CHILD_TYPES = {"WEEKLY": "DAILY", "MONTHLY": "WEEKLY"}  # 상위 리포트를 만들 때 요약을 가져올 하위 리포트
+
+
+def report_range(report_type: str, target_date: date) -> Tuple[date, date]:
+    """리포트 종류별 기간 (일: 당일, 주: 월~일, 월: 1일~말일)"""
+    if report_type == "DAILY":
+        return target_date, target_date
+    if report_type == "WEEKLY":
+        start_date = target_date - timedelta(days=target_date.weekday())  # Monday
+        return start_date, start_date + timedelta(days=6)  # Sunday
+    if report_type == "MONTHLY":
+        start_date = target_date.replace(day=1)
+        next_month = start_date.replace(day=28) + timedelta(days=4)
+        return start_date, next_month - timedelta(days=next_month.day)
+    raise ValueError("Invalid report type")
+
+
+def _is_relevant(task, start_date: date, end_date: date) -> bool:
+    """_relevant_clause와 같은 규칙 (하위 리포트가 없는 날짜 구간별로 다시 거를 때 사용)"""
+    if not task.start_date and not task.due_date:
+        # 날짜 없는 업무는 완료되지 않은 것만 (backlog)
+        return task.status != "Done"
+    t_start = task.start_date or date.min
+    t_end = task.due_date or date.max
+    return not (t_start > end_date or t_end < start_date)
+
+
+def _relevant_clause(start_date: date, end_date: date):
+    """기간과 겹치는 업무 또는 날짜 없는 미완료 업무 (SQL 조건, tasks의 날짜 인덱스 사용)"""
+    task = models.Task
+    return or_(
+        and_(
+            or_(task.start_date.isnot(None), task.due_date.isnot(None)),
+            or_(task.start_date.is_(None), task.start_date <= end_date),
+            or_(task.due_date.is_(None), task.due_date >= start_date),
+        ),
+        and_(task.start_date.is_(None), task.due_date.is_(None),
+             or_(task.status.is_(None), task.status != "Done")),
+    )
+
+
+def _task_line(task) -> str:
+    return f"- [{task.status}] {task.title} (Due: {task.due_date}): {task.description or ''}"
+
+
+def _join_log(lines: List[str]) -> str:
+    return "\n".join(lines or [EMPTY_LOG])
+
+
+def task_log(db: Session, user_id: int, start_date: date, end_date: date) -> str:
+    """기간과 겹치는 업무(담당 또는 생성)와 날짜 없는 미완료 업무를 프롬프트용 목록으로"""
+    return task_logs(db, [user_id], start_date, end_date)[user_id] or EMPTY_LOG
+
+
+def _task_lines(db: Session, ranges: Dict[int, List[Tuple[date, date]]]) -> Dict[int, List[str]]:
+    """사용자별 기간 목록 중 하나라도 해당하는 업무 줄
+
+    담당/생성 업무를 각각 날짜 조건과 함께 SQL에서 거르고(전체 기간을 감싸는 범위) 필요한 컬럼만 가져온 뒤,
+    사용자별 기간(하위 리포트가 없는 날짜 구간)은 Python에서 다시 확인한다
+    """
+    lines: Dict[int, List[str]] = {user_id: [] for user_id in ranges}
+    if not any(ranges.values()):
+        return lines
+    user_ids = list(ranges)
+    relevant = _relevant_clause(min(start for found in ranges.values() for start, _ in found),
+                                max(end for found in ranges.values() for _, end in found))
+    task = models.Task
+    columns = (task.id, task.title, task.description, task.status, task.start_date, task.due_date)
+    assigned = select(models.task_assignees.c.user_id.label("user_id"), *columns) \
+        .join(models.task_assignees, models.task_assignees.c.task_id == task.id) \
+        .where(models.task_assignees.c.user_id.in_(user_ids), relevant)
+    created = select(task.creator_id.label("user_id"), *columns) \
+        .where(task.creator_id.in_(user_ids), relevant)
+    rows = union(assigned, created).subquery()
+    for row in db.execute(select(rows).order_by(rows.c.user_id, rows.c.id)):
+        if any(_is_relevant(row, start, end) for start, end in ranges[row.user_id]):
+            lines[row.user_id].append(_task_line(row))
+    return lines
+
+
+def task_logs(db: Session, user_ids: Iterable[int], start_date: date, end_date: date) -> Dict[int, Optional[str]]:
+    """여러 사용자의 task_log를 한 번의 쿼리로. 기간에 해당하는 업무가 없는 사용자는 None"""
+    lines = _task_lines(db, {user_id: [(start_date, end_date)] for user_id in user_ids})
+    return {user_id: ("\n".join(found) if found else None) for user_id, found in lines.items()}
+
+
+def _children(report_type: str, start_date: date, end_date: date) -> List[Tuple[str, date, date]]:
+    """하위 리포트 단위. 주간은 일간 7개, 월간은 달 안에 온전히 들어가는 주간 + 경계 주의 일간"""
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+    if report_type == "WEEKLY":
+        return [("DAILY", day, day) for day in days]
+    children = []
+    for day in days:
+        week_start, week_end = report_range("WEEKLY", day)
+        if week_start >= start_date and week_end <= end_date:
+            if day == week_start:
+                children.append(("WEEKLY", week_start, week_end))
+        else:
+            children.append(("DAILY", day, day))
+    return children
+
+
+def _plan(report_type: str, start_date: date, end_date: date, stored: dict) -> Tuple[list, List[Tuple[date, date]]]:
+    """저장된 하위 리포트로 채울 수 있는 부분과 업무 목록을 직접 보내야 하는 기간 (연속된 날짜는 합침)"""
+    used, gaps = [], []
+    for child_type, child_start, child_end in _children(report_type, start_date, end_date):
+        report = stored.get((child_type, child_start, child_end))
+        if report is not None:
+            used.append(report)
+        elif child_type in CHILD_TYPES:
+            child_used, child_gaps = _plan(child_type, child_start, child_end, stored)
+            used += child_used
+            gaps += child_gaps
+        elif gaps and gaps[-1][1] + timedelta(days=1) == child_start:
+            gaps[-1] = (gaps[-1][0], child_end)
+        else:
+            gaps.append((child_start, child_end))
+    return used, gaps
+
+
+def _summary_line(report) -> str:
+    period = str(report.start_date) if report.start_date == report.end_date else f"{report.start_date} ~ {report.end_date}"
+    summary = " ".join((report.summary or "").split())[:config.WORK_REPORT_SUMMARY_CHARS]
+    line = f"- [{report.report_type} {period}] (score {report.score}): {summary}"
+    try:
+        tasks = json.loads(report.evaluation or "{}").get("tasks_processed") or []
+    except (ValueError, AttributeError):
+        tasks = []
+    if tasks:
+        line += "\n  tasks: " + "; ".join(
+            f"{t.get('title')} ({t.get('status')})" for t in tasks[:config.WORK_REPORT_SUMMARY_TASKS] if isinstance(t, dict)
+        )
+    return line
+
+
+def report_logs(db: Session, user_ids: Iterable[int], report_type: str, start_date: date,
+                end_date: date) -> Dict[int, Optional[str]]:
+    """리포트 프롬프트에 넣을 사용자별 업무 기록
+
+    주간은 저장된 일간 리포트, 월간은 주간(없으면 일간) 리포트 요약으로 만들고, 하위 리포트가 없는
+    날짜만 업무 목록을 직접 넣는다. 하위 리포트가 하나도 없으면 task_log와 같다. 기록이 없으면 None
+    """
+    user_ids = list(user_ids)
+    if report_type not in CHILD_TYPES:
+        return task_logs(db, user_ids, start_date, end_date)
+
+    stored: Dict[int, dict] = {user_id: {} for user_id in user_ids}
+    if user_ids:
+        report = models.WorkReport
+        rows = db.query(report.id, report.user_id, report.report_type, report.start_date, report.end_date,
+                        report.summary, report.score, report.evaluation).filter(
+            report.user_id.in_(user_ids),
+            report.report_type.in_(("DAILY", "WEEKLY")),
+            report.start_date >= start_date,
+            report.end_date <= end_date,
+        ).order_by(report.id)
+        for row in rows:
+            stored[row.user_id][(row.report_type, row.start_date, row.end_date)] = row  # 같은 기간이면 최신 것
+
+    plans = {user_id: _plan(report_type, start_date, end_date, stored[user_id]) for user_id in user_ids}
+    lines = _task_lines(db, {user_id: (gaps if used else [(start_date, end_date)])
+                             for user_id, (used, gaps) in plans.items() if gaps or not used})
+
+    logs: Dict[int, Optional[str]] = {}
+    for user_id, (used, gaps) in plans.items():
+        found = lines.get(user_id) or []
+        if not used:
+            logs[user_id] = "\n".join(found) if found else None
+            continue
+        parts = ["Summaries of already evaluated sub-periods:"]
+        parts += [_summary_line(r) for r in sorted(used, key=lambda r: r.start_date)]
+        if found:
+            ranges = ", ".join(str(s) if s == e else f"{s} ~ {e}" for s, e in gaps)
+            parts += ["", f"Task log for days without reports ({ranges}):"] + found
+        logs[user_id] = "\n".join(parts)
+    return logs
+
+
+def report_log(db: Session, user_id: int, report_type: str, start_date: date, end_date: date) -> str:
+    """한 사용자의 리포트 프롬프트용 업무 기록 (report_logs 참고)"""
+    return report_logs(db, [user_id], report_type, start_date, end_date)[user_id] or EMPTY_LOG
+
+
+def reported_users(db: Session, report_type: str, start_date: date, end_date: date) -> Set[int]:
+    """같은 종류/기간의 리포트가 이미 있는 사용자"""
+    return {user_id for (user_id,) in db.query(models.WorkReport.user_id).filter(
+        models.WorkReport.report_type == report_type,
+        models.WorkReport.start_date == start_date,
+        models.WorkReport.end_date == end_date,
+    ).distinct()}
+
+
+def _report_values(user_id: int, report_type: str, start_date: date, end_date: date, ai_result: dict) -> dict:
+    return {
+        "user_id": user_id,
+        "report_type": report_type,
+        "start_date": start_date,
+        "end_date": end_date,
+        "summary": ai_result.get("summary"),
+        "evaluation": json.dumps(ai_result, ensure_ascii=False),
+        "score": ai_result.get("average_score"),  # AI returns 'average_score'
+        "created_at": datetime.now(),
+    }
+
+
+def save_report(db: Session, user_id: int, report_type: str, start_date: date, end_date: date,
+                ai_result: dict) -> models.WorkReport:
+    """AI 평가 결과를 리포트로 저장 (evaluation에는 화면에서 파싱할 전체 JSON)"""
+    report = models.WorkReport(**_report_values(user_id, report_type, start_date, end_date, ai_result))
+    db.add(report)
+    db.commit()
+    db.refresh(report)
+    return report
+
+
+def save_reports(db: Session, report_type: str, start_date: date, end_date: date,
+                 results: List[Tuple[int, dict]], replace: bool = False) -> int:
+    """(user_id, AI 평가 결과) 목록을 한 번의 INSERT로 저장.
+    replace면 같은 트랜잭션에서 해당 사용자들의 같은 종류/기간 기존 리포트를 먼저 삭제 (덮어쓰기)"""
+    if not results:
+        return 0
+    table = models.WorkReport.__table__
+    if replace:
+        db.execute(table.delete().where(
+            table.c.user_id.in_([user_id for user_id, _ in results]),
+            table.c.report_type == report_type,
+            table.c.start_date == start_date,
+            table.c.end_date == end_date,
+        ))
+    db.execute(insert(table), [
+        _report_values(user_id, report_type, start_date, end_date, ai_result) for user_id, ai_result in results
+    ])
+    db.commit()
+    return len(results)
+
+
+def response(report: models.WorkReport, ai_result: dict) -> dict:
+    """생성 API 응답 형식"""
+    return {
+        "status": "success",
+        "report_id": report.id,
+        "data": ai_result,
+        "date_range": f"{report.start_date} ~ {report.end_date}"
+    }
+
+
+# --- 히스토리 ---
+
+def history(db: Session, user_id: int, before_id: Optional[int] = None, limit: Optional[int] = None) -> dict:
+    """리포트 목록 한 페이지 (최신순). 본문(summary/evaluation) 없이 목록에 필요한 컬럼만
+
+    before_id 이전(더 오래된) 리포트부터 limit개. 다음 페이지는 next_before로 요청 (id 기준 keyset 페이지)
+    """
+    limit = max(1, min(limit or config.WORK_REPORT_HISTORY_PAGE_SIZE, 100))
+    report = models.WorkReport
+    query = db.query(report.id, report.report_type, report.start_date, report.end_date, report.score,
+                     report.created_at).filter(report.user_id == user_id)
+    if before_id:
+        query = query.filter(report.id < before_id)
+    rows = query.order_by(report.id.desc()).limit(limit + 1).all()
+    items = [{
+        "id": row.id,
+        "report_type": row.report_type,
+        "start_date": row.start_date.isoformat() if row.start_date else None,
+        "end_date": row.end_date.isoformat() if row.end_date else None,
+        "score": row.score or 0,
+        "created_at": row.created_at.strftime("%Y-%m-%d %H:%M") if row.created_at else "",
+    } for row in rows[:limit]]
+    return {"items": items, "next_before": items[-1]["id"] if len(rows) > limit else None}
+
+
+def history_count(db: Session, user_id: int) -> int:
+    return db.query(func.count(models.WorkReport.id)).filter(models.WorkReport.user_id == user_id).scalar() or 0
+
+
+def detail_json(db: Session, user_id: int, report_id: int) -> Optional[str]:
+    """리포트 상세 응답 JSON 문자열 (없거나 다른 사용자 것이면 None).
+    evaluation은 저장된 JSON 문자열을 그대로 넣어 화면에서 파싱한다"""
+    report = models.WorkReport
+    row = db.query(report.id, report.user_id, report.report_type, report.start_date, report.end_date,
+                   report.summary, report.evaluation, report.score, report.created_at).filter(
+        report.id == report_id, report.user_id == user_id).first()
+    if row is None:
+        return None
+    return json.dumps(dict(row._mapping), ensure_ascii=False, default=lambda value: value.isoformat())
@@ -0,0 +1,116 @@
+"""백그라운드 작업 큐와 프로세스 풀
+
+업로드 후처리(미리보기 생성, 텍스트 추출 등)처럼 요청 경로 밖에서 처리할 CPU 작업에 사용한다.
+JobQueue는 asyncio 큐 + 소비자 태스크로 구성되며, 무거운 계산은 run_in_process로
+공유 ProcessPoolExecutor에서 실행해 이벤트 루프와 API 스레드풀을 막지 않는다.
+"""
+import asyncio
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import config
+
+_pool: Optional[ProcessPoolExecutor] = None
+_queues: Dict[str, "JobQueue"] = {}
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """공유 프로세스 풀 (처음 사용할 때 생성)"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=config.WORKER_PROCESSES)
+    return _pool
+
+
+async def run_in_process(func: Callable, *args):
+    """picklable한 최상위 함수를 프로세스 풀에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pool(), func, *args)
+
+
+class JobQueue:
+    """이름 있는 작업 큐. put()은 어느 스레드에서 호출해도 안전하다"""
+
+    def __init__(self, name: str, handler: Callable[[object], Awaitable[object]], concurrency: int = 1):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.processed = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: set = set()
+        self._tasks: List[asyncio.Task] = []
+        _queues[name] = self
+
+    def put(self, item):
+        """작업 추가 (이미 대기 중인 항목은 무시). 큐가 시작되기 전이면 False"""
+        if self._loop is None or self._loop.is_closed():
+            return False
+        self._loop.call_soon_threadsafe(self._put_nowait, item)
+        return True
+
+    def _put_nowait(self, item):
+        if item in self._pending:
+            return
+        self._pending.add(item)
+        self._queue.put_nowait(item)
+
+    async def _consume(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                await self.handler(item)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"[{datetime.now()}] Worker: {self.name} failed for {item}: {e}")
+                traceback.print_exc()
+            finally:
+                self._pending.discard(item)
+                self._queue.task_done()
+
+    def start(self):
+        """소비자 태스크 시작 (실행 중인 이벤트 루프에서 호출)"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for i in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._consume(), name=f"worker:{self.name}:{i}"))
+
+    async def join(self):
+        """대기 중인 작업이 모두 끝날 때까지 대기"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._loop = None
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "pending": len(self._pending),
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+
+async def stop_all():
+    """모든 큐를 멈추고 프로세스 풀 종료"""
+    global _pool
+    for queue in _queues.values():
+        await queue.stop()
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def status() -> List[dict]:
+    return [queue.status() for queue in _queues.values()]